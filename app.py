@@ -1,18 +1,24 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import matplotlib.pyplot as plt
-import seaborn as sns
 from data_loader import MilionariaDataLoader
-from ml_models import MilionariaPredictor
+from model_registry import ModelRegistry, dataset_hash
+from instrumentation import PerfRegistry, use_registry, memory_profiling_enabled
+from jobs import JobManager, STATUS_ERROR
+from ml_models import TRAIN_STEPS
+from ball_scoring import BallScoringModel, BALL_MODEL_NAME
+from tickets import TicketGenerator, TicketConstraints
+from lazy_imports import LazyModule
 import os
+import time
+import uuid
 from datetime import datetime
 import warnings
 warnings.filterwarnings('ignore')
 
+# Plotly só é importado quando o primeiro gráfico é montado
+px = LazyModule('plotly.express')
+
 # Configuração da página
 st.set_page_config(
     page_title="Dashboard +Milionária ML",
@@ -73,25 +79,108 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-@st.cache_data
-def load_data(uploaded_file=None):
-    """Carrega os dados com cache"""
-    if uploaded_file is not None:
-        # Usa arquivo carregado pelo usuário
-        loader = MilionariaDataLoader(uploaded_file)
-        data = loader.load_data()
-        processed_data = loader.preprocess_data()
-        return loader, data, processed_data
-    else:
-        # Tenta carregar arquivo local
-        file_path = "+Milionária (2).xlsx"
-        if not os.path.exists(file_path):
-            st.warning("Arquivo Excel não encontrado. Usando dados de exemplo.")
-        
-        loader = MilionariaDataLoader(file_path)
-        data = loader.load_data()
-        processed_data = loader.preprocess_data()
-        return loader, data, processed_data
+DEFAULT_DATA_FILE = "+Milionária (2).xlsx"
+
+def get_source_hash(uploaded_file=None):
+    """Hash do conteúdo da fonte de dados: a chave de todos os caches do app"""
+    if uploaded_file is None:
+        if not os.path.exists(DEFAULT_DATA_FILE):
+            return 'dados_exemplo'
+        return MilionariaDataLoader(DEFAULT_DATA_FILE).source_hash()
+    
+    # O conteúdo do upload é lido uma única vez por arquivo (file_id muda a cada upload)
+    cached = st.session_state.get('upload_hash')
+    if cached is None or cached[0] != uploaded_file.file_id:
+        cached = (uploaded_file.file_id, MilionariaDataLoader(uploaded_file).source_hash())
+        st.session_state['upload_hash'] = cached
+    return cached[1]
+
+@st.cache_resource(max_entries=2)
+def load_data(source_hash, _uploaded_file=None):
+    """Carrega e preprocessa os dados uma vez por conteúdo (objetos compartilhados, sem cópia por rerun)"""
+    # O argumento com "_" fica fora da chave: só o hash do conteúdo identifica os dados
+    loader = MilionariaDataLoader(_uploaded_file if _uploaded_file is not None else DEFAULT_DATA_FILE)
+    data = loader.load_data()
+    processed_data = loader.preprocess_data()
+    return loader, data, processed_data
+
+@st.cache_data(max_entries=2)
+def get_frequency_analysis(source_hash, _loader):
+    """Análise de frequência dos dados identificados por source_hash"""
+    return _loader.get_frequency_analysis()
+
+@st.cache_data(max_entries=2)
+def get_dataset_hash(source_hash, _processed_data):
+    """Hash dos dados pré-processados (chave dos artefatos no registro de modelos)"""
+    return dataset_hash(_processed_data)
+
+def reset_session_results(source_hash):
+    """Ao trocar de arquivo, descarta os resultados desta sessão calculados sobre os dados anteriores"""
+    # Caches e registro são compartilhados entre sessões: não são limpos aqui. Eles são indexados
+    # pelo hash dos dados e limitados (max_entries, ModelRegistry.max_loaded)
+    previous = st.session_state.get('source_hash')
+    st.session_state['source_hash'] = source_hash
+    if previous is None or previous == source_hash:
+        return
+    
+    # Só os jobs desta sessão; os de outras sessões (mesmo se reaproveitados daqui) continuam
+    get_job_manager().evict(owner=session_id())
+    for key in ['prediction', 'prediction_artifact', 'comparison', 'tickets', 'tickets_stats',
+                'training_results', 'predictor', 'backtest_results'] + JOB_KEYS:
+        st.session_state.pop(key, None)
+
+@st.cache_resource
+def get_model_registry():
+    """Registro de modelos compartilhado entre as sessões"""
+    return ModelRegistry()
+
+@st.cache_resource
+def get_job_manager():
+    """Executor de jobs em segundo plano, compartilhado entre as sessões"""
+    # Treinos e backtests dividem uma fila (um por vez); predição, comparação e bilhetes têm
+    # a sua, para não esperar atrás do backtest walk-forward de outra sessão
+    return JobManager(max_workers=1, quick_workers=1)
+
+def session_id():
+    """Identificador desta sessão, dono dos jobs que ela submete"""
+    if 'session_id' not in st.session_state:
+        st.session_state['session_id'] = uuid.uuid4().hex
+    return st.session_state['session_id']
+
+# Chaves da sessão com o id do job de cada botão
+JOB_KEYS = ['prediction_job', 'comparison_job', 'tickets_job', 'training_job', 'backtest_job']
+
+def poll_job(session_key):
+    """Mostra o progresso do job da sessão; devolve o job quando concluído com sucesso"""
+    job = get_job_manager().get(st.session_state.get(session_key))
+    if job is None:
+        if st.session_state.pop(session_key, None) is not None:
+            st.warning("O resultado da tarefa em segundo plano não está mais disponível; execute-a novamente.")
+        return None
+    
+    snapshot = job.snapshot()
+    if snapshot['status'] == STATUS_ERROR:
+        st.error(f"Erro na tarefa em segundo plano: {snapshot['erro']}")
+        st.session_state.pop(session_key, None)
+        get_job_manager().release(job.id, session_id())
+        return None
+    
+    if not job.finished:
+        event = snapshot['ultimo_evento']
+        detail = ""
+        if event and 'fold' in event:
+            detail = f" · fold {event['fold']}/{event['total_folds']}"
+        elif event:
+            detail = f" · {event['modelo']}, posição {event['posicao']}"
+        st.progress(snapshot['progresso'], text=(
+            f"⏳ {snapshot['passos']}/{snapshot['total_passos']} modelos treinados"
+            f"{detail} ({snapshot['duracao_s']:.0f} s)"
+        ))
+        return None
+    
+    st.session_state.pop(session_key, None)
+    get_job_manager().release(job.id, session_id())
+    return job
 
 def display_prediction(prediction):
     """Exibe a predição de forma visual"""
@@ -115,6 +204,17 @@ def display_prediction(prediction):
     st.markdown(f"**Modelo:** {prediction['modelo_usado']}")
     st.markdown(f"**Confiança:** {prediction['confianca']:.1%}")
     st.markdown('</div>', unsafe_allow_html=True)
+    
+    # Modo probabilístico: probabilidade de cada um dos 50 números
+    if 'probabilidades_numeros' in prediction:
+        probs_df = pd.DataFrame({
+            'Número': range(1, 51),
+            'Probabilidade': prediction['probabilidades_numeros']
+        })
+        fig = px.bar(probs_df, x='Número', y='Probabilidade', title="Probabilidade de cada número sair",
+                     color_discrete_sequence=['#1f77b4'])
+        fig.update_layout(height=300)
+        st.plotly_chart(fig, use_container_width=True)
 
 def create_frequency_chart(freq_data, title, color):
     """Cria gráfico de frequência"""
@@ -137,7 +237,56 @@ def create_heatmap(data):
                     color_continuous_scale='RdBu_r')
     return fig
 
+def display_performance(perf_snapshot):
+    """Painel com o tempo gasto por etapa na última execução medida"""
+    with st.expander("⏱️ Performance (última execução)", expanded=False):
+        if not perf_snapshot or not perf_snapshot['resumo']:
+            st.info("Nenhuma etapa medida ainda. Treine, faça uma predição ou um backtesting.")
+            return
+        
+        summary_df = pd.DataFrame(perf_snapshot['resumo']).rename(columns={
+            'nome': 'Etapa',
+            'chamadas': 'Chamadas',
+            'wall_total_s': 'Tempo total (s)',
+            'wall_max_s': 'Tempo máximo (s)',
+            'cpu_total_s': 'CPU (s)',
+            'pico_memoria_bytes': 'Pico de memória (bytes)'
+        })
+        if summary_df['Pico de memória (bytes)'].isna().all():
+            summary_df = summary_df.drop(columns=['Pico de memória (bytes)'])
+        
+        col1, col2 = st.columns([3, 2])
+        with col1:
+            st.dataframe(summary_df, use_container_width=True)
+        with col2:
+            fig = px.bar(summary_df, x='Tempo total (s)', y='Etapa', orientation='h',
+                         title="Onde o tempo foi gasto")
+            fig.update_layout(height=350, yaxis={'categoryorder': 'total ascending'})
+            st.plotly_chart(fig, use_container_width=True)
+        
+        # Treino por (modelo, posição)
+        if perf_snapshot['fits']:
+            fits_df = pd.DataFrame(perf_snapshot['fits'])
+            fits_table = fits_df.pivot_table(index='modelo', columns='posicao', values='wall_s', aggfunc='sum')
+            st.markdown("**Tempo de treino (s) por modelo e posição**")
+            st.dataframe(fits_table.round(3), use_container_width=True)
+        
+        if perf_snapshot['contadores']:
+            st.markdown("**Contadores:** " + ", ".join(
+                f"`{name}` = {value}" for name, value in perf_snapshot['contadores'].items()
+            ))
+
 def main():
+    # Medição de performance por sessão: o script e os jobs submetidos por ela registram spans
+    # no registro guardado na sessão, não no registro do processo (compartilhado entre sessões)
+    if 'perf_registry' not in st.session_state:
+        st.session_state['perf_registry'] = PerfRegistry()
+    perf = st.session_state['perf_registry']
+    with use_registry(perf):
+        render(perf)
+
+def render(perf):
+    """Monta a página (uma execução do script da sessão)"""
     # Header
     st.markdown('<h1 class="main-header">🍀 Dashboard +Milionária ML</h1>', unsafe_allow_html=True)
     
@@ -161,13 +310,32 @@ def main():
         help="Baixe o arquivo oficial em: loterias.caixa.gov.br/Paginas/Mais-Milionaria.aspx"
     )
     
+    # O tracemalloc afeta o processo inteiro: a opção só aparece com MILIONARIA_PROFILE_MEMORY=1
+    if memory_profiling_enabled():
+        perf.track_memory(st.sidebar.checkbox(
+            "Medir pico de memória",
+            value=False,
+            help="Usa tracemalloc no painel de performance (deixa as etapas mais lentas)"
+        ))
+    auto_refresh = st.sidebar.checkbox(
+        "Atualizar progresso automaticamente",
+        value=True,
+        help="Recarrega a página a cada segundo enquanto houver treino ou backtesting em andamento"
+    )
+    
     if uploaded_file is not None:
         st.sidebar.success("✅ Arquivo carregado com sucesso!")
         st.sidebar.info(f"📄 Arquivo: {uploaded_file.name}")
     
     # Carrega dados
     try:
-        loader, data, processed_data = load_data(uploaded_file)
+        source_hash = get_source_hash(uploaded_file)
+        reset_session_results(source_hash)
+        if uploaded_file is None and source_hash == 'dados_exemplo':
+            st.warning("Arquivo Excel não encontrado. Usando dados de exemplo.")
+        
+        loader, data, processed_data = load_data(source_hash, uploaded_file)
+        processed_hash = get_dataset_hash(source_hash, processed_data)
         data_info = loader.get_data_info()
         
         if uploaded_file is not None:
@@ -177,7 +345,7 @@ def main():
         
         if data_info['periodo']:
             st.sidebar.info(f"📅 Período: {data_info['periodo']['inicio']} a {data_info['periodo']['fim']}")
-        
+    
     except Exception as e:
         if uploaded_file is None:
             st.sidebar.error("❌ Arquivo de dados não encontrado")
@@ -216,7 +384,8 @@ def main():
                 'Gradient Boosting': 'gradient_boosting',
                 'XGBoost': 'xgboost',
                 'LightGBM': 'lightgbm',
-                'Regressão Linear': 'linear_regression'
+                'Regressão Linear': 'linear_regression',
+                'Probabilístico (50 números)': BALL_MODEL_NAME
             }
             
             selected_model = st.selectbox(
@@ -225,28 +394,110 @@ def main():
                 index=0
             )
             
+            registry = get_model_registry()
+            model_labels = {value: key for key, value in model_options.items()}
+            
             if st.button("🎲 Gerar Predição", type="primary"):
-                with st.spinner("Treinando modelo e gerando predição..."):
-                    try:
-                        predictor = MilionariaPredictor()
-                        predictor.train_models(processed_data)
-                        
-                        prediction = predictor.predict_next_draw(
-                            processed_data, 
-                            model_options[selected_model]
-                        )
-                        
-                        st.session_state['prediction'] = prediction
-                        st.success("Predição gerada com sucesso!")
-                        
-                    except Exception as e:
-                        st.error(f"Erro ao gerar predição: {e}")
+                # Treino (se ainda não houver artefato) e predição rodam fora desta execução
+                model_name = model_options[selected_model]
+                if model_name == BALL_MODEL_NAME:
+                    # Um classificador por (sorteio, número): as 50 probabilidades saem de um predict
+                    job = get_job_manager().submit(
+                        'predicao', processed_hash, {'modelo': model_name}, 1,
+                        lambda job: {
+                            'predicao': BallScoringModel().fit(processed_data).predict_next_draw(processed_data),
+                            'artefato': None
+                        },
+                        reuse_finished=False, owner=session_id()
+                    )
+                else:
+                    job = get_job_manager().submit(
+                        'predicao', processed_hash, {'modelo': model_name}, TRAIN_STEPS,
+                        lambda job: {
+                            'predicao': registry.predict(processed_data, model_name, processed_hash, job.advance),
+                            'artefato': registry.artifact_info(processed_data, model_name, data_hash=processed_hash)
+                        },
+                        reuse_finished=False, owner=session_id()
+                    )
+                st.session_state['prediction_job'] = job.id
+            
+            job = poll_job('prediction_job')
+            if job is not None:
+                st.session_state['prediction'] = job.result['predicao']
+                st.session_state['prediction_artifact'] = job.result['artefato']
+                st.success("Predição gerada com sucesso!")
+            
+            # Origem, tamanho e tempo de carga do artefato do modelo
+            info = st.session_state.get('prediction_artifact')
+            if info:
+                load_time = info['tempo_carga_s']
+                st.caption(
+                    f"📦 Artefato ({info['origem']}): {info['tamanho_bytes'] / 1024:.0f} KB"
+                    + (f", carregado em {load_time * 1000:.0f} ms" if load_time is not None else "")
+                )
+            
+            if st.button("📊 Comparar Todos os Modelos"):
+                # Uma chamada em lote: features calculadas uma vez para os 5 modelos
+                model_names = [name for name in model_options.values() if name != BALL_MODEL_NAME]
+                job = get_job_manager().submit(
+                    'comparacao', processed_hash, {'modelos': model_names}, TRAIN_STEPS * len(model_names),
+                    lambda job: registry.predict_batch(processed_data, model_names, processed_hash,
+                                                       progress_callback=job.advance),
+                    reuse_finished=False, owner=session_id()
+                )
+                st.session_state['comparison_job'] = job.id
+            
+            job = poll_job('comparison_job')
+            if job is not None:
+                batch = job.result
+                st.session_state['comparison'] = pd.DataFrame({
+                    'Modelo': [model_labels[name] for name in batch['modelo']],
+                    'Números': [' - '.join(f"{n:02d}" for n in numbers) for numbers in batch['numeros'].tolist()],
+                    'Trevos': [' - '.join(str(t) for t in trevos) for trevos in batch['trevos'].tolist()],
+                    'Confiança': [f"{conf:.1%}" for conf in batch['confianca']]
+                })
+            
+            # Muitos bilhetes por concurso: os de maior score dentro das faixas históricas
+            n_tickets = st.number_input("Bilhetes a gerar:", min_value=1, max_value=1000, value=100, step=10)
+            if st.button("🎟️ Gerar Bilhetes"):
+                job = get_job_manager().submit(
+                    'bilhetes', processed_hash, {'bilhetes': int(n_tickets)}, 1,
+                    lambda job: TicketGenerator.from_model(
+                        BallScoringModel().fit(processed_data), processed_data,
+                        TicketConstraints.from_history(processed_data)
+                    ).generate(int(n_tickets)),
+                    reuse_finished=False, owner=session_id()
+                )
+                st.session_state['tickets_job'] = job.id
+            
+            job = poll_job('tickets_job')
+            if job is not None:
+                tickets, stats = job.result
+                st.session_state['tickets'] = pd.DataFrame({
+                    'Números': [' - '.join(f"{n:02d}" for n in numbers) for numbers in tickets['numeros'].tolist()],
+                    'Trevos': [' - '.join(str(t) for t in trevos) for trevos in tickets['trevos'].tolist()],
+                    'Score': tickets['score'].round(3)
+                })
+                st.session_state['tickets_stats'] = stats
         
         with col1:
             if 'prediction' in st.session_state:
                 display_prediction(st.session_state['prediction'])
             else:
                 st.info("Clique em 'Gerar Predição' para ver o resultado")
+            
+            if 'comparison' in st.session_state:
+                st.subheader("📊 Comparação entre Modelos")
+                st.dataframe(st.session_state['comparison'], use_container_width=True)
+            
+            if 'tickets' in st.session_state:
+                stats = st.session_state['tickets_stats']
+                st.subheader(f"🎟️ {len(st.session_state['tickets'])} Bilhetes")
+                st.caption(
+                    f"{stats['candidatos']:,} combinações examinadas em {stats['tempo_s']:.2f} s "
+                    f"({stats['candidatos_por_s']:,.0f}/s), {stats['aceitos_restricoes']:,} dentro das faixas históricas"
+                )
+                st.dataframe(st.session_state['tickets'], use_container_width=True)
         
         # Últimos sorteios
         st.subheader("📋 Últimos Sorteios")
@@ -267,7 +518,7 @@ def main():
         st.header("Análise dos Dados Históricos")
         
         # Análise de frequência
-        freq_analysis = loader.get_frequency_analysis()
+        freq_analysis = get_frequency_analysis(source_hash, loader)
         
         col1, col2 = st.columns(2)
         
@@ -291,6 +542,20 @@ def main():
                 if fig_trevos:
                     st.plotly_chart(fig_trevos, use_container_width=True)
         
+        # Atrasos e janela recente, lidos das estatísticas incrementais
+        try:
+            stats = loader.get_running_stats()
+            gaps = stats.gaps()
+            delayed = np.argsort(-gaps, kind='stable')[:10]
+            st.subheader("⏳ Números Mais Atrasados")
+            st.dataframe(pd.DataFrame({
+                'Número': delayed + 1,
+                'Sorteios sem sair': gaps[delayed],
+                'Frequência (últimos 20)': np.round(stats.window_frequencies(20)[delayed], 2)
+            }), use_container_width=True, hide_index=True)
+        except ValueError:
+            pass
+        
         # Estatísticas gerais
         st.subheader("📊 Estatísticas Gerais")
         
@@ -335,24 +600,26 @@ def main():
             train_all = st.checkbox("Treinar todos os modelos", value=True)
             
             if not train_all:
+                # O modelo probabilístico não passa pelo train_models (é ajustado na própria predição)
+                trainable = [label for label, name in model_options.items() if name != BALL_MODEL_NAME]
                 selected_models = st.multiselect(
                     "Selecione os modelos:",
-                    options=list(model_options.keys()),
-                    default=list(model_options.keys())[:2]
+                    options=trainable,
+                    default=trainable[:2]
                 )
             
             if st.button("🚀 Iniciar Treinamento", type="primary"):
-                with st.spinner("Treinando modelos..."):
-                    try:
-                        predictor = MilionariaPredictor()
-                        results = predictor.train_models(processed_data)
-                        
-                        st.session_state['training_results'] = results
-                        st.session_state['predictor'] = predictor
-                        st.success("Treinamento concluído!")
-                        
-                    except Exception as e:
-                        st.error(f"Erro no treinamento: {e}")
+                # O treino roda em segundo plano; o mesmo treino destes dados é reaproveitado
+                model_names = None if train_all else [model_options[m] for m in selected_models]
+                job = get_job_manager().submit_training(processed_data, processed_hash, model_names,
+                                                        owner=session_id())
+                st.session_state['training_job'] = job.id
+            
+            job = poll_job('training_job')
+            if job is not None:
+                st.session_state['training_results'] = job.result['resultados']
+                st.session_state['predictor'] = job.result['preditor']
+                st.success("Treinamento concluído!")
         
         with col2:
             if 'training_results' in st.session_state:
@@ -396,21 +663,42 @@ def main():
                 help="Número de sorteios mais recentes para testar os modelos"
             )
             
+            backtest_mode = st.radio(
+                "Modo:",
+                ["Treino único", "Walk-forward"],
+                help="Walk-forward retreina os modelos a cada k sorteios do período de teste"
+            )
+            
+            if backtest_mode == "Walk-forward":
+                step = st.slider("Retreinar a cada (sorteios):", min_value=1, max_value=test_size, value=5)
+                use_window = st.checkbox("Janela deslizante", value=False,
+                                         help="Treina só com os últimos N sorteios em vez de todo o histórico")
+                window = st.slider(
+                    "Tamanho da janela:",
+                    min_value=10,
+                    max_value=len(data) - test_size,
+                    value=min(100, len(data) - test_size)
+                ) if use_window else None
+            
             st.info(f"📊 **Dados disponíveis:** {len(data)} sorteios\n📋 **Para treino:** {len(data) - test_size} sorteios\n🎯 **Para teste:** {test_size} sorteios")
             
             if st.button("🔍 Executar Backtesting", type="primary", use_container_width=True):
-                with st.spinner("Executando backtesting... Isso pode levar alguns minutos."):
-                    try:
-                        predictor = MilionariaPredictor()
-                        backtest_results = predictor.backtest(processed_data, test_size)
-                        
-                        st.session_state['backtest_results'] = backtest_results
-                        st.success("✅ Backtesting concluído com sucesso!")
-                        st.balloons()
-                        
-                    except Exception as e:
-                        st.error(f"❌ Erro no backtesting: {str(e)}")
-                        st.info("💡 Dica: Verifique se há dados suficientes para o teste.")
+                # Roda em segundo plano; o mesmo backtest destes dados é reaproveitado
+                if backtest_mode == "Walk-forward":
+                    job = get_job_manager().submit_backtest(
+                        processed_data, processed_hash, test_size, walk_forward=True, step=step, window=window,
+                        owner=session_id()
+                    )
+                else:
+                    job = get_job_manager().submit_backtest(processed_data, processed_hash, test_size,
+                                                            owner=session_id())
+                st.session_state['backtest_job'] = job.id
+            
+            job = poll_job('backtest_job')
+            if job is not None:
+                st.session_state['backtest_results'] = job.result
+                st.success("✅ Backtesting concluído com sucesso!")
+                st.balloons()
         
         with col2:
             if 'backtest_results' in st.session_state:
@@ -522,6 +810,19 @@ def main():
                                               annotation_text="Limite de Sucesso (3 acertos)")
                         st.plotly_chart(fig_evolution, use_container_width=True)
                     
+                    # Folds do walk-forward (retreinos e tempo de cada um)
+                    if 'folds' in model_detail:
+                        st.subheader("🔁 Folds do Walk-forward")
+                        folds_df = pd.DataFrame(model_detail['folds']).rename(columns={
+                            'fold': 'Fold',
+                            'inicio_treino': 'Início do Treino',
+                            'sorteios_treino': 'Sorteios de Treino',
+                            'sorteios_teste': 'Sorteios de Teste',
+                            'acertos': 'Acertos',
+                            'tempo_s': 'Tempo (s)'
+                        })
+                        st.dataframe(folds_df, use_container_width=True)
+                    
                     # Tabela detalhada das predições
                     if 'predicoes' in model_detail:
                         st.subheader("📋 Predições Detalhadas")
@@ -627,6 +928,26 @@ def main():
             
             Jogue com responsabilidade!
             """)
+    
+    # Guarda a última execução que mediu alguma etapa (reruns com cache não medem nada);
+    # spans dos jobs em segundo plano entram na execução seguinte ao término deles
+    if perf.spans():
+        st.session_state['perf_snapshot'] = {
+            'resumo': perf.summary(),
+            'fits': [
+                {'modelo': span['modelo'], 'posicao': str(span['posicao']), 'wall_s': span['wall_s']}
+                for span in perf.spans('fit')
+            ],
+            'contadores': perf.counters()
+        }
+        perf.clear()
+    display_performance(st.session_state.get('perf_snapshot'))
+    
+    # Enquanto houver job desta sessão em andamento, a página se atualiza sozinha
+    running = [get_job_manager().get(st.session_state.get(key)) for key in JOB_KEYS]
+    if auto_refresh and any(job is not None and not job.finished for job in running):
+        time.sleep(1)
+        st.rerun()
 
 if __name__ == "__main__":
     main()
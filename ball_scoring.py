@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+from typing import Tuple, List, Dict, Any, Union
+from draw_store import DrawStore
+from feature_engine import ball_features, NUMBER_WINDOWS, CLOVER_WINDOWS
+from instrumentation import timed, increment
+from lazy_imports import LazyModule
+
+linear_model = LazyModule('sklearn.linear_model')
+
+# Nome usado no app e na CLI para este modo de predição
+BALL_MODEL_NAME = 'probabilistico'
+
+
+class BallScoringModel:
+    """Probabilidade de cada número (1-50) e trevo (1-6) sair no próximo sorteio"""
+    
+    def __init__(self, C: float = 1.0, max_draws: int = 5000):
+        # Um classificador por tipo de bola sobre linhas (sorteio, valor): 50 números e 6 trevos
+        self.C = C
+        # Só os sorteios mais recentes entram no treino (n x 50 linhas por sorteio)
+        self.max_draws = max_draws
+        self.number_model = None
+        self.clover_model = None
+    
+    @staticmethod
+    def _one_hot(data: Union[pd.DataFrame, DrawStore]) -> Tuple[np.ndarray, np.ndarray]:
+        """Matrizes indicadoras de números (n x 50) e trevos (n x 6)"""
+        if not isinstance(data, DrawStore):
+            data = DrawStore.from_dataframe(data)
+        return data.number_onehot(), data.clover_onehot()
+    
+    def _fit_one(self, one_hot: np.ndarray, windows: Tuple[int, ...]):
+        """Regressão logística sobre (sorteio, valor): features do passado -> o valor saiu?"""
+        # Linha 0 não tem histórico; a linha extra do próximo sorteio não tem rótulo
+        start = 1 if self.max_draws is None else max(1, len(one_hot) - self.max_draws)
+        features = ball_features(one_hot, windows, start)[:-1]
+        labels = one_hot[start:] > 0
+        
+        model = linear_model.LogisticRegression(C=self.C, max_iter=1000)
+        model.fit(features.reshape(-1, features.shape[2]), labels.ravel())
+        return model
+    
+    @timed('fit_probabilistico')
+    def fit(self, data: Union[pd.DataFrame, DrawStore]) -> 'BallScoringModel':
+        """Treina os classificadores de números e de trevos no histórico"""
+        number_hot, clover_hot = self._one_hot(data)
+        if len(number_hot) < 10:
+            raise ValueError("Dados insuficientes para treinamento")
+        
+        self.number_model = self._fit_one(number_hot, NUMBER_WINDOWS)
+        self.clover_model = self._fit_one(clover_hot, CLOVER_WINDOWS)
+        increment('modelos_treinados')
+        return self
+    
+    @staticmethod
+    def _calibrate(model, one_hot: np.ndarray, windows: Tuple[int, ...], per_draw: int) -> np.ndarray:
+        """Um predict_proba para todos os valores; a soma é ajustada ao total sorteado (6 ou 2)"""
+        probs = model.predict_proba(ball_features(one_hot, windows, len(one_hot))[0])[:, 1]
+        # P(valor sair) de cada valor: somam `per_draw` bolas, como em qualquer sorteio
+        return np.clip(probs * (per_draw / probs.sum()), 0.0, 1.0)
+    
+    @timed('predict_proba')
+    def predict_proba(self, data: Union[pd.DataFrame, DrawStore]) -> Tuple[np.ndarray, np.ndarray]:
+        """Vetores de probabilidade do próximo sorteio: 50 números e 6 trevos"""
+        if self.number_model is None:
+            raise ValueError("Modelo probabilístico não foi treinado")
+        
+        number_hot, clover_hot = self._one_hot(data)
+        return (self._calibrate(self.number_model, number_hot, NUMBER_WINDOWS, 6),
+                self._calibrate(self.clover_model, clover_hot, CLOVER_WINDOWS, 2))
+    
+    @staticmethod
+    def pick(probs: np.ndarray, k: int, rng: np.random.Generator = None) -> List[int]:
+        """k valores distintos: os k mais prováveis ou, com rng, sorteados sem reposição pelos pesos"""
+        if rng is None:
+            chosen = np.argsort(-probs, kind='stable')[:k]
+        else:
+            chosen = rng.choice(len(probs), size=k, replace=False, p=probs / probs.sum())
+        return sorted(int(value) + 1 for value in chosen)
+    
+    def predict_next_draw(self, data: Union[pd.DataFrame, DrawStore], sample: bool = False,
+                          random_state: int = None) -> Dict[str, Any]:
+        """Prediz o próximo sorteio a partir das probabilidades (top-k ou amostra ponderada)"""
+        number_probs, clover_probs = self.predict_proba(data)
+        rng = np.random.default_rng(random_state) if sample else None
+        numeros = self.pick(number_probs, 6, rng)
+        trevos = self.pick(clover_probs, 2, rng)
+        increment('predicoes')
+        
+        return {
+            'numeros': numeros,
+            'trevos': trevos,
+            'modelo_usado': BALL_MODEL_NAME,
+            # Probabilidade média dos números escolhidos saírem
+            'confianca': float(number_probs[np.array(numeros) - 1].mean()),
+            'probabilidades_numeros': number_probs.tolist(),
+            'probabilidades_trevos': clover_probs.tolist()
+        }
@@ -0,0 +1,239 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Any
+
+import numpy as np
+import pandas as pd
+
+from data_loader import MilionariaDataLoader
+from draw_store import pattern_counts
+from ml_models import MilionariaPredictor
+from ball_scoring import BallScoringModel
+from tickets import TicketGenerator, TicketConstraints
+
+DEFAULT_SIZES = [100, 1000, 10000, 100000]
+BACKTEST_TEST_SIZE = 20
+TICKET_CANDIDATES = 1_000_000
+IMPORT_MODULES = ['ml_models', 'visualizations', 'data_loader']
+HEAVY_MODULES = ['sklearn', 'xgboost', 'lightgbm', 'plotly', 'matplotlib', 'seaborn']
+
+
+def time_stage(func: Callable[[], Any], repeat: int = 1) -> float:
+    """Melhor tempo (s) de `repeat` execuções, sem os prints dos módulos"""
+    best = float('inf')
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - start)
+    return best
+
+
+def measure_import_time(module: str, repeat: int = 1) -> Dict[str, Any]:
+    """Melhor tempo de import (s) de `module` num interpretador novo via `python -X importtime`"""
+    project_dir = os.path.dirname(os.path.abspath(__file__))
+    best, heavy = float('inf'), []
+    for _ in range(repeat):
+        proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                              cwd=project_dir, capture_output=True, text=True)
+        if proc.returncode != 0:
+            raise RuntimeError(f"Falha ao importar {module}: {proc.stderr.strip().splitlines()[-1]}")
+        
+        # Linhas "import time: self [us] | cumulative | pacote"; o pacote de nível 0 não tem recuo
+        cumulative, imported = None, set()
+        for line in proc.stderr.splitlines():
+            if not line.startswith('import time:') or '|' not in line:
+                continue
+            fields = line[len('import time:'):].split('|')
+            name = fields[2].strip()
+            imported.add(name.split('.')[0])
+            if name == module and fields[2].startswith(' ' + module):
+                cumulative = int(fields[1]) / 1e6
+        if cumulative is None:
+            # Ex.: módulo já carregado na inicialização do interpretador ou saída do -X importtime mudou
+            raise RuntimeError(f"Tempo de import de {module} não encontrado na saída do -X importtime")
+        
+        best = min(best, cumulative)
+        heavy = sorted(imported.intersection(HEAVY_MODULES))
+    return {'segundos': best, 'pesados': heavy}
+
+
+def run_import_benchmarks(modules: List[str], repeat: int = 3) -> Dict[str, Any]:
+    """Tempo de import a frio de cada módulo e quais bibliotecas pesadas ele arrasta"""
+    results = {}
+    for module in modules:
+        results[module] = measure_import_time(module, repeat)
+        heavy = ', '.join(results[module]['pesados']) or '-'
+        print(f"  import {module:<30} {results[module]['segundos']:10.4f} s | pesados: {heavy}")
+    return results
+
+
+def run_benchmarks(sizes: List[int], repeat: int = 3, max_train_size: int = 10000,
+                   model_names: List[str] = None, n_jobs: int = 1,
+                   import_modules: List[str] = None) -> Dict[str, Any]:
+    """Cronometra os caminhos críticos em históricos sintéticos de cada tamanho"""
+    if model_names is None:
+        model_names = list(MilionariaPredictor().models)
+    if import_modules is None:
+        import_modules = IMPORT_MODULES
+    
+    imports = run_import_benchmarks(import_modules, repeat)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for n_draws in sizes:
+            timings = {}
+            results[str(n_draws)] = timings
+            
+            def record(stage: str, func: Callable[[], Any], stage_repeat: int = repeat):
+                timings[stage] = time_stage(func, stage_repeat)
+                print(f"  {n_draws:>7} sorteios | {stage:<40} {timings[stage]:10.4f} s")
+            
+            # Histórico sintético com o mesmo gerador dos dados de exemplo
+            with contextlib.redirect_stdout(io.StringIO()):
+                data = MilionariaDataLoader('sintetico', cache_dir=None)._create_sample_data(n_draws)
+            path = os.path.join(tmp_dir, f'sintetico_{n_draws}.xlsx')
+            data.to_excel(path, index=False)
+            
+            # load_data: parse do Excel (sem cache) e leitura do cache Feather já aquecido
+            record('load_data', lambda: MilionariaDataLoader(path, cache_dir=None).load_data(), 1)
+            cache_dir = os.path.join(tmp_dir, 'cache')
+            time_stage(lambda: MilionariaDataLoader(path, cache_dir=cache_dir).load_data())
+            record('load_data_cached', lambda: MilionariaDataLoader(path, cache_dir=cache_dir).load_data())
+            
+            loader = MilionariaDataLoader(path, cache_dir=None)
+            loader.data = data
+            record('preprocess_data', loader.preprocess_data)
+            processed = loader.processed_data
+            # Só os padrões vetorizados (pares e dezenas) de preprocess_data
+            balls = data[[f'Num{i}' for i in range(1, 7)]].to_numpy()
+            record('pattern_counts', lambda: pattern_counts(balls))
+            
+            record('prepare_features', lambda: MilionariaPredictor().prepare_features(processed))
+            
+            # Geração de bilhetes: 1M candidatos pelo modelo probabilístico, com as faixas históricas
+            generator = TicketGenerator.from_model(BallScoringModel().fit(processed), processed,
+                                                   TicketConstraints.from_history(processed))
+            record('generate_tickets', lambda: generator.generate(100, TICKET_CANDIDATES), 1)
+            
+            if n_draws > max_train_size:
+                print(f"  {n_draws:>7} sorteios | treino/predição/backtest ignorados (> {max_train_size})")
+                continue
+            
+            # Treino uma vez por família; a predição reaproveita o modelo treinado
+            for model_name in model_names:
+                predictor = MilionariaPredictor(n_jobs=n_jobs)
+                record(f'train_models/{model_name}', lambda: predictor.train_models(processed, [model_name]), 1)
+                record(f'predict_next_draw/{model_name}', lambda: predictor.predict_next_draw(processed, model_name))
+            
+            record('backtest', lambda: MilionariaPredictor(n_jobs=n_jobs).backtest(
+                processed, BACKTEST_TEST_SIZE, model_names), 1)
+    
+    return {
+        'meta': {
+            'data': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'cpus': os.cpu_count(),
+            'repeat': repeat,
+            'n_jobs': n_jobs,
+            'modelos': model_names
+        },
+        'imports': imports,
+        'results': results
+    }
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float = 0.2) -> List[Dict[str, Any]]:
+    """Compara com a linha de base e retorna os estágios mais lentos que (1 + threshold)x"""
+    regressions = []
+    print(f"\n{'sorteios':>8} | {'estágio':<40} {'base (s)':>10} {'atual (s)':>10} {'razão':>7}")
+    
+    for size, timings in current['results'].items():
+        for stage, seconds in timings.items():
+            base = baseline['results'].get(size, {}).get(stage)
+            if base is None:
+                continue
+            
+            ratio = seconds / base if base > 0 else float('inf')
+            flag = ''
+            if ratio > 1 + threshold:
+                flag = '  <-- LENTO'
+                regressions.append({'sorteios': int(size), 'estagio': stage, 'base': base,
+                                    'atual': seconds, 'razao': ratio})
+            print(f"{size:>8} | {stage:<40} {base:10.4f} {seconds:10.4f} {ratio:6.2f}x{flag}")
+    
+    # Tempo de import a frio (linhas de base antigas podem não ter a seção)
+    for module, current_import in current.get('imports', {}).items():
+        base = baseline.get('imports', {}).get(module, {}).get('segundos')
+        if base is None:
+            continue
+        
+        seconds = current_import['segundos']
+        ratio = seconds / base if base > 0 else float('inf')
+        flag = ''
+        if ratio > 1 + threshold:
+            flag = '  <-- LENTO'
+            regressions.append({'sorteios': 0, 'estagio': f'import/{module}', 'base': base,
+                                'atual': seconds, 'razao': ratio})
+        print(f"{'-':>8} | {'import/' + module:<40} {base:10.4f} {seconds:10.4f} {ratio:6.2f}x{flag}")
+    
+    return regressions
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    """Opções dos benchmarks (usadas aqui e no subcomando `benchmark` do cli.py)"""
+    parser.add_argument('--sizes', type=int, nargs='*', default=DEFAULT_SIZES,
+                        help="Tamanhos dos históricos sintéticos (sorteios; vazio = só imports)")
+    parser.add_argument('--import-modules', nargs='*', default=IMPORT_MODULES,
+                        help="Módulos cronometrados com python -X importtime (vazio = nenhum)")
+    parser.add_argument('--repeat', type=int, default=3,
+                        help="Repetições dos estágios rápidos (vale o melhor tempo)")
+    parser.add_argument('--max-train-size', type=int, default=10000,
+                        help="Acima deste tamanho, treino, predição e backtest são ignorados")
+    parser.add_argument('--models', nargs='+', default=None, help="Famílias de modelos a treinar")
+    parser.add_argument('--n-jobs', type=int, default=1, help="Workers do treinamento (-1 = todos os núcleos)")
+    parser.add_argument('--output', default='benchmark_results.json', help="Arquivo JSON de saída")
+    parser.add_argument('--compare', metavar='BASELINE', help="JSON de linha de base para comparação")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="Lentidão tolerada na comparação (0.2 = 20%%)")
+
+
+def run(args: argparse.Namespace) -> int:
+    """Roda os benchmarks, salva o JSON e compara com a linha de base (1 = regressão)"""
+    current = run_benchmarks(args.sizes, args.repeat, args.max_train_size, args.models, args.n_jobs,
+                             args.import_modules)
+    
+    with open(args.output, 'w') as f:
+        json.dump(current, f, indent=2)
+    print(f"\nResultados salvos em {args.output}")
+    
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare_results(baseline, current, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} estágio(s) mais lento(s) que a linha de base (> {args.threshold:.0%})")
+            return 1
+        print("\nNenhuma regressão acima do limite")
+    
+    return 0
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks dos caminhos críticos da +Milionária")
+    add_arguments(parser)
+    return run(parser.parse_args(argv))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,368 @@
+import argparse
+import contextlib
+import json
+import os
+import sys
+from typing import Dict, Any, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from data_loader import MilionariaDataLoader, CACHE_DIR
+from ml_models import MilionariaPredictor
+from model_registry import ModelRegistry, dataset_hash
+from instrumentation import get_registry
+
+DEFAULT_DATA_FILE = '+Milionária (2).xlsx'
+MODEL_NAMES = ['random_forest', 'gradient_boosting', 'xgboost', 'lightgbm', 'linear_regression']
+
+
+def load_processed(args: argparse.Namespace) -> Tuple[MilionariaDataLoader, pd.DataFrame]:
+    """Carrega (e acrescenta os sorteios novos de --append) e preprocessa os dados"""
+    data_cache = None if args.cache_dir is None else os.path.join(args.cache_dir, 'data')
+    loader = MilionariaDataLoader(args.data, cache_dir=data_cache)
+    
+    if args.sample:
+        # Dados sintéticos só quando pedidos explicitamente (nunca como fallback silencioso)
+        loader._create_sample_data(args.sample)
+    elif not os.path.exists(args.data):
+        raise ValueError(f"Arquivo de dados não encontrado: {args.data}")
+    else:
+        loader.load_data()
+    
+    for source in args.append or []:
+        loader.append_draws(source)
+    
+    return loader, loader.preprocess_data()
+
+
+def command_train(args: argparse.Namespace) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Treina (ou reaproveita) um artefato por família no registro de modelos"""
+    _, processed = load_processed(args)
+    registry = ModelRegistry(cache_dir=os.path.join(args.cache_dir or CACHE_DIR, 'models'), n_jobs=args.n_jobs)
+    report = registry.train(processed, args.models, dataset_hash(processed), force=args.force)
+    
+    rows = [
+        {'modelo': model_name, 'origem': info['origem'], 'caminho': info['caminho'], **info['metricas']}
+        for model_name, info in report.items()
+    ]
+    return {'sorteios': len(processed), 'modelos': report}, rows
+
+
+def command_predict(args: argparse.Namespace) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Prediz o próximo sorteio com cada família (treina só as que não têm artefato)"""
+    _, processed = load_processed(args)
+    registry = ModelRegistry(cache_dir=os.path.join(args.cache_dir or CACHE_DIR, 'models'), n_jobs=args.n_jobs)
+    
+    if args.seed is not None:
+        np.random.seed(args.seed)
+    batch = registry.predict_batch(processed, args.models, dataset_hash(processed))
+    
+    rows = [
+        {
+            'modelo': str(record['modelo']),
+            'numeros': record['numeros'].tolist(),
+            'trevos': record['trevos'].tolist(),
+            'confianca': float(record['confianca'])
+        }
+        for record in batch
+    ]
+    result = {'sorteios': len(processed), 'predicoes': rows}
+    
+    if args.probabilistic:
+        # Probabilidade de cada um dos 50 números e 6 trevos; o bilhete sai do top-k
+        from ball_scoring import BallScoringModel
+        prediction = BallScoringModel().fit(processed).predict_next_draw(processed)
+        rows.append({
+            'modelo': prediction['modelo_usado'],
+            'numeros': prediction['numeros'],
+            'trevos': prediction['trevos'],
+            'confianca': prediction['confianca']
+        })
+        result['probabilidades'] = {
+            'numeros': prediction['probabilidades_numeros'],
+            'trevos': prediction['probabilidades_trevos']
+        }
+    return result, rows
+
+
+def command_backtest(args: argparse.Namespace) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Backtest de treino único ou walk-forward; a tabela resume as métricas por modelo"""
+    _, processed = load_processed(args)
+    predictor = MilionariaPredictor(n_jobs=args.n_jobs)
+    
+    if args.walk_forward:
+        results = predictor.backtest_walk_forward(processed, args.test_size, step=args.step,
+                                                  window=args.window, model_names=args.models)
+    else:
+        results = predictor.backtest(processed, args.test_size, args.models)
+    
+    rows = [
+        {
+            'modelo': model_name,
+            'media_acertos': result['media_acertos'],
+            'max_acertos': result['max_acertos'],
+            'acertos_3_ou_mais': result['acertos_3_ou_mais'],
+            'taxa_sucesso_3+': result['taxa_sucesso_3+']
+        }
+        for model_name, result in results.items()
+    ]
+    return {'sorteios': len(processed), 'test_size': args.test_size, 'resultados': results}, rows
+
+
+def command_tickets(args: argparse.Namespace) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Gera os N melhores bilhetes pelo modelo probabilístico, dentro das faixas históricas"""
+    from ball_scoring import BallScoringModel
+    from tickets import TicketGenerator, TicketConstraints
+    
+    _, processed = load_processed(args)
+    constraints = None
+    if not args.no_constraints:
+        constraints = TicketConstraints.from_history(processed, args.lower, 1 - args.lower)
+    
+    model = BallScoringModel().fit(processed)
+    generator = TicketGenerator.from_model(model, processed, constraints)
+    tickets, stats = generator.generate(args.tickets, args.candidates)
+    
+    rows = [
+        {'numeros': ticket['numeros'].tolist(), 'trevos': ticket['trevos'].tolist(), 'score': float(ticket['score'])}
+        for ticket in tickets
+    ]
+    print(f"{stats['candidatos']} combinações examinadas em {stats['tempo_s']:.2f} s "
+          f"({stats['candidatos_por_s']:,.0f}/s), {stats['aceitos_restricoes']} dentro das faixas"
+          + (" (varredura completa)" if stats['varredura_completa'] else ""))
+    return {'sorteios': len(processed), 'estatisticas': stats, 'bilhetes': rows}, rows
+
+
+def command_combinations(args: argparse.Namespace) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Consulta o índice das 15.890.700 combinações (construído na primeira vez) por faixas de padrões"""
+    import time
+    from combination_index import CombinationIndex
+    from tickets import TicketConstraints
+    
+    if args.from_history:
+        _, processed = load_processed(args)
+        constraints = TicketConstraints.from_history(processed, args.lower, 1 - args.lower)
+    else:
+        constraints = TicketConstraints(args.soma and tuple(args.soma), args.pares and tuple(args.pares),
+                                        args.dezenas and tuple(args.dezenas), args.amplitude and tuple(args.amplitude))
+    
+    path = os.path.join(args.cache_dir or CACHE_DIR, 'combinacoes')
+    index = CombinationIndex.build(path, args.n_jobs) if args.rebuild else CombinationIndex.open_or_build(path, args.n_jobs)
+    start_time = time.perf_counter()
+    ranks = index.query(constraints, args.contains, args.excludes)
+    elapsed = time.perf_counter() - start_time
+    
+    shown = ranks[:args.limit]
+    rows = [
+        {'posicao': int(rank), 'numeros': balls.tolist()}
+        for rank, balls in zip(shown, index.combinations(shown))
+    ]
+    print(f"{len(ranks)} de {len(index)} combinações em {elapsed * 1000:.1f} ms")
+    result = {
+        'combinacoes': len(ranks),
+        'tempo_consulta_s': elapsed,
+        'restricoes': constraints.describe(),
+        'padroes': index.summary(ranks),
+        'exemplos': rows
+    }
+    return result, rows
+
+
+def command_validate(args: argparse.Namespace) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Validação cruzada temporal; a tabela traz uma linha por (modelo, fold)"""
+    _, processed = load_processed(args)
+    predictor = MilionariaPredictor(n_jobs=args.n_jobs)
+    results = predictor.cross_validate(processed, args.models, n_splits=args.splits, scheme=args.scheme)
+    
+    rows = [
+        {
+            'modelo': model_name,
+            'fold': fold['fold'],
+            'fim_treino': fold['fim_treino'],
+            'mae': fold['mae'],
+            'rmse': fold['rmse'],
+            'tempo_s': fold['tempo_s']
+        }
+        for model_name, result in results.items()
+        for fold in result['folds']
+    ]
+    return {'sorteios': len(processed), 'resultados': results}, rows
+
+
+def command_tune(args: argparse.Namespace) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Busca os melhores hiperparâmetros de cada família e os grava no registro de modelos"""
+    from tuning import HyperparameterSearch
+    
+    _, processed = load_processed(args)
+    registry = ModelRegistry(cache_dir=os.path.join(args.cache_dir or CACHE_DIR, 'models'), n_jobs=args.n_jobs)
+    search = HyperparameterSearch(method=args.method, n_candidates=args.candidates, n_splits=args.splits,
+                                  eta=args.eta, n_jobs=args.n_jobs, random_state=args.seed)
+    results = search.search(processed, args.models, registry=None if args.dry_run else registry)
+    
+    rows = [
+        {
+            'modelo': model_name,
+            'melhor_mae': result['melhor_mae'],
+            'folds_avaliados': result['folds_avaliados'],
+            'candidatos': len(result['candidatos']),
+            'melhor_params': json.dumps(result['melhor_params'], sort_keys=True),
+            'tempo_s': result['tempo_s']
+        }
+        for model_name, result in results.items()
+    ]
+    return {'sorteios': len(processed), 'resultados': results}, rows
+
+
+def write_output(result: Dict[str, Any], rows: List[Dict[str, Any]], path: str = None):
+    """JSON completo (arquivo ou stdout) ou, para .parquet, a tabela resumo"""
+    if path is not None and path.endswith('.parquet'):
+        pd.DataFrame(rows).to_parquet(path, index=False)
+        return
+    
+    text = json.dumps(result, indent=2, ensure_ascii=False, default=_to_json)
+    if path is None:
+        print(text)
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+
+
+def _to_json(value):
+    """Converte tipos numpy para o json"""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+
+def report_profile(path: str):
+    """Resumo dos spans no stderr e, se houver caminho, exportação em JSONL"""
+    perf = get_registry()
+    print(f"\n{'etapa':<28} {'chamadas':>8} {'total (s)':>10} {'máx (s)':>10} {'CPU (s)':>10}", file=sys.stderr)
+    for entry in perf.summary():
+        print(f"{entry['nome']:<28} {entry['chamadas']:>8} {entry['wall_total_s']:10.4f} "
+              f"{entry['wall_max_s']:10.4f} {entry['cpu_total_s']:10.4f}", file=sys.stderr)
+    if path != '-':
+        perf.export_jsonl(path)
+        print(f"Spans exportados para {path}", file=sys.stderr)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Treino, predição, backtesting e tuning da +Milionária sem o dashboard")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    # Opções comuns aos subcomandos que leem o histórico
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--data', default=DEFAULT_DATA_FILE, help="Arquivo Excel da Caixa")
+    common.add_argument('--sample', type=int, metavar='N', help="Usa N sorteios sintéticos em vez do arquivo")
+    common.add_argument('--append', nargs='+', metavar='ARQUIVO',
+                        help="Sorteios novos (CSV/JSON/XLSX) acrescentados antes de rodar")
+    common.add_argument('--models', nargs='+', default=MODEL_NAMES, choices=MODEL_NAMES,
+                        help="Famílias de modelos")
+    common.add_argument('--n-jobs', type=int, default=-1, help="Workers do treinamento (-1 = todos os núcleos)")
+    common.add_argument('--cache-dir', default=CACHE_DIR, type=lambda value: None if value == 'none' else value,
+                        help="Diretório dos caches de dados e modelos ('none' desativa o cache de dados)")
+    common.add_argument('--output', help="Arquivo de saída (.json ou .parquet); sem ele, JSON no stdout")
+    common.add_argument('--profile', nargs='?', const='-', metavar='JSONL',
+                        help="Mostra o tempo por etapa no stderr (e exporta os spans, se houver arquivo)")
+    
+    train = subparsers.add_parser('train', parents=[common], help="Treina e salva os modelos no registro")
+    train.add_argument('--force', action='store_true', help="Retreina mesmo que já exista artefato")
+    train.set_defaults(func=command_train)
+    
+    predict = subparsers.add_parser('predict', parents=[common], help="Prediz o próximo sorteio")
+    predict.add_argument('--seed', type=int, help="Semente do desempate aleatório das predições")
+    predict.add_argument('--probabilistic', action='store_true',
+                         help="Inclui o modelo probabilístico (probabilidade de cada número e trevo)")
+    predict.set_defaults(func=command_predict)
+    
+    backtest = subparsers.add_parser('backtest', parents=[common], help="Backtesting dos modelos")
+    backtest.add_argument('--test-size', type=int, default=20, help="Sorteios mais recentes usados no teste")
+    backtest.add_argument('--walk-forward', action='store_true', help="Retreina a cada --step sorteios")
+    backtest.add_argument('--step', type=int, default=5, help="Passo de retreino do walk-forward")
+    backtest.add_argument('--window', type=int, help="Janela deslizante do walk-forward (padrão: expansível)")
+    backtest.set_defaults(func=command_backtest)
+    
+    tickets = subparsers.add_parser('tickets', parents=[common], help="Gera muitos bilhetes sob restrições")
+    tickets.add_argument('--tickets', type=int, default=100, help="Quantidade de bilhetes (os de maior score)")
+    tickets.add_argument('--candidates', type=int, default=1_000_000, help="Limite de combinações examinadas")
+    tickets.add_argument('--lower', type=float, default=0.05,
+                         help="Faixas entre os quantis lower e 1 - lower do histórico (soma, pares, dezenas, amplitude)")
+    tickets.add_argument('--no-constraints', action='store_true', help="Não restringe os padrões")
+    tickets.set_defaults(func=command_tickets)
+    
+    combos = subparsers.add_parser('combinations', parents=[common],
+                                   help="Consulta todas as combinações por soma, pares, dezenas e amplitude")
+    combos.add_argument('--soma', type=int, nargs=2, metavar=('MIN', 'MAX'), help="Faixa da soma dos números")
+    combos.add_argument('--pares', type=int, nargs=2, metavar=('MIN', 'MAX'), help="Faixa de números pares")
+    combos.add_argument('--dezenas', type=int, nargs=2, metavar=('MIN', 'MAX'),
+                        help="Faixa de números em cada dezena (1-10, 11-20, ...)")
+    combos.add_argument('--amplitude', type=int, nargs=2, metavar=('MIN', 'MAX'), help="Faixa de maior - menor")
+    combos.add_argument('--contains', type=int, nargs='+', metavar='N', help="Números obrigatórios")
+    combos.add_argument('--excludes', type=int, nargs='+', metavar='N', help="Números proibidos")
+    combos.add_argument('--from-history', action='store_true',
+                        help="Usa as faixas entre os quantis --lower e 1 - lower do histórico")
+    combos.add_argument('--lower', type=float, default=0.05, help="Quantil inferior do --from-history")
+    combos.add_argument('--limit', type=int, default=100, help="Combinações listadas na saída")
+    combos.add_argument('--rebuild', action='store_true', help="Reconstrói o índice")
+    combos.set_defaults(func=command_combinations)
+    
+    validate = subparsers.add_parser('validate', parents=[common],
+                                     help="Validação cruzada temporal (MAE/RMSE por fold e posição)")
+    validate.add_argument('--splits', type=int, default=5, help="Folds temporais")
+    validate.add_argument('--scheme', choices=['expanding', 'blocked'], default='expanding',
+                          help="Treino em todo o passado (expanding) ou só no bloco anterior (blocked)")
+    validate.set_defaults(func=command_validate)
+    
+    tune = subparsers.add_parser('tune', parents=[common],
+                                 help="Busca de hiperparâmetros; grava a melhor configuração no registro")
+    tune.add_argument('--method', choices=['halving', 'random'], default='halving',
+                      help="Successive halving (descarta os piores a cada fold) ou busca aleatória completa")
+    tune.add_argument('--candidates', type=int, default=16, help="Configurações sorteadas por família")
+    tune.add_argument('--splits', type=int, default=4, help="Folds temporais (treino no passado, teste no futuro)")
+    tune.add_argument('--eta', type=int, default=3, help="No halving, 1/eta dos candidatos segue a cada fold")
+    tune.add_argument('--seed', type=int, default=42, help="Semente do sorteio dos candidatos")
+    tune.add_argument('--dry-run', action='store_true', help="Só mostra o resultado, sem gravar no registro")
+    tune.set_defaults(func=command_tune)
+    
+    benchmark = subparsers.add_parser('benchmark', help="Benchmarks dos caminhos críticos (ver benchmarks.py)")
+    benchmark.add_argument('--profile', nargs='?', const='-', metavar='JSONL',
+                           help="Mostra o tempo por etapa no stderr (e exporta os spans, se houver arquivo)")
+    benchmark.set_defaults(func=None)
+    
+    return parser
+
+
+def main(argv: List[str] = None) -> int:
+    parser = build_parser()
+    args, extra = parser.parse_known_args(argv)
+    
+    if args.command == 'benchmark':
+        import benchmarks
+        bench_parser = argparse.ArgumentParser(prog=f"{parser.prog} benchmark")
+        benchmarks.add_arguments(bench_parser)
+        status = benchmarks.run(bench_parser.parse_args(extra))
+        if args.profile:
+            report_profile(args.profile)
+        return status
+    if extra:
+        parser.error(f"argumentos não reconhecidos: {' '.join(extra)}")
+    
+    try:
+        # Os prints das classes vão para o stderr; o stdout fica só com o resultado
+        with contextlib.redirect_stdout(sys.stderr):
+            result, rows = args.func(args)
+    except ValueError as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        return 1
+    
+    write_output(result, rows, args.output)
+    if args.profile:
+        report_profile(args.profile)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
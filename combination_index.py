@@ -0,0 +1,224 @@
+import json
+import os
+import shutil
+import time
+from math import comb
+from typing import Dict, Any, Sequence
+
+import numpy as np
+from joblib import Parallel, delayed
+
+from data_loader import CACHE_DIR
+from scoring import N_NUMBERS, N_BALLS, encode_numbers, popcount
+from tickets import TicketConstraints, decade_counts
+from instrumentation import timed, increment
+
+N_COMBINATIONS = comb(N_NUMBERS, N_BALLS)
+
+# Versão do formato do índice em diretório (manifest.json + um .npy por coluna)
+INDEX_FORMAT = 1
+
+# Linhas avaliadas por vez nas consultas
+QUERY_BLOCK = 1 << 16
+
+# Colunas do índice, uma linha por combinação na ordem lexicográfica (linha = combination_rank)
+INDEX_COLUMNS = {
+    'mascara': np.uint64,
+    'soma_numeros': np.uint16,
+    'pares': np.uint8,
+    'amplitude': np.uint8,
+    'dezena_1': np.uint8,
+    'dezena_2': np.uint8,
+    'dezena_3': np.uint8,
+    'dezena_4': np.uint8,
+    'dezena_5': np.uint8
+}
+
+
+def lex_combinations(low: int, k: int, high: int = N_NUMBERS) -> np.ndarray:
+    """Todas as combinações de k valores em [low, high], em ordem lexicográfica (C x k, uint8)"""
+    # Coluna a coluna: cada linha é repetida uma vez para cada próximo valor possível,
+    # sempre deixando espaço para as colunas que faltam
+    combos = np.arange(low, high - k + 2, dtype=np.uint8)[:, None]
+    for col in range(1, k):
+        last_max = high - k + 1 + col
+        counts = last_max - combos[:, -1].astype(np.int64)
+        starts = np.cumsum(counts) - counts
+        offsets = np.arange(counts.sum()) - np.repeat(starts, counts)
+        combos = np.repeat(combos, counts, axis=0)
+        combos = np.hstack([combos, (combos[:, -1] + 1 + offsets).astype(np.uint8)[:, None]])
+    return combos
+
+
+def chunk_start(first: int, n_numbers: int = N_NUMBERS) -> int:
+    """Primeira linha (ordem lexicográfica) das combinações que começam com `first`"""
+    # Com 50 números é o combination_rank de (first, first + 1, ..., first + 5)
+    return sum(comb(n_numbers - low, N_BALLS - 1) for low in range(1, first))
+
+
+def _build_chunk(path: str, first: int, n_numbers: int = N_NUMBERS):
+    """Preenche as linhas das combinações que começam com `first` (um bloco contíguo)"""
+    rest = lex_combinations(first + 1, N_BALLS - 1, n_numbers)
+    balls = np.hstack([np.full((len(rest), 1), first, dtype=np.uint8), rest])
+    start = chunk_start(first, n_numbers)
+    stop = start + len(balls)
+    
+    decades = decade_counts(balls)
+    values = {
+        'mascara': np.bitwise_or.reduce(np.left_shift(np.uint64(1), (balls - 1).astype(np.uint64)), axis=1),
+        'soma_numeros': balls.sum(axis=1, dtype=np.uint16),
+        'pares': (balls % 2 == 0).sum(axis=1),
+        'amplitude': balls[:, -1] - balls[:, 0],
+        **{f'dezena_{i + 1}': decades[:, i] for i in range(5)}
+    }
+    for name, dtype in INDEX_COLUMNS.items():
+        column = np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r+')
+        column[start:stop] = values[name].astype(dtype)
+        column.flush()
+        del column
+    return stop - start
+
+
+class CombinationIndex:
+    """Índice das 15.890.700 combinações de 6 números com os padrões de preprocess_data"""
+    
+    def __init__(self, path: str = os.path.join(CACHE_DIR, 'combinacoes')):
+        self.path = path
+        with open(os.path.join(path, 'manifest.json'), encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        if self.manifest.get('formato') != INDEX_FORMAT:
+            raise ValueError(f"Formato de índice {self.manifest.get('formato')} não suportado em {path}")
+        # Universo de 1 a n_numbers (50 no jogo; menor só em testes)
+        self.n_numbers = self.manifest.get('numeros', N_NUMBERS)
+        self.n_combinations = self.manifest['combinacoes']
+        
+        # Colunas abertas com mmap: só as páginas lidas pelas consultas vão para a memória
+        self.columns = {
+            name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r') for name in INDEX_COLUMNS
+        }
+    
+    def __len__(self) -> int:
+        return self.n_combinations
+    
+    @classmethod
+    @timed('build_combination_index')
+    def build(cls, path: str = os.path.join(CACHE_DIR, 'combinacoes'), n_jobs: int = -1,
+              n_numbers: int = N_NUMBERS) -> 'CombinationIndex':
+        """Calcula o índice em blocos paralelos (um por primeiro número) e o grava em disco"""
+        start_time = time.perf_counter()
+        n_combinations = comb(n_numbers, N_BALLS)
+        tmp_path = f"{path}.tmp"
+        if os.path.isdir(tmp_path):
+            shutil.rmtree(tmp_path)
+        os.makedirs(tmp_path)
+        
+        # Arquivos .npy pré-alocados; cada bloco escreve direto na sua faixa de linhas
+        for name, dtype in INDEX_COLUMNS.items():
+            column = np.lib.format.open_memmap(os.path.join(tmp_path, f'{name}.npy'), mode='w+',
+                                               dtype=dtype, shape=(n_combinations,))
+            del column
+        
+        # Blocos maiores primeiro (começando com 1) para equilibrar os processos
+        firsts = range(1, n_numbers - N_BALLS + 2)
+        rows = Parallel(n_jobs=n_jobs, backend='loky')(
+            delayed(_build_chunk)(tmp_path, first, n_numbers) for first in firsts
+        )
+        if sum(rows) != n_combinations:
+            raise ValueError(f"Índice incompleto: {sum(rows)} de {n_combinations} combinações")
+        
+        # Manifest por último: um diretório sem ele é um índice incompleto
+        manifest = {
+            'formato': INDEX_FORMAT,
+            'numeros': n_numbers,
+            'combinacoes': n_combinations,
+            'colunas': {name: np.dtype(dtype).name for name, dtype in INDEX_COLUMNS.items()},
+            'tempo_construcao_s': time.perf_counter() - start_time
+        }
+        with open(os.path.join(tmp_path, 'manifest.json'), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        os.replace(tmp_path, path)
+        print(f"Índice de {n_combinations} combinações salvo em {path} ({manifest['tempo_construcao_s']:.1f} s)")
+        return cls(path)
+    
+    @classmethod
+    def open_or_build(cls, path: str = os.path.join(CACHE_DIR, 'combinacoes'), n_jobs: int = -1) -> 'CombinationIndex':
+        """Abre o índice salvo ou o constrói uma única vez"""
+        if os.path.exists(os.path.join(path, 'manifest.json')):
+            return cls(path)
+        return cls.build(path, n_jobs)
+    
+    @timed('query_combination_index')
+    def query(self, constraints: TicketConstraints = None, contains: Sequence[int] = None,
+              excludes: Sequence[int] = None) -> np.ndarray:
+        """Posições (combination_rank) das combinações dentro das faixas e com/sem os números dados"""
+        constraints = constraints or TicketConstraints()
+        filters = [('soma_numeros', constraints.soma), ('pares', constraints.pares),
+                   ('amplitude', constraints.amplitude)]
+        filters += [(f'dezena_{i + 1}', bounds) for i, bounds in enumerate(constraints.dezenas or [])]
+        
+        # Faixa (mín, máx) vira um só teste sem sinal: (valor - mín) <= (máx - mín), com os
+        # limites no tipo da coluna para não promover a coluna inteira para int64/float
+        tests = []
+        for name, bounds in filters:
+            if bounds is None:
+                continue
+            dtype = self.columns[name].dtype
+            low = max(int(np.ceil(bounds[0])), 0)
+            high = min(int(np.floor(bounds[1])), int(np.iinfo(dtype).max))
+            if low > high:
+                return np.empty(0, dtype=np.int64)
+            tests.append((self.columns[name], dtype.type(low), dtype.type(high - low)))
+        
+        # contains e excludes numa só comparação: (máscara & (incluir | excluir)) == incluir
+        wanted = encode_numbers([list(contains)], N_NUMBERS)[0] if contains else np.uint64(0)
+        unwanted = encode_numbers([list(excludes)], N_NUMBERS)[0] if excludes else np.uint64(0)
+        if wanted & unwanted:
+            return np.empty(0, dtype=np.int64)
+        relevant = wanted | unwanted
+        
+        # Blocos do tamanho do cache com buffers reaproveitados: nenhum temporário do tamanho do índice
+        ranks = []
+        selected = np.empty(QUERY_BLOCK, dtype=bool)
+        passed = np.empty(QUERY_BLOCK, dtype=bool)
+        buffers = {dtype: np.empty(QUERY_BLOCK, dtype=dtype) for dtype in set(INDEX_COLUMNS.values())}
+        for start in range(0, self.n_combinations, QUERY_BLOCK):
+            stop = min(start + QUERY_BLOCK, self.n_combinations)
+            size = stop - start
+            ok = selected[:size]
+            ok.fill(True)
+            for column, low, span in tests:
+                shifted = np.subtract(column[start:stop], low, out=buffers[column.dtype.type][:size])
+                ok &= np.less_equal(shifted, span, out=passed[:size])
+            if relevant:
+                masks = np.bitwise_and(self.columns['mascara'][start:stop], relevant,
+                                       out=buffers[np.uint64][:size])
+                ok &= np.equal(masks, wanted, out=passed[:size])
+            ranks.append(np.flatnonzero(ok) + start)
+        
+        increment('consultas_indice')
+        return np.concatenate(ranks)
+    
+    def combinations(self, ranks: np.ndarray) -> np.ndarray:
+        """Os 6 números (n x 6, ordenados) de cada posição do índice, a partir das máscaras"""
+        masks = np.ascontiguousarray(self.columns['mascara'][np.asarray(ranks, dtype=np.int64)])
+        bits = np.unpackbits(masks.view(np.uint8).reshape(-1, 8), axis=1, bitorder='little')
+        return (np.nonzero(bits)[1].reshape(-1, N_BALLS) + 1).astype(np.uint8)
+    
+    def hits(self, ranks: np.ndarray, draw: Sequence[int]) -> np.ndarray:
+        """Acertos de cada combinação contra um sorteio (popcount das máscaras)"""
+        draw_mask = encode_numbers([list(draw)], N_NUMBERS)[0]
+        return popcount(self.columns['mascara'][np.asarray(ranks, dtype=np.int64)] & draw_mask)
+    
+    def summary(self, ranks: np.ndarray = None) -> Dict[str, Any]:
+        """Contagens por soma, pares e amplitude (de todas ou das combinações informadas)"""
+        select = slice(None) if ranks is None else np.asarray(ranks, dtype=np.int64)
+        return {
+            'combinacoes': self.n_combinations if ranks is None else len(ranks),
+            **{
+                name: {int(value): int(count) for value, count in
+                       enumerate(np.bincount(self.columns[name][select])) if count}
+                for name in ('soma_numeros', 'pares', 'amplitude')
+            }
+        }
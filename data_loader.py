@@ -1,41 +1,181 @@
 import pandas as pd
 import numpy as np
 from typing import Tuple, List, Optional
+import hashlib
+import json
 import os
+from draw_store import DrawStore, pattern_counts, find_draw_columns
+from feature_engine import RunningStats
+from instrumentation import timed, increment
+
+try:
+    import pyarrow.feather as feather
+except ImportError:  # pragma: no cover - cache colunar é opcional
+    feather = None
+
+CACHE_DIR = '.milionaria_cache'
 
 class MilionariaDataLoader:
     """Carregador de dados históricos da +Milionária"""
     
-    def __init__(self, file_path):
+    def __init__(self, file_path, cache_dir: Optional[str] = os.path.join(CACHE_DIR, 'data')):
         self.file_path = file_path
+        # Diretório do cache colunar (None desativa o cache)
+        self.cache_dir = cache_dir
         self.data = None
         self.processed_data = None
-        
+        # Representação compacta em arrays, criada sob demanda
+        self.draw_store = None
+        # Frequências, janelas móveis e atrasos mantidos de forma incremental
+        self.running_stats = None
+        # Chave (hash do arquivo) do cache colunar com os deltas de sorteios novos
+        self._cache_key = None
+    
+    @timed('load_data')
     def load_data(self) -> pd.DataFrame:
         """Carrega os dados do arquivo Excel"""
+        self.draw_store = None
+        self.running_stats = None
+        self._cache_key = None
         try:
             # Verifica se é um arquivo carregado (UploadedFile) ou caminho
-            if hasattr(self.file_path, 'read'):
+            if isinstance(self.file_path, DrawStore):
+                # Sorteios já em memória no formato compacto
+                self.draw_store = self.file_path
+                self.data = self.file_path.to_dataframe()
+            elif hasattr(self.file_path, 'read'):
                 # É um arquivo carregado pelo Streamlit
-                self.data = pd.read_excel(self.file_path)
+                self.data = self._read_excel_cached(self.file_path)
             elif isinstance(self.file_path, str) and self.file_path.endswith('.xlsx'):
                 # É um caminho de arquivo local
-                self.data = pd.read_excel(self.file_path)
+                self.data = self._read_excel_cached(self.file_path)
             else:
                 raise ValueError("Formato de arquivo não suportado")
-                
+            
             print(f"Dados carregados: {len(self.data)} registros")
             return self.data
-            
+        
         except Exception as e:
             print(f"Erro ao carregar dados: {e}")
             # Cria dados de exemplo se não conseguir carregar
             return self._create_sample_data()
     
-    def _create_sample_data(self) -> pd.DataFrame:
+    def _read_excel_cached(self, source) -> pd.DataFrame:
+        """Lê o Excel uma vez e reaproveita uma cópia colunar (Feather) nas próximas cargas"""
+        if self.cache_dir is None or feather is None:
+            return self._parse_excel(source)
+        
+        self._cache_key = self._source_hash(source)
+        cache_path = os.path.join(self.cache_dir, f"{self._cache_key}.feather")
+        
+        if os.path.exists(cache_path):
+            try:
+                # Arquivo sem compressão: leitura por memory map, sem parse de XLSX
+                with timed('feather_read'):
+                    data = feather.read_table(cache_path, memory_map=True).to_pandas()
+                increment('cache_excel_hits')
+                return self._apply_deltas(data)
+            except Exception as e:
+                print(f"Cache inválido em {cache_path}, relendo o Excel: {e}")
+        
+        increment('cache_excel_misses')
+        data = self._parse_excel(source)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{cache_path}.tmp"
+        feather.write_feather(data, tmp_path, compression='uncompressed')
+        os.replace(tmp_path, cache_path)
+        return self._apply_deltas(data)
+    
+    def _delta_paths(self) -> List[str]:
+        """Arquivos de delta (sorteios acrescentados) do cache atual, em ordem de gravação"""
+        if self._cache_key is None or not os.path.isdir(self.cache_dir):
+            return []
+        
+        prefix = f"{self._cache_key}.delta-"
+        names = sorted(name for name in os.listdir(self.cache_dir)
+                       if name.startswith(prefix) and name.endswith('.feather'))
+        return [os.path.join(self.cache_dir, name) for name in names]
+    
+    def _apply_deltas(self, data: pd.DataFrame) -> pd.DataFrame:
+        """Acrescenta ao histórico do cache os sorteios gravados por append_draws"""
+        paths = self._delta_paths()
+        if not paths:
+            return data
+        
+        with timed('delta_read', arquivos=len(paths)):
+            deltas = [feather.read_table(path, memory_map=True).to_pandas() for path in paths]
+        return pd.concat([data] + deltas, ignore_index=True)
+    
+    def _write_delta(self, rows: pd.DataFrame):
+        """Grava os sorteios novos num arquivo de delta próprio (o cache base não é reescrito)"""
+        paths = self._delta_paths()
+        delta_path = os.path.join(self.cache_dir, f"{self._cache_key}.delta-{len(paths):05d}.feather")
+        tmp_path = f"{delta_path}.tmp"
+        feather.write_feather(rows.reset_index(drop=True), tmp_path, compression='uncompressed')
+        os.replace(tmp_path, delta_path)
+    
+    def _parse_excel(self, source) -> pd.DataFrame:
+        """Parse do XLSX (a etapa mais cara da carga)"""
+        with timed('excel_parse'):
+            return self._compact_dtypes(pd.read_excel(source))
+    
+    def source_hash(self) -> str:
+        """Hash do conteúdo da fonte de dados (chave do cache colunar e dos caches do app)"""
+        return self._source_hash(self.file_path)
+    
+    def _source_hash(self, source) -> str:
+        """Hash do conteúdo do arquivo; para caminhos locais, reaproveita o hash se o mtime não mudou"""
+        if hasattr(source, 'read'):
+            content = source.getvalue() if hasattr(source, 'getvalue') else source.read()
+            if hasattr(source, 'seek'):
+                source.seek(0)
+            return hashlib.sha256(content).hexdigest()
+        
+        if self.cache_dir is None:
+            with open(source, 'rb') as f:
+                return hashlib.sha256(f.read()).hexdigest()
+        
+        stat = os.stat(source)
+        index_path = os.path.join(self.cache_dir, 'index.json')
+        index = {}
+        if os.path.exists(index_path):
+            try:
+                with open(index_path, encoding='utf-8') as f:
+                    index = json.load(f)
+            except (OSError, ValueError):
+                index = {}
+        
+        key = os.path.abspath(source)
+        entry = index.get(key)
+        if entry and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+            return entry['sha256']
+        
+        with open(source, 'rb') as f:
+            content_hash = hashlib.sha256(f.read()).hexdigest()
+        
+        index[key] = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'sha256': content_hash}
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with open(index_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, indent=2)
+        return content_hash
+    
+    @classmethod
+    def _compact_dtypes(cls, data: pd.DataFrame) -> pd.DataFrame:
+        """Tipos fixos para as colunas do sorteio (bolas/trevos int8, concurso int32); as demais ficam como lidas"""
+        # Tipo fixo, e não o menor que cabe no arquivo atual: o esquema do cache não muda
+        # conforme o máximo de cada planilha (ganhadores e rateios não são reduzidos)
+        number_cols, clover_cols = find_draw_columns(data)
+        dtypes = {**{col: np.int8 for col in number_cols + clover_cols}, 'Concurso': np.int32}
+        for col, dtype in dtypes.items():
+            if (col in data.columns and pd.api.types.is_integer_dtype(data[col])
+                    and not cls._exceeds_range(data[col], dtype)):
+                data[col] = data[col].astype(dtype)
+        return data
+    
+    def _create_sample_data(self, n_draws: int = 100) -> pd.DataFrame:
         """Cria dados de exemplo para demonstração"""
         np.random.seed(42)
-        n_draws = 100
+        dates = pd.date_range('2022-05-28', periods=n_draws, freq='W-SAT')
         
         data = []
         for i in range(1, n_draws + 1):
@@ -46,36 +186,36 @@ class MilionariaDataLoader:
             
             data.append({
                 'Concurso': i,
-                'Data': pd.date_range('2022-05-28', periods=n_draws, freq='W-SAT')[i-1],
+                'Data': dates[i-1],
                 'Num1': numbers[0], 'Num2': numbers[1], 'Num3': numbers[2],
                 'Num4': numbers[3], 'Num5': numbers[4], 'Num6': numbers[5],
                 'Trevo1': clovers[0], 'Trevo2': clovers[1]
             })
         
         self.data = pd.DataFrame(data)
-        print("Usando dados de exemplo (100 sorteios simulados)")
+        print(f"Usando dados de exemplo ({n_draws} sorteios simulados)")
         return self.data
     
-    def preprocess_data(self) -> pd.DataFrame:
-        """Preprocessa os dados para machine learning"""
-        if self.data is None:
-            self.load_data()
-        
-        df = self.data.copy()
-        
-        # Extrai features dos números
-        number_cols = [col for col in df.columns if 'Num' in col or col.startswith('Num')]
-        clover_cols = [col for col in df.columns if 'Trevo' in col or 'Clover' in col]
+    @staticmethod
+    def _feature_columns(data: pd.DataFrame) -> Tuple[List[str], List[str]]:
+        """Colunas de números e trevos usadas nas features derivadas"""
+        number_cols = [col for col in data.columns if 'Num' in col or col.startswith('Num')]
+        clover_cols = [col for col in data.columns if 'Trevo' in col or 'Clover' in col]
         
         # Se não encontrar colunas específicas, tenta identificar automaticamente
         if not number_cols:
             # Assume que as primeiras 6 colunas numéricas são os números
-            numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
+            numeric_cols = data.select_dtypes(include=[np.number]).columns.tolist()
             if 'Concurso' in numeric_cols:
                 numeric_cols.remove('Concurso')
             number_cols = numeric_cols[:6] if len(numeric_cols) >= 6 else []
             clover_cols = numeric_cols[6:8] if len(numeric_cols) >= 8 else []
         
+        return number_cols, clover_cols
+    
+    @staticmethod
+    def _derive_features(df: pd.DataFrame, number_cols: List[str], clover_cols: List[str]) -> pd.DataFrame:
+        """Colunas derivadas de cada linha (dependem só do próprio sorteio)"""
         # Cria features estatísticas
         if number_cols:
             df['soma_numeros'] = df[number_cols].sum(axis=1)
@@ -90,16 +230,18 @@ class MilionariaDataLoader:
         
         # Features de padrões
         if number_cols:
+            # Matriz (n x 6) das bolas: os padrões saem de operações vetorizadas
+            balls = df[number_cols].to_numpy()
+            
+            pares, decades = pattern_counts(balls)
+            
             # Números pares/ímpares
-            df['pares'] = df[number_cols].apply(lambda x: sum(x % 2 == 0), axis=1)
+            df['pares'] = pares
             df['impares'] = 6 - df['pares']
             
-            # Distribuição por dezenas
-            df['dezena_1'] = df[number_cols].apply(lambda x: sum((x >= 1) & (x <= 10)), axis=1)
-            df['dezena_2'] = df[number_cols].apply(lambda x: sum((x >= 11) & (x <= 20)), axis=1)
-            df['dezena_3'] = df[number_cols].apply(lambda x: sum((x >= 21) & (x <= 30)), axis=1)
-            df['dezena_4'] = df[number_cols].apply(lambda x: sum((x >= 31) & (x <= 40)), axis=1)
-            df['dezena_5'] = df[number_cols].apply(lambda x: sum((x >= 41) & (x <= 50)), axis=1)
+            # Distribuição por dezenas: contagem de bolas em cada faixa
+            for i in range(5):
+                df[f'dezena_{i + 1}'] = decades[:, i]
         
         # Features temporais se houver coluna de data
         if 'Data' in df.columns:
@@ -108,44 +250,155 @@ class MilionariaDataLoader:
             df['mes'] = df['Data'].dt.month
             df['dia_semana'] = df['Data'].dt.dayofweek
         
+        return df
+    
+    @timed('preprocess_data')
+    def preprocess_data(self) -> pd.DataFrame:
+        """Preprocessa os dados para machine learning"""
+        if self.data is None:
+            self.load_data()
+        
+        number_cols, clover_cols = self._feature_columns(self.data)
+        df = self._derive_features(self.data.copy(), number_cols, clover_cols)
+        
         self.processed_data = df
         return df
     
+    def get_draw_store(self, with_masks: bool = False) -> DrawStore:
+        """Retorna os sorteios no formato compacto (arrays uint8), criando uma única vez"""
+        if self.data is None:
+            self.load_data()
+        
+        if self.draw_store is None:
+            self.draw_store = DrawStore.from_dataframe(self.data)
+        if with_masks and self.draw_store.number_masks is None:
+            self.draw_store.build_masks()
+        
+        return self.draw_store
+    
+    @timed('append_draws')
+    def append_draws(self, source) -> pd.DataFrame:
+        """Acrescenta só os concursos novos de `source` (CSV, JSON, XLSX mais recente, DataFrame ou lista de dicts)"""
+        if self.data is None:
+            self.load_data()
+        
+        rows = self._read_new_rows(source)
+        if 'Concurso' not in rows.columns or 'Concurso' not in self.data.columns:
+            raise ValueError("Coluna 'Concurso' necessária para a ingestão incremental")
+        
+        # Diff pela chave: só concursos posteriores ao último já carregado
+        rows = rows[rows['Concurso'] > self.data['Concurso'].max()]
+        rows = self._align_columns(rows.drop_duplicates('Concurso').sort_values('Concurso'))
+        if rows.empty:
+            print("Nenhum sorteio novo para adicionar")
+            return rows
+        
+        # Valida bolas/trevos antes de alterar qualquer estado
+        new_store = DrawStore.from_dataframe(rows)
+        rows.index = pd.RangeIndex(len(self.data), len(self.data) + len(rows))
+        
+        self.data = pd.concat([self.data, rows])
+        if self.processed_data is not None:
+            # Colunas derivadas calculadas apenas para as linhas novas
+            number_cols, clover_cols = self._feature_columns(self.data)
+            derived = self._derive_features(rows.copy(), number_cols, clover_cols)
+            self.processed_data = pd.concat([self.processed_data, derived])
+        if self.draw_store is not None:
+            self.draw_store = self.draw_store.append(new_store)
+        if self.running_stats is not None:
+            for i in range(len(new_store)):
+                date = None if new_store.dates is None else new_store.dates[i]
+                self.running_stats.update(new_store.balls[i], new_store.clovers[i], date)
+        
+        if self._cache_key is not None and feather is not None:
+            self._write_delta(rows)
+        
+        increment('sorteios_acrescentados', len(rows))
+        print(f"{len(rows)} sorteio(s) novo(s) adicionado(s): total de {len(self.data)} registros")
+        return rows
+    
+    def _read_new_rows(self, source) -> pd.DataFrame:
+        """Lê os sorteios candidatos a acréscimo, conforme o tipo da fonte"""
+        if isinstance(source, pd.DataFrame):
+            return source.copy()
+        if isinstance(source, DrawStore):
+            return source.to_dataframe()
+        if isinstance(source, list):
+            return pd.DataFrame(source)
+        
+        name = source if isinstance(source, str) else getattr(source, 'name', '')
+        extension = os.path.splitext(name)[1].lower()
+        if extension == '.csv':
+            # Detecta o separador (a Caixa e o Excel em pt-BR usam ';')
+            return pd.read_csv(source, sep=None, engine='python')
+        if extension == '.json':
+            return pd.read_json(source, convert_dates=False)
+        if extension == '.xlsx':
+            return self._parse_excel(source)
+        raise ValueError("Formato não suportado para novos sorteios (use CSV, JSON ou XLSX)")
+    
+    def _align_columns(self, rows: pd.DataFrame) -> pd.DataFrame:
+        """Deixa as linhas novas com as colunas e os tipos do histórico carregado"""
+        rows = rows.reindex(columns=self.data.columns)
+        for col in rows.columns:
+            dtype = self.data[col].dtype
+            if rows[col].dtype == dtype:
+                continue
+            if self._exceeds_range(rows[col], dtype):
+                # Valor que não cabe no tipo compacto do histórico (ex.: int8 de um cache antigo):
+                # promove a coluna do histórico em vez de deixar o astype estourar
+                dtype = np.result_type(dtype, rows[col].dtype)
+                self.data[col] = self.data[col].astype(dtype)
+            try:
+                if pd.api.types.is_datetime64_any_dtype(dtype):
+                    rows[col] = pd.to_datetime(rows[col]).astype(dtype)
+                else:
+                    rows[col] = rows[col].astype(dtype)
+            except (TypeError, ValueError):
+                # Ex.: coluna ausente (NaN) num tipo inteiro; o concat promove o tipo
+                pass
+        return rows
+    
+    @staticmethod
+    def _exceeds_range(values: pd.Series, dtype) -> bool:
+        """Se algum valor numérico fica fora da faixa de um tipo inteiro"""
+        if not pd.api.types.is_integer_dtype(dtype) or not pd.api.types.is_numeric_dtype(values):
+            return False
+        values = values.dropna()
+        if values.empty:
+            return False
+        limits = np.iinfo(dtype)
+        return bool(values.min() < limits.min or values.max() > limits.max)
+    
+    def get_running_stats(self) -> RunningStats:
+        """Estatísticas incrementais do histórico, criadas uma única vez e atualizadas por append_draws"""
+        if self.running_stats is None:
+            self.running_stats = RunningStats.from_store(self.get_draw_store())
+        return self.running_stats
+    
     def get_frequency_analysis(self) -> dict:
         """Análise de frequência dos números"""
         if self.data is None:
             self.load_data()
         
-        # Identifica colunas de números
-        number_cols = [col for col in self.data.columns if 'Num' in col or col.startswith('Num')]
-        clover_cols = [col for col in self.data.columns if 'Trevo' in col or 'Clover' in col]
-        
-        if not number_cols:
-            numeric_cols = self.data.select_dtypes(include=[np.number]).columns.tolist()
-            if 'Concurso' in numeric_cols:
-                numeric_cols.remove('Concurso')
-            number_cols = numeric_cols[:6] if len(numeric_cols) >= 6 else []
-            clover_cols = numeric_cols[6:8] if len(numeric_cols) >= 8 else []
+        try:
+            return self.get_running_stats().frequency_analysis()
+        except ValueError:
+            # Colunas/valores fora do formato do DrawStore: conta direto no DataFrame
+            pass
         
+        number_cols, clover_cols = self._feature_columns(self.data)
         analysis = {}
         
         if number_cols:
             # Frequência dos números principais
-            all_numbers = []
-            for col in number_cols:
-                all_numbers.extend(self.data[col].tolist())
-            
-            freq_numbers = pd.Series(all_numbers).value_counts().sort_index()
-            analysis['numeros'] = freq_numbers.to_dict()
+            all_numbers = pd.Series(self.data[number_cols].to_numpy().ravel())
+            analysis['numeros'] = all_numbers.value_counts().sort_index().to_dict()
         
         if clover_cols:
             # Frequência dos trevos
-            all_clovers = []
-            for col in clover_cols:
-                all_clovers.extend(self.data[col].tolist())
-            
-            freq_clovers = pd.Series(all_clovers).value_counts().sort_index()
-            analysis['trevos'] = freq_clovers.to_dict()
+            all_clovers = pd.Series(self.data[clover_cols].to_numpy().ravel())
+            analysis['trevos'] = all_clovers.value_counts().sort_index().to_dict()
         
         return analysis
     
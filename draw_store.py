@@ -0,0 +1,169 @@
+import numpy as np
+import pandas as pd
+from typing import Tuple, List, Dict, Optional
+from scoring import encode_numbers
+
+NUMBER_COLUMNS = [f'Num{i}' for i in range(1, 7)]
+CLOVER_COLUMNS = ['Trevo1', 'Trevo2']
+DECADE_LOWS = np.array([1, 11, 21, 31, 41])
+
+
+def find_draw_columns(data: pd.DataFrame) -> Tuple[List[str], List[str]]:
+    """Identifica as colunas das bolas (Num*/Bola*) e dos trevos (Trevo1/Trevo2)"""
+    number_cols = [col for col in data.columns if col.startswith('Num') or col.startswith('Bola')]
+    clover_cols = [col for col in data.columns if col.startswith('Trevo') and col[5:].isdigit()]
+    
+    # Se não encontrar colunas específicas, usa as primeiras colunas numéricas
+    if not number_cols:
+        numeric_cols = data.select_dtypes(include=[np.number]).columns.tolist()
+        if 'Concurso' in numeric_cols:
+            numeric_cols.remove('Concurso')
+        number_cols = numeric_cols[:6] if len(numeric_cols) >= 6 else []
+        clover_cols = numeric_cols[6:8] if len(numeric_cols) >= 8 else []
+    
+    return number_cols[:6], clover_cols[:2]
+
+
+def pattern_counts(balls: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Quantidade de pares e de bolas por dezena (n x 5) de uma matriz de bolas"""
+    pares = (balls % 2 == 0).sum(axis=1)
+    # Compara todas as bolas com as 5 faixas [lo, lo + 9] de uma vez
+    in_decade = (balls[:, :, None] >= DECADE_LOWS) & (balls[:, :, None] <= DECADE_LOWS + 9)
+    return pares, in_decade.sum(axis=1)
+
+
+class DrawStore:
+    """Sorteios em arrays contíguos: bolas (n x 6) e trevos (n x 2) em uint8"""
+    
+    def __init__(self, balls: np.ndarray, clovers: np.ndarray, contests: Optional[np.ndarray] = None,
+                 dates: Optional[np.ndarray] = None, with_masks: bool = False):
+        self.balls = np.ascontiguousarray(balls, dtype=np.uint8)
+        self.clovers = np.ascontiguousarray(clovers, dtype=np.uint8)
+        
+        if contests is None:
+            contests = np.arange(1, len(self.balls) + 1)
+        self.contests = np.ascontiguousarray(contests, dtype=np.int32)
+        self.dates = None if dates is None else np.asarray(dates, dtype='datetime64[s]')
+        
+        # Máscaras de bits opcionais: bit (n - 1) ligado para cada número sorteado
+        self.number_masks = None
+        self.clover_masks = None
+        if with_masks:
+            self.build_masks()
+    
+    @classmethod
+    def from_dataframe(cls, data: pd.DataFrame, with_masks: bool = False) -> 'DrawStore':
+        """Cria o store a partir do DataFrame da Caixa (ou dos dados de exemplo)"""
+        number_cols, clover_cols = find_draw_columns(data)
+        if len(number_cols) < 6 or len(clover_cols) < 2:
+            raise ValueError("Colunas de números/trevos não encontradas")
+        
+        balls = data[number_cols].to_numpy(dtype=np.float64)
+        clovers = data[clover_cols].to_numpy(dtype=np.float64)
+        if not (np.isin(balls, np.arange(1, 51)).all() and np.isin(clovers, np.arange(1, 7)).all()):
+            raise ValueError("Valores de números/trevos fora do intervalo válido")
+        
+        contests = data['Concurso'].to_numpy() if 'Concurso' in data.columns else None
+        
+        dates = None
+        for date_col in ['Data', 'Data Sorteio']:
+            if date_col in data.columns:
+                dates = pd.to_datetime(data[date_col], dayfirst=True).to_numpy(dtype='datetime64[s]')
+                break
+        
+        return cls(balls, clovers, contests, dates, with_masks)
+    
+    def __len__(self) -> int:
+        return len(self.balls)
+    
+    def __getitem__(self, index: slice) -> 'DrawStore':
+        """Fatia de sorteios (views dos mesmos arrays, sem cópia)"""
+        if not isinstance(index, slice):
+            raise TypeError("DrawStore só aceita fatias (slice)")
+        
+        store = DrawStore.__new__(DrawStore)
+        store.balls = self.balls[index]
+        store.clovers = self.clovers[index]
+        store.contests = self.contests[index]
+        store.dates = None if self.dates is None else self.dates[index]
+        store.number_masks = None if self.number_masks is None else self.number_masks[index]
+        store.clover_masks = None if self.clover_masks is None else self.clover_masks[index]
+        return store
+    
+    def append(self, other: 'DrawStore') -> 'DrawStore':
+        """Novo store com os sorteios de `other` ao final (máscaras só das linhas novas)"""
+        dates = None
+        if self.dates is not None and other.dates is not None:
+            dates = np.concatenate([self.dates, other.dates])
+        
+        store = DrawStore(np.concatenate([self.balls, other.balls]),
+                          np.concatenate([self.clovers, other.clovers]),
+                          np.concatenate([self.contests, other.contests]), dates)
+        if self.number_masks is not None:
+            if other.number_masks is None:
+                other.build_masks()
+            store.number_masks = np.concatenate([self.number_masks, other.number_masks])
+            store.clover_masks = np.concatenate([self.clover_masks, other.clover_masks])
+        return store
+    
+    def build_masks(self):
+        """Calcula as máscaras de 50 bits (números) e 6 bits (trevos) de cada sorteio"""
+        self.number_masks = encode_numbers(self.balls)
+        self.clover_masks = encode_numbers(self.clovers, 6).astype(np.uint8)
+    
+    def number_onehot(self) -> np.ndarray:
+        """Matriz indicadora (n x 50) dos números sorteados"""
+        onehot = np.zeros((len(self), 50), dtype=np.int64)
+        np.put_along_axis(onehot, self.balls.astype(np.intp) - 1, 1, axis=1)
+        return onehot
+    
+    def clover_onehot(self) -> np.ndarray:
+        """Matriz indicadora (n x 6) dos trevos sorteados"""
+        onehot = np.zeros((len(self), 6), dtype=np.int64)
+        np.put_along_axis(onehot, self.clovers.astype(np.intp) - 1, 1, axis=1)
+        return onehot
+    
+    def number_frequencies(self) -> np.ndarray:
+        """Frequência de cada número (índice 0 = número 1)"""
+        return np.bincount(self.balls.ravel(), minlength=51)[1:]
+    
+    def clover_frequencies(self) -> np.ndarray:
+        """Frequência de cada trevo (índice 0 = trevo 1)"""
+        return np.bincount(self.clovers.ravel(), minlength=7)[1:]
+    
+    def sums(self) -> np.ndarray:
+        """Soma dos números de cada sorteio"""
+        return self.balls.sum(axis=1, dtype=np.int64)
+    
+    def frequency_analysis(self) -> Dict[str, Dict[int, int]]:
+        """Frequências no mesmo formato de MilionariaDataLoader.get_frequency_analysis"""
+        numbers = self.number_frequencies()
+        clovers = self.clover_frequencies()
+        return {
+            'numeros': {num + 1: int(freq) for num, freq in enumerate(numbers) if freq > 0},
+            'trevos': {trevo + 1: int(freq) for trevo, freq in enumerate(clovers) if freq > 0}
+        }
+    
+    def to_dataframe(self, with_patterns: bool = False) -> pd.DataFrame:
+        """DataFrame no formato dos dados de exemplo (Concurso, Data, Num1-6, Trevo1-2)"""
+        df = pd.DataFrame(self.balls, columns=NUMBER_COLUMNS)
+        df[CLOVER_COLUMNS] = self.clovers
+        df.insert(0, 'Concurso', self.contests)
+        if self.dates is not None:
+            df.insert(1, 'Data', self.dates)
+        
+        if with_patterns:
+            pares, decades = pattern_counts(self.balls)
+            df['soma_numeros'] = self.sums()
+            df['amplitude'] = self.balls.max(axis=1) - self.balls.min(axis=1)
+            df['pares'] = pares
+            df['impares'] = 6 - pares
+            for i in range(5):
+                df[f'dezena_{i + 1}'] = decades[:, i]
+        
+        return df
+    
+    def memory_usage(self) -> int:
+        """Bytes ocupados pelos arrays do store"""
+        arrays = [self.balls, self.clovers, self.contests, self.dates, self.number_masks, self.clover_masks]
+        return sum(array.nbytes for array in arrays if array is not None)
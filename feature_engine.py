@@ -0,0 +1,215 @@
+import numpy as np
+import pandas as pd
+from collections import deque
+from typing import List, Dict, Sequence
+
+NUMBER_WINDOWS = (5, 10, 20)
+CLOVER_WINDOWS = (5, 10)
+SOMA_LAGS = (1, 2, 3)
+
+
+def rolling_frequencies(one_hot: np.ndarray, window: int) -> np.ndarray:
+    """Frequência de cada valor nos `window` sorteios anteriores a cada linha"""
+    # Contagem na janela [i - window, i) via somas acumuladas; sem histórico -> 0
+    n = len(one_hot)
+    cum = np.zeros((n + 1, one_hot.shape[1]), dtype=np.int64)
+    np.cumsum(one_hot, axis=0, out=cum[1:])
+    
+    idx = np.arange(n)
+    start = np.maximum(0, idx - window)
+    counts = cum[idx] - cum[start]
+    lengths = idx - start
+    
+    freqs = np.zeros(counts.shape, dtype=np.float64)
+    np.divide(counts, lengths[:, None], out=freqs, where=lengths[:, None] > 0)
+    return freqs
+
+
+def ball_features(one_hot: np.ndarray, windows: Sequence[int], start: int = 0) -> np.ndarray:
+    """Features de cada (sorteio, valor) nas linhas start..n: (n + 1 - start) x n_values x (len(windows) + 2)"""
+    # A linha i só usa os sorteios anteriores a i; a linha extra (n) descreve o próximo sorteio.
+    # Por valor: frequência em cada janela, frequência acumulada e atraso (/ 10 sorteios)
+    n, n_values = one_hot.shape
+    cum = np.zeros((n + 1, n_values), dtype=np.int64)
+    np.cumsum(one_hot, axis=0, out=cum[1:])
+    
+    rows = np.arange(start, n + 1)
+    features = []
+    for window in list(windows) + [n + 1]:
+        # Janela [i - window, i) por somas acumuladas; a última "janela" cobre todo o histórico
+        begin = np.maximum(0, rows - window)
+        lengths = (rows - begin)[:, None]
+        freqs = np.zeros((len(rows), n_values), dtype=np.float64)
+        np.divide(cum[rows] - cum[begin], lengths, out=freqs, where=lengths > 0)
+        features.append(freqs)
+    
+    # Último sorteio (< i) com cada valor; -1 = nunca saiu, e o atraso vira i (como RunningStats.gaps)
+    seen = np.where(one_hot > 0, np.arange(n)[:, None], -1)
+    last_seen = np.vstack([np.full((1, n_values), -1), np.maximum.accumulate(seen, axis=0)])[rows]
+    gaps = np.where(last_seen >= 0, rows[:, None] - 1 - last_seen, rows[:, None])
+    features.append(gaps / 10.0)
+    
+    return np.stack(features, axis=2)
+
+
+class FeatureStore:
+    """Matriz de features do histórico completo, calculada uma única vez"""
+    
+    def __init__(self, X: np.ndarray, y: np.ndarray, feature_names: List[str]):
+        # Buffers com folga: append acrescenta linhas sem recopiar o histórico a cada sorteio
+        self._X = X
+        self._y = y
+        self._n = len(X)
+        self.feature_names = feature_names
+    
+    @property
+    def X(self) -> np.ndarray:
+        return self._X[:self._n]
+    
+    @property
+    def y(self) -> np.ndarray:
+        return self._y[:self._n]
+    
+    def __len__(self) -> int:
+        return self._n
+    
+    def append(self, X_rows: np.ndarray, y_rows: np.ndarray):
+        """Acrescenta linhas ao final (capacidade dobrada sob demanda: O(1) amortizado por linha)"""
+        X_rows = np.atleast_2d(X_rows)
+        y_rows = np.atleast_2d(y_rows)
+        needed = self._n + len(X_rows)
+        if needed > len(self._X):
+            capacity = max(needed, 2 * len(self._X), 16)
+            self._X = self._grow(self._X, capacity, X_rows.shape[1])
+            self._y = self._grow(self._y, capacity, y_rows.shape[1])
+        
+        self._X[self._n:needed] = X_rows
+        self._y[self._n:needed] = y_rows
+        self._n = needed
+    
+    def _grow(self, array: np.ndarray, capacity: int, n_cols: int) -> np.ndarray:
+        grown = np.empty((capacity, n_cols), dtype=array.dtype)
+        grown[:self._n] = array[:self._n]
+        return grown
+
+
+class RunningStats:
+    """Frequências, janelas móveis de prepare_features e atrasos, atualizados em O(1) por sorteio"""
+    
+    def __init__(self, with_dates: bool = False):
+        self.n_draws = 0
+        self.number_counts = np.zeros(50, dtype=np.int64)
+        self.clover_counts = np.zeros(6, dtype=np.int64)
+        # Contagens dos últimos `window` sorteios (inclui o mais recente)
+        self.number_windows = {window: np.zeros(50, dtype=np.int64) for window in NUMBER_WINDOWS}
+        self.clover_windows = {window: np.zeros(6, dtype=np.int64) for window in CLOVER_WINDOWS}
+        # Índice do último sorteio com cada número/trevo (-1 = nunca saiu)
+        self.number_last_seen = np.full(50, -1, dtype=np.int64)
+        self.clover_last_seen = np.full(6, -1, dtype=np.int64)
+        
+        # Sorteios recentes necessários para tirar o mais antigo de cada janela
+        self._recent = deque(maxlen=max(NUMBER_WINDOWS + CLOVER_WINDOWS))
+        self._recent_sums = deque(maxlen=max(SOMA_LAGS))
+        self._sum_total = 0
+        self.with_dates = with_dates
+        self._first_date = None
+        # Features (1 x n_features) do último sorteio, como a última linha de prepare_features
+        self.last_features = None
+    
+    @classmethod
+    def from_store(cls, store) -> 'RunningStats':
+        """Inicializa de uma vez (vetorizado) a partir de um DrawStore"""
+        stats = cls(with_dates=store.dates is not None)
+        n = len(store)
+        if n == 0:
+            return stats
+        
+        # Todo o histórico menos o último sorteio em operações vetorizadas...
+        balls = store.balls[:n - 1].astype(np.intp) - 1
+        clovers = store.clovers[:n - 1].astype(np.intp) - 1
+        stats.n_draws = n - 1
+        stats.number_counts += np.bincount(balls.ravel(), minlength=50)
+        stats.clover_counts += np.bincount(clovers.ravel(), minlength=6)
+        for window, counts in stats.number_windows.items():
+            counts += np.bincount(balls[-window:].ravel(), minlength=50)
+        for window, counts in stats.clover_windows.items():
+            counts += np.bincount(clovers[-window:].ravel(), minlength=6)
+        
+        rows = np.arange(n - 1)
+        np.maximum.at(stats.number_last_seen, balls, rows[:, None])
+        np.maximum.at(stats.clover_last_seen, clovers, rows[:, None])
+        
+        stats._recent.extend(zip(balls[-stats._recent.maxlen:], clovers[-stats._recent.maxlen:]))
+        sums = store.balls[:n - 1].sum(axis=1, dtype=np.int64)
+        stats._recent_sums.extend(int(total) for total in sums[-stats._recent_sums.maxlen:])
+        stats._sum_total = int(sums.sum())
+        if stats.with_dates:
+            stats._first_date = pd.Timestamp(store.dates.min())
+        
+        # ... e o último pelo caminho incremental, que calcula as suas features
+        stats.update(store.balls[-1], store.clovers[-1], None if store.dates is None else store.dates[-1])
+        return stats
+    
+    def update(self, balls: Sequence[int], clovers: Sequence[int], date=None) -> np.ndarray:
+        """Acrescenta um sorteio e devolve as features dele (calculadas com os anteriores)"""
+        balls = np.asarray(balls, dtype=np.intp) - 1
+        clovers = np.asarray(clovers, dtype=np.intp) - 1
+        draw_sum = int(balls.sum()) + len(balls)
+        self.last_features = self._features(draw_sum, date)
+        
+        self.number_counts[balls] += 1
+        self.clover_counts[clovers] += 1
+        for window, counts in self.number_windows.items():
+            counts[balls] += 1
+            if len(self._recent) >= window:
+                counts[self._recent[-window][0]] -= 1
+        for window, counts in self.clover_windows.items():
+            counts[clovers] += 1
+            if len(self._recent) >= window:
+                counts[self._recent[-window][1]] -= 1
+        
+        self.number_last_seen[balls] = self.n_draws
+        self.clover_last_seen[clovers] = self.n_draws
+        self._recent.append((balls, clovers))
+        self._recent_sums.append(draw_sum)
+        self._sum_total += draw_sum
+        self.n_draws += 1
+        return self.last_features
+    
+    def _features(self, draw_sum: int, date) -> np.ndarray:
+        """Linha de features de um sorteio novo, na ordem de MilionariaPredictor._assemble_features"""
+        features = []
+        for window, counts in self.number_windows.items():
+            features.append(counts / min(window, self.n_draws) if self.n_draws else np.zeros(50))
+        for window, counts in self.clover_windows.items():
+            features.append(counts / min(window, self.n_draws) if self.n_draws else np.zeros(6))
+        
+        if self.with_dates:
+            date = pd.Timestamp(date)
+            if self._first_date is None or date < self._first_date:
+                self._first_date = date
+            features.append([date.month, date.dayofweek, (date - self._first_date).days])
+        
+        # Lags da soma; sem sorteio anterior, usa a média (como o fillna do cálculo em lote)
+        mean_sum = (self._sum_total + draw_sum) / (self.n_draws + 1)
+        recent = list(self._recent_sums)
+        features.append([recent[-lag] if lag <= len(recent) else mean_sum for lag in SOMA_LAGS])
+        
+        return np.concatenate(features).astype(np.float64)[None, :]
+    
+    def window_frequencies(self, window: int, clovers: bool = False) -> np.ndarray:
+        """Frequência relativa de cada número (ou trevo) nos últimos `window` sorteios"""
+        counts = (self.clover_windows if clovers else self.number_windows)[window]
+        return counts / min(window, self.n_draws) if self.n_draws else np.zeros(len(counts))
+    
+    def gaps(self, clovers: bool = False) -> np.ndarray:
+        """Sorteios desde a última aparição de cada número (ou trevo); nunca sorteado = total"""
+        last_seen = self.clover_last_seen if clovers else self.number_last_seen
+        return np.where(last_seen >= 0, self.n_draws - 1 - last_seen, self.n_draws)
+    
+    def frequency_analysis(self) -> Dict[str, Dict[int, int]]:
+        """Frequências no mesmo formato de MilionariaDataLoader.get_frequency_analysis"""
+        return {
+            'numeros': {num + 1: int(freq) for num, freq in enumerate(self.number_counts) if freq > 0},
+            'trevos': {trevo + 1: int(freq) for trevo, freq in enumerate(self.clover_counts) if freq > 0}
+        }
@@ -0,0 +1,252 @@
+import contextlib
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from typing import Dict, List, Any, Optional, Callable, Tuple
+
+
+class _Span(contextlib.ContextDecorator):
+    """Span de tempo: context manager e decorator ao mesmo tempo"""
+    
+    def __init__(self, registry: Optional['PerfRegistry'], name: str, attrs: Dict[str, Any]):
+        # registry None: usa o registro corrente (da sessão/job) no momento em que o span começa
+        self.registry = registry
+        self.name = name
+        self.attrs = attrs
+    
+    def _recreate_cm(self):
+        # Como decorator, cada chamada ganha o seu próprio span
+        return _Span(self.registry, self.name, self.attrs)
+    
+    def __enter__(self):
+        self._active = self.registry or get_registry()
+        self._state = self._active._start(self.name)
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self._active._finish(self.name, self.attrs, self._state, failed=exc_type is not None)
+        return False
+
+
+# Spans guardados por registro: os mais antigos saem primeiro (o processo do app roda por dias)
+MAX_SPANS = 10_000
+
+# O tracemalloc vale para o processo inteiro e deixa tudo mais lento, inclusive as outras
+# sessões: só é ligado com o perfil de memória pedido explicitamente (variável de ambiente
+# MILIONARIA_PROFILE_MEMORY=1 ou enable_memory_profiling)
+_memory_profiling = os.environ.get('MILIONARIA_PROFILE_MEMORY') == '1'
+
+# Registros que pediram pico de memória: o tracemalloc só é parado quando nenhum o usa mais
+_memory_lock = threading.Lock()
+_memory_users = set()
+_memory_started = False
+
+
+def enable_memory_profiling(enabled: bool = True):
+    """Permite (ou não) que os registros liguem o tracemalloc com track_memory"""
+    global _memory_profiling
+    _memory_profiling = enabled
+
+
+def memory_profiling_enabled() -> bool:
+    """Se o perfil de memória foi pedido para este processo"""
+    return _memory_profiling
+
+
+class PerfRegistry:
+    """Registro em memória (thread-safe) de spans de tempo e contadores"""
+    
+    def __init__(self, enabled: bool = True, track_memory: bool = False, max_spans: int = MAX_SPANS):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.max_spans = max_spans
+        self._spans = deque(maxlen=max_spans)
+        self._counters = {}
+        self.memory = False
+        self.track_memory(track_memory)
+    
+    def track_memory(self, enabled: bool = True):
+        """Liga/desliga o pico de memória nos spans deste registro (só com o perfil de memória do processo)"""
+        global _memory_started
+        enabled = enabled and _memory_profiling
+        self.memory = enabled
+        with _memory_lock:
+            if enabled:
+                _memory_users.add(id(self))
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start()
+                    _memory_started = True
+            else:
+                _memory_users.discard(id(self))
+                if not _memory_users and _memory_started:
+                    tracemalloc.stop()
+                    _memory_started = False
+    
+    def timed(self, name: str, **attrs) -> _Span:
+        """Mede tempo de parede, CPU da thread e (opcional) pico de memória de um trecho"""
+        return _Span(self, name, attrs)
+    
+    def increment(self, name: str, value: int = 1):
+        """Soma `value` ao contador `name`"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+    
+    def _start(self, name: str) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+        
+        state = {'wall': time.perf_counter(), 'cpu': time.thread_time(), 'started': time.time()}
+        if self.memory and tracemalloc.is_tracing():
+            # O pico do tracemalloc é global: guarda o do span externo antes de zerar
+            stack = self._memory_stack()
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1]['peak'] = max(stack[-1]['peak'], peak)
+            tracemalloc.reset_peak()
+            state['memory'] = {'base': current, 'peak': current}
+            stack.append(state['memory'])
+        return state
+    
+    def _finish(self, name: str, attrs: Dict[str, Any], state: Optional[Dict[str, Any]], failed: bool = False):
+        if state is None:
+            return
+        
+        span = {
+            'nome': name,
+            'inicio': state['started'],
+            'wall_s': time.perf_counter() - state['wall'],
+            'cpu_s': time.thread_time() - state['cpu'],
+            'thread': threading.current_thread().name,
+            'erro': failed,
+            **attrs
+        }
+        
+        memory = state.get('memory')
+        if memory is not None and tracemalloc.is_tracing():
+            stack = self._memory_stack()
+            peak = max(memory['peak'], tracemalloc.get_traced_memory()[1])
+            span['pico_memoria_bytes'] = peak - memory['base']
+            if stack and stack[-1] is memory:
+                stack.pop()
+            # O span externo herda o pico deste
+            if stack:
+                stack[-1]['peak'] = max(stack[-1]['peak'], peak)
+        
+        with self._lock:
+            self._spans.append(span)
+    
+    def _memory_stack(self) -> List[Dict[str, int]]:
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+    
+    def spans(self, name: str = None) -> List[Dict[str, Any]]:
+        """Cópia dos spans registrados (opcionalmente só os de um nome)"""
+        with self._lock:
+            return [dict(span) for span in self._spans if name is None or span['nome'] == name]
+    
+    def counters(self) -> Dict[str, int]:
+        """Cópia dos contadores"""
+        with self._lock:
+            return dict(self._counters)
+    
+    def summary(self) -> List[Dict[str, Any]]:
+        """Agrega os spans por nome: chamadas, tempo total/máximo, CPU e pico de memória"""
+        totals = {}
+        for span in self.spans():
+            entry = totals.setdefault(span['nome'], {
+                'nome': span['nome'], 'chamadas': 0, 'wall_total_s': 0.0,
+                'wall_max_s': 0.0, 'cpu_total_s': 0.0, 'pico_memoria_bytes': None
+            })
+            entry['chamadas'] += 1
+            entry['wall_total_s'] += span['wall_s']
+            entry['wall_max_s'] = max(entry['wall_max_s'], span['wall_s'])
+            entry['cpu_total_s'] += span['cpu_s']
+            if 'pico_memoria_bytes' in span:
+                entry['pico_memoria_bytes'] = max(entry['pico_memoria_bytes'] or 0, span['pico_memoria_bytes'])
+        
+        return sorted(totals.values(), key=lambda entry: entry['wall_total_s'], reverse=True)
+    
+    def export_jsonl(self, filepath: str):
+        """Acrescenta os spans (um JSON por linha) e os contadores ao arquivo"""
+        with open(filepath, 'a', encoding='utf-8') as f:
+            for span in self.spans():
+                f.write(json.dumps(span, ensure_ascii=False, default=str) + '\n')
+            f.write(json.dumps({'contadores': self.counters()}, ensure_ascii=False) + '\n')
+    
+    def export(self) -> Dict[str, Any]:
+        """Spans e contadores num dict serializável (ex.: para devolver de um processo do loky)"""
+        return {'spans': self.spans(), 'contadores': self.counters()}
+    
+    def merge(self, exported: Dict[str, Any]):
+        """Acrescenta os spans e soma os contadores de outro registro (ver export)"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._spans.extend(exported['spans'])
+            for name, value in exported['contadores'].items():
+                self._counters[name] = self._counters.get(name, 0) + value
+    
+    def clear(self):
+        """Descarta spans e contadores (ex.: no início de cada execução do app)"""
+        with self._lock:
+            self._spans = deque(maxlen=self.max_spans)
+            self._counters = {}
+
+
+# Registro padrão do processo (CLI, benchmarks); o app e os jobs usam um registro por sessão
+_registry = PerfRegistry()
+_current = contextvars.ContextVar('perf_registry', default=None)
+
+
+def get_registry() -> PerfRegistry:
+    """Registro corrente: o ativado por use_registry neste contexto ou o padrão do processo"""
+    return _current.get() or _registry
+
+
+@contextlib.contextmanager
+def use_registry(registry: PerfRegistry):
+    """Direciona timed/increment deste contexto (thread) para `registry`"""
+    token = _current.set(registry)
+    try:
+        yield registry
+    finally:
+        _current.reset(token)
+
+
+def bind_registry(func: Callable) -> Callable:
+    """func que roda com o registro corrente de quem a criou (para pools de threads)"""
+    registry = get_registry()
+    
+    @functools.wraps(func)
+    def bound(*args, **kwargs):
+        with use_registry(registry):
+            return func(*args, **kwargs)
+    return bound
+
+
+def run_collecting(func: Callable, *args, **kwargs) -> Tuple[Any, Dict[str, Any]]:
+    """Executa func num registro próprio e devolve (resultado, spans e contadores)"""
+    # Para tarefas em processos do loky: o pai junta os spans com get_registry().merge(...)
+    registry = PerfRegistry()
+    with use_registry(registry):
+        result = func(*args, **kwargs)
+    return result, registry.export()
+
+
+def timed(name: str, **attrs) -> _Span:
+    """Span no registro corrente: `with timed('etapa'):` ou `@timed('etapa')`"""
+    return _Span(None, name, attrs)
+
+
+def increment(name: str, value: int = 1):
+    """Incrementa um contador do registro corrente"""
+    get_registry().increment(name, value)
@@ -0,0 +1,202 @@
+import json
+import math
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Callable, Optional
+from ml_models import MilionariaPredictor, TRAIN_STEPS
+from instrumentation import timed, increment, bind_registry
+
+STATUS_PENDING = 'pendente'
+STATUS_RUNNING = 'executando'
+STATUS_DONE = 'concluido'
+STATUS_ERROR = 'erro'
+
+# Tipos de job curtos (predição, comparação, bilhetes): fila própria, para não esperar atrás
+# de treinos e backtests longos de outras sessões
+QUICK_KINDS = ('predicao', 'comparacao', 'bilhetes')
+
+
+class Job:
+    """Tarefa executada em segundo plano, com progresso por (modelo, posição)"""
+    
+    def __init__(self, job_id: str, kind: str, data_hash: str, params: Dict[str, Any], total_steps: int):
+        self.id = job_id
+        self.kind = kind
+        self.data_hash = data_hash
+        self.params = params
+        self.status = STATUS_PENDING
+        self.total_steps = max(1, total_steps)
+        self.done_steps = 0
+        self.events = []
+        self.result = None
+        self.error = None
+        # Sessões que usam este job (o mesmo job é reaproveitado por quem pedir o mesmo trabalho)
+        self.owners = set()
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+    
+    def advance(self, info: Dict[str, Any]):
+        """Callback de progresso do preditor: soma os passos concluídos e guarda o evento"""
+        with self._lock:
+            self.done_steps = min(self.total_steps, self.done_steps + info.get('passos', 1))
+            self.events.append({**info, 'tempo_s': time.time() - (self.started_at or self.created_at)})
+    
+    @property
+    def finished(self) -> bool:
+        return self.status in (STATUS_DONE, STATUS_ERROR)
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Estado atual do job para exibição (cópia, segura para ler de outra thread)"""
+        with self._lock:
+            end = self.finished_at or time.time()
+            return {
+                'id': self.id,
+                'tipo': self.kind,
+                'status': self.status,
+                'progresso': 1.0 if self.status == STATUS_DONE else self.done_steps / self.total_steps,
+                'passos': self.done_steps,
+                'total_passos': self.total_steps,
+                'ultimo_evento': self.events[-1] if self.events else None,
+                'erro': self.error,
+                'duracao_s': end - self.started_at if self.started_at else 0.0
+            }
+
+
+class JobManager:
+    """Executor de treino/backtest fora da execução do script, com tabela de jobs"""
+    
+    def __init__(self, max_workers: int = 1, quick_workers: int = 1):
+        # Threads: o resultado (preditor treinado) fica no processo do app, sem serialização.
+        # Duas filas: treinos/backtests (max_workers) e jobs curtos de QUICK_KINDS (quick_workers)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='milionaria-job')
+        self._quick_executor = ThreadPoolExecutor(max_workers=quick_workers, thread_name_prefix='milionaria-job-rapido')
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._by_key = {}
+    
+    def submit(self, kind: str, data_hash: str, params: Dict[str, Any], total_steps: int,
+               func: Callable[[Job], Any], reuse_finished: bool = True, owner: str = None) -> Job:
+        """Agenda func(job) em segundo plano, ou devolve o job equivalente já existente; owner = sessão"""
+        # Mesmo tipo, hash dos dados e parâmetros: reaproveita enquanto roda (nada em dobro)
+        # e, se reuse_finished, também depois de concluído
+        key = (kind, data_hash, json.dumps(params, sort_keys=True, default=str))
+        with self._lock:
+            existing = self._jobs.get(self._by_key.get(key))
+            if existing is not None and existing.status != STATUS_ERROR and (
+                    reuse_finished or not existing.finished):
+                existing.owners.add(owner)
+                increment('jobs_reaproveitados')
+                return existing
+            
+            job = Job(uuid.uuid4().hex[:12], kind, data_hash, params, total_steps)
+            job.owners.add(owner)
+            self._jobs[job.id] = job
+            self._by_key[key] = job.id
+        
+        increment('jobs_submetidos')
+        # Os spans do job vão para o registro de quem o submeteu (a sessão do app)
+        executor = self._quick_executor if kind in QUICK_KINDS else self._executor
+        executor.submit(bind_registry(self._run), job, func)
+        return job
+    
+    def _run(self, job: Job, func: Callable[[Job], Any]):
+        job.started_at = time.time()
+        job.status = STATUS_RUNNING
+        try:
+            with timed('job', tipo=job.kind):
+                job.result = func(job)
+            job.status = STATUS_DONE
+        except Exception as e:
+            print(f"Erro no job {job.kind} ({job.id}): {e}")
+            job.error = str(e)
+            job.status = STATUS_ERROR
+        finally:
+            job.finished_at = time.time()
+    
+    def submit_training(self, data, data_hash: str, model_names: List[str] = None, n_jobs: int = -1,
+                        owner: str = None) -> Job:
+        """Treina os modelos em segundo plano; resultado: {'resultados', 'preditor'}"""
+        if model_names is None:
+            model_names = list(MilionariaPredictor().models)
+        
+        def run(job: Job) -> Dict[str, Any]:
+            predictor = MilionariaPredictor(n_jobs=n_jobs)
+            predictor.progress_callback = job.advance
+            results = predictor.train_models(data, model_names=model_names)
+            predictor.progress_callback = None
+            return {'resultados': results, 'preditor': predictor}
+        
+        # n_jobs não muda o resultado, então fica fora da chave de reaproveitamento
+        return self.submit('treino', data_hash, {'modelos': model_names}, TRAIN_STEPS * len(model_names), run,
+                           owner=owner)
+    
+    def submit_backtest(self, data, data_hash: str, test_size: int = 20, walk_forward: bool = False,
+                        step: int = 5, window: Optional[int] = None, model_names: List[str] = None,
+                        n_jobs: int = -1, owner: str = None) -> Job:
+        """Backtest (treino único ou walk-forward) em segundo plano; resultado: o dict do backtest"""
+        if model_names is None:
+            model_names = list(MilionariaPredictor().models)
+        
+        def run(job: Job) -> Dict[str, Any]:
+            predictor = MilionariaPredictor(n_jobs=n_jobs)
+            predictor.progress_callback = job.advance
+            if walk_forward:
+                return predictor.backtest_walk_forward(data, test_size, step=step, window=window,
+                                                       model_names=model_names)
+            return predictor.backtest(data, test_size, model_names)
+        
+        params = {'modelos': model_names, 'test_size': test_size, 'walk_forward': walk_forward}
+        # Treino único: holdout + reajuste; walk-forward: um ajuste por fold
+        total_steps = TRAIN_STEPS * len(model_names)
+        if walk_forward:
+            params.update(step=step, window=window)
+            total_steps = 6 * len(model_names) * math.ceil(test_size / step)
+        return self.submit('backtest', data_hash, params, total_steps, run, owner=owner)
+    
+    def get(self, job_id: Optional[str]) -> Optional[Job]:
+        """Job pelo id (None se não existir ou tiver sido descartado)"""
+        with self._lock:
+            return self._jobs.get(job_id)
+    
+    def jobs(self, data_hash: str = None) -> List[Job]:
+        """Tabela de jobs, do mais recente ao mais antigo (opcionalmente só de um hash de dados)"""
+        with self._lock:
+            jobs = [job for job in self._jobs.values() if data_hash is None or job.data_hash == data_hash]
+        return sorted(jobs, key=lambda job: job.created_at, reverse=True)
+    
+    def evict(self, data_hash: str = None, owner: str = None):
+        """Descarta jobs concluídos de outros dados (todos, se data_hash for None); os em execução ficam"""
+        # Com owner, só a sessão deixa de usar os jobs: o job sai quando nenhuma sessão o usa mais
+        with self._lock:
+            indexed = {job_id: key for key, job_id in self._by_key.items()}
+            for job_id, job in list(self._jobs.items()):
+                # Jobs substituídos (ex.: nova tentativa após erro) já não têm chave: saem com qualquer hash
+                if not job.finished or (job_id in indexed and data_hash is not None and job.data_hash == data_hash):
+                    continue
+                if owner is not None:
+                    job.owners.discard(owner)
+                    if job.owners:
+                        continue
+                if job_id in indexed:
+                    del self._by_key[indexed[job_id]]
+                del self._jobs[job_id]
+    
+    def release(self, job_id: str, owner: str):
+        """A sessão já leu o resultado: deixa de usar o job (substituído e sem sessões = descartado)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or not job.finished:
+                return
+            job.owners.discard(owner)
+            # Os que ainda têm chave ficam para reaproveitamento até o próximo evict
+            if not job.owners and job_id not in self._by_key.values():
+                del self._jobs[job_id]
+    
+    def shutdown(self, wait: bool = True):
+        """Encerra os pools de threads"""
+        self._executor.shutdown(wait=wait)
+        self._quick_executor.shutdown(wait=wait)
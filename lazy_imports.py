@@ -0,0 +1,46 @@
+import importlib
+import sys
+import threading
+from instrumentation import timed, increment
+
+
+class LazyModule:
+    """Módulo importado só no primeiro acesso a um atributo (ex.: xgb = LazyModule('xgboost'))"""
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._import()
+        return self._module
+
+    def _import(self):
+        if self._name in sys.modules:
+            # import_module espera o fim de um import em andamento noutra thread;
+            # sys.modules sozinho pode devolver o módulo ainda parcialmente inicializado
+            self._module = importlib.import_module(self._name)
+            return
+        with timed('lazy_import', modulo=self._name):
+            self._module = importlib.import_module(self._name)
+        increment('imports_preguicosos')
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+    @property
+    def loaded(self) -> bool:
+        """Se o módulo já foi importado (por este proxy ou por outro caminho)"""
+        return self._module is not None or self._name in sys.modules
+
+    def isinstance_of(self, obj, class_name: str) -> bool:
+        """isinstance sem forçar o import: se o módulo nunca foi importado, obj não pode ser da classe"""
+        return self.loaded and isinstance(obj, getattr(self._load(), class_name))
+
+    def __repr__(self) -> str:
+        state = 'carregado' if self.loaded else 'não carregado'
+        return f"<LazyModule {self._name} ({state})>"
@@ -1,85 +1,191 @@
 import numpy as np
 import pandas as pd
-from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
-from sklearn.linear_model import LinearRegression
-from sklearn.preprocessing import StandardScaler
-from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.metrics import mean_absolute_error, mean_squared_error
-import xgboost as xgb
-import lightgbm as lgb
-from typing import Tuple, List, Dict, Any
+from collections.abc import MutableMapping
+from functools import partial
+from typing import Tuple, List, Dict, Any, Union, Callable
 import joblib
+from joblib import Parallel, delayed
+from threadpoolctl import threadpool_limits
 import os
+import json
+import time
+from feature_engine import rolling_frequencies, FeatureStore, RunningStats
+from draw_store import DrawStore
+from scoring import encode_numbers, popcount
+from instrumentation import timed, increment, get_registry, bind_registry, run_collecting
+from lazy_imports import LazyModule
+from validation import time_series_splits
+
+# Bibliotecas pesadas: cada uma só é importada quando a sua família é usada
+ensemble = LazyModule('sklearn.ensemble')
+linear_model = LazyModule('sklearn.linear_model')
+preprocessing = LazyModule('sklearn.preprocessing')
+metrics = LazyModule('sklearn.metrics')
+xgb = LazyModule('xgboost')
+lgb = LazyModule('lightgbm')
+
+# Classe de cada família (instanciar importa a biblioteca)
+MODEL_CLASSES = {
+    'random_forest': (ensemble, 'RandomForestRegressor'),
+    'gradient_boosting': (ensemble, 'GradientBoostingRegressor'),
+    'xgboost': (xgb, 'XGBRegressor'),
+    'lightgbm': (lgb, 'LGBMRegressor'),
+    'linear_regression': (linear_model, 'LinearRegression')
+}
+
+# Hiperparâmetros padrão; MilionariaPredictor(params=...) sobrescreve por família
+DEFAULT_PARAMS = {
+    'random_forest': {'n_estimators': 100, 'random_state': 42},
+    'gradient_boosting': {'n_estimators': 100, 'random_state': 42},
+    'xgboost': {'n_estimators': 100, 'random_state': 42},
+    'lightgbm': {'n_estimators': 100, 'random_state': 42, 'verbose': -1},
+    'linear_regression': {}
+}
+
+
+def build_model(model_name: str, params: Dict[str, Any] = None):
+    """Instancia o modelo-base de uma família com os padrões + params"""
+    if model_name not in MODEL_CLASSES:
+        raise ValueError(f"Modelo {model_name} desconhecido")
+    module, class_name = MODEL_CLASSES[model_name]
+    return getattr(module, class_name)(**{**DEFAULT_PARAMS[model_name], **(params or {})})
+
+
+# Versão do formato de artefato em diretório (manifest.json + um arquivo por posição)
+ARTIFACT_FORMAT = 2
+
+# Versão das features de prepare_features: entra na chave do registro, porque um modelo
+# treinado com outra matriz de features não serve para predizer
+FEATURE_VERSION = 2
+
+# Resultado de predict_batch: uma linha por (linha de features, modelo)
+PREDICTION_DTYPE = np.dtype([
+    ('linha', np.int64),
+    ('modelo', 'U32'),
+    ('numeros', np.uint8, (6,)),
+    ('trevos', np.uint8, (2,)),
+    ('confianca', np.float64)
+])
+
+# Passos de progresso de train_models por família: 6 posições no holdout + 6 no reajuste final
+TRAIN_STEPS = 12
+
+class _LazyModels(MutableMapping):
+    """Modelos-base por família, instanciados só no primeiro acesso"""
+    
+    def __init__(self, factories: Dict[str, Callable[[], Any]]):
+        self._factories = dict(factories)
+        self._models = {}
+    
+    def __getitem__(self, model_name: str):
+        if model_name not in self._models:
+            self._models[model_name] = self._factories[model_name]()
+        return self._models[model_name]
+    
+    def __setitem__(self, model_name: str, model):
+        self._models[model_name] = model
+        self._factories.setdefault(model_name, lambda: model)
+    
+    def __delitem__(self, model_name: str):
+        del self._factories[model_name]
+        self._models.pop(model_name, None)
+    
+    def __contains__(self, model_name) -> bool:
+        # Sem instanciar: pertencer à coleção não exige importar a biblioteca
+        return model_name in self._factories
+    
+    def __iter__(self):
+        return iter(self._factories)
+    
+    def __len__(self) -> int:
+        return len(self._factories)
+
+
+class _PositionModel:
+    """Posição de um estimador multi-saída treinado uma única vez"""
+    
+    def __init__(self, model, pos: int):
+        self.model = model
+        self.pos = pos
+    
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return self.model.predict(X)[:, self.pos]
+    
+    @property
+    def feature_importances_(self) -> np.ndarray:
+        return self.model.feature_importances_
+
+
+class _LightGBMBooster:
+    """Booster LightGBM com a mesma interface dos estimadores do scikit-learn"""
+    
+    def __init__(self, booster):
+        self.booster = booster
+    
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return self.booster.predict(X)
+    
+    @property
+    def feature_importances_(self) -> np.ndarray:
+        return self.booster.feature_importance(importance_type='split')
+
 
 class MilionariaPredictor:
     """Preditor de números da +Milionária usando Machine Learning"""
     
-    def __init__(self):
-        self.models = {
-            'random_forest': RandomForestRegressor(n_estimators=100, random_state=42),
-            'gradient_boosting': GradientBoostingRegressor(n_estimators=100, random_state=42),
-            'xgboost': xgb.XGBRegressor(n_estimators=100, random_state=42),
-            'lightgbm': lgb.LGBMRegressor(n_estimators=100, random_state=42, verbose=-1),
-            'linear_regression': LinearRegression()
-        }
+    def __init__(self, n_jobs: int = 1, multi_output: bool = False, params: Dict[str, Dict[str, Any]] = None):
+        # Hiperparâmetros por família que sobrescrevem DEFAULT_PARAMS (ex.: os melhores da busca)
+        self.params = {model_name: dict(values) for model_name, values in (params or {}).items()}
+        self.models = _LazyModels({
+            model_name: partial(build_model, model_name, self.params.get(model_name))
+            for model_name in MODEL_CLASSES
+        })
         self.scalers = {}
         self.trained_models = {}
         self.feature_importance = {}
-        
-    def prepare_features(self, data: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+        # Famílias de um artefato em diretório ainda não lidas do disco (carga preguiçosa)
+        self._pending_families = {}
+        # Tempo de carga (s) de cada família lida de um artefato
+        self.load_times = {}
+        # Orçamento de threads para o treinamento (-1 usa todos os núcleos)
+        self.n_jobs = n_jobs
+        # Treina cada família uma única vez para as 6 posições
+        self.multi_output = multi_output
+        # Chamado a cada (modelo, posição) treinado: progress_callback({'modelo', 'posicao', 'passos'})
+        self.progress_callback = None
+    
+    @timed('feature_build')
+    def prepare_features(self, data: Union[pd.DataFrame, DrawStore]) -> Tuple[np.ndarray, np.ndarray, List[str]]:
         """Prepara features para treinamento"""
+        # DataFrame passa pelo DrawStore: mesmas colunas (Num*/Bola*, Data/Data Sorteio) e as
+        # mesmas features de um store ou de RunningStats, então o modelo serve para os três
+        if not isinstance(data, DrawStore):
+            data = DrawStore.from_dataframe(data)
+        
+        # Matrizes indicadoras (n_sorteios x 50) e (n_sorteios x 6); target: os números sorteados
+        dates = pd.Series(data.dates) if data.dates is not None else None
+        return self._assemble_features(data.number_onehot(), data.clover_onehot(), dates,
+                                       pd.Series(data.sums()), data.balls.astype(np.int64))
+    
+    def _assemble_features(self, number_hot: np.ndarray, trevo_hot: np.ndarray, dates: pd.Series,
+                           soma: pd.Series, y: np.ndarray) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+        """Monta a matriz de features a partir das matrizes indicadoras"""
         # Features baseadas em estatísticas dos sorteios anteriores
         features = []
         feature_names = []
         
         # Features de frequência (últimos N sorteios)
         for window in [5, 10, 20]:
-            for num in range(1, 51):  # Números de 1 a 50
-                freq_col = f'freq_num_{num}_last_{window}'
-                feature_names.append(freq_col)
-                
-                freq_values = []
-                for i in range(len(data)):
-                    start_idx = max(0, i - window)
-                    window_data = data.iloc[start_idx:i]
-                    
-                    if len(window_data) == 0:
-                        freq_values.append(0)
-                    else:
-                        # Conta quantas vezes o número apareceu
-                        count = 0
-                        number_cols = [col for col in window_data.columns if 'Num' in col]
-                        for col in number_cols:
-                            count += (window_data[col] == num).sum()
-                        freq_values.append(count / len(window_data))
-                
-                features.append(freq_values)
+            feature_names.extend(f'freq_num_{num}_last_{window}' for num in range(1, 51))
+            features.extend(rolling_frequencies(number_hot, window).T)
         
         # Features de trevos
         for window in [5, 10]:
-            for trevo in range(1, 7):  # Trevos de 1 a 6
-                freq_col = f'freq_trevo_{trevo}_last_{window}'
-                feature_names.append(freq_col)
-                
-                freq_values = []
-                for i in range(len(data)):
-                    start_idx = max(0, i - window)
-                    window_data = data.iloc[start_idx:i]
-                    
-                    if len(window_data) == 0:
-                        freq_values.append(0)
-                    else:
-                        count = 0
-                        trevo_cols = [col for col in window_data.columns if 'Trevo' in col]
-                        for col in trevo_cols:
-                            count += (window_data[col] == trevo).sum()
-                        freq_values.append(count / len(window_data))
-                
-                features.append(freq_values)
+            feature_names.extend(f'freq_trevo_{trevo}_last_{window}' for trevo in range(1, 7))
+            features.extend(rolling_frequencies(trevo_hot, window).T)
         
         # Features temporais
-        if 'Data' in data.columns:
-            dates = pd.to_datetime(data['Data'])
+        if dates is not None:
             features.extend([
                 dates.dt.month.values,
                 dates.dt.dayofweek.values,
@@ -88,30 +194,38 @@ class MilionariaPredictor:
             feature_names.extend(['mes', 'dia_semana', 'dias_desde_inicio'])
         
         # Features de padrões dos últimos sorteios
-        if any('soma_numeros' in col for col in data.columns):
+        if soma is not None:
             for lag in [1, 2, 3]:
                 lag_col = f'soma_numeros_lag_{lag}'
                 feature_names.append(lag_col)
-                lag_values = data['soma_numeros'].shift(lag).fillna(data['soma_numeros'].mean()).values
+                lag_values = soma.shift(lag).fillna(soma.mean()).values
                 features.append(lag_values)
         
         X = np.array(features).T
-        
-        # Target: próximos números sorteados
-        number_cols = [col for col in data.columns if 'Num' in col][:6]
-        if number_cols:
-            y = data[number_cols].values
-        else:
-            # Se não encontrar, usa as primeiras 6 colunas numéricas
-            numeric_cols = data.select_dtypes(include=[np.number]).columns.tolist()
-            if 'Concurso' in numeric_cols:
-                numeric_cols.remove('Concurso')
-            y = data[numeric_cols[:6]].values if len(numeric_cols) >= 6 else np.zeros((len(data), 6))
-        
         return X, y, feature_names
     
-    def train_models(self, data: pd.DataFrame) -> Dict[str, Any]:
-        """Treina todos os modelos"""
+    def build_feature_store(self, data: Union[pd.DataFrame, DrawStore]) -> FeatureStore:
+        """Calcula as features de todo o histórico uma única vez"""
+        X, y, feature_names = self.prepare_features(data)
+        return FeatureStore(X, y, feature_names)
+    
+    def extend_feature_store(self, store: FeatureStore, stats: RunningStats, draws: DrawStore) -> FeatureStore:
+        """Acrescenta ao store as linhas dos sorteios novos sem recalcular o histórico"""
+        for i in range(len(draws)):
+            date = None if draws.dates is None else draws.dates[i]
+            row = stats.update(draws.balls[i], draws.clovers[i], date)
+            store.append(row, draws.balls[i:i + 1].astype(np.int64))
+        return store
+    
+    @timed('train_models')
+    def train_models(self, data: Union[pd.DataFrame, DrawStore], model_names: List[str] = None) -> Dict[str, Any]:
+        """Treina todos os modelos (ou apenas os informados em model_names)"""
+        if model_names is None:
+            model_names = list(self.models)
+        for model_name in model_names:
+            if model_name not in self.models:
+                raise ValueError(f"Modelo {model_name} desconhecido")
+        
         X, y, feature_names = self.prepare_features(data)
         
         # Remove primeiras linhas que podem ter NaN devido aos lags
@@ -122,52 +236,31 @@ class MilionariaPredictor:
         if len(X) < 10:
             raise ValueError("Dados insuficientes para treinamento")
         
-        # Split dos dados
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=42
-        )
+        # Holdout temporal: os 20% sorteios mais recentes ficam para teste (sem embaralhar,
+        # nenhum sorteio futuro entra no treino)
+        n_test = int(np.ceil(0.2 * len(X)))
+        X_train, X_test, y_train, y_test = X[:-n_test], X[-n_test:], y[:-n_test], y[-n_test:]
+        
+        for model_name in model_names:
+            print(f"Treinando {model_name}...")
+        
+        all_predictions = self._fit_models(X_train, X_test, y_train, model_names)
+        
+        # As métricas ficam com o holdout; os modelos servidos são reajustados no histórico
+        # completo, para que os sorteios mais recentes também entrem no treino
+        self._fit_models(X, X[-1:], y, model_names)
         
         results = {}
         
-        for model_name, model in self.models.items():
-            print(f"Treinando {model_name}...")
-            
-            # Normalização para alguns modelos
-            if model_name in ['linear_regression']:
-                scaler = StandardScaler()
-                X_train_scaled = scaler.fit_transform(X_train)
-                X_test_scaled = scaler.transform(X_test)
-                self.scalers[model_name] = scaler
-            else:
-                X_train_scaled = X_train
-                X_test_scaled = X_test
-            
-            # Treina modelo para cada posição (1-6 números)
-            model_predictions = []
-            position_models = []
-            
-            for pos in range(6):
-                try:
-                    pos_model = self._clone_model(model)
-                    pos_model.fit(X_train_scaled, y_train[:, pos])
-                    position_models.append(pos_model)
-                    
-                    # Predição
-                    pred = pos_model.predict(X_test_scaled)
-                    model_predictions.append(pred)
-                    
-                except Exception as e:
-                    print(f"Erro ao treinar {model_name} posição {pos}: {e}")
-                    position_models.append(None)
-                    model_predictions.append(np.zeros(len(X_test_scaled)))
-            
-            self.trained_models[model_name] = position_models
+        for model_name in model_names:
+            position_models = self.trained_models[model_name]
+            model_predictions = all_predictions[model_name]
             
             # Avaliação
             if model_predictions:
                 predictions = np.array(model_predictions).T
-                mae = mean_absolute_error(y_test, predictions)
-                mse = mean_squared_error(y_test, predictions)
+                mae = metrics.mean_absolute_error(y_test, predictions)
+                mse = metrics.mean_squared_error(y_test, predictions)
                 
                 results[model_name] = {
                     'mae': mae,
@@ -175,56 +268,263 @@ class MilionariaPredictor:
                     'rmse': np.sqrt(mse)
                 }
                 
-                # Feature importance para modelos tree-based
-                if hasattr(model, 'feature_importances_'):
+                # Feature importance para modelos tree-based (só existe após o fit)
+                fitted_models = [m for m in position_models if m is not None]
+                if fitted_models and hasattr(fitted_models[0], 'feature_importances_'):
                     avg_importance = np.mean([
-                        m.feature_importances_ for m in position_models if m is not None
+                        m.feature_importances_ for m in fitted_models
                     ], axis=0)
                     self.feature_importance[model_name] = dict(zip(feature_names, avg_importance))
         
         return results
     
-    def _clone_model(self, model):
-        """Clona um modelo"""
-        if isinstance(model, RandomForestRegressor):
-            return RandomForestRegressor(n_estimators=100, random_state=42)
-        elif isinstance(model, GradientBoostingRegressor):
-            return GradientBoostingRegressor(n_estimators=100, random_state=42)
-        elif isinstance(model, xgb.XGBRegressor):
-            return xgb.XGBRegressor(n_estimators=100, random_state=42)
-        elif isinstance(model, lgb.LGBMRegressor):
-            return lgb.LGBMRegressor(n_estimators=100, random_state=42, verbose=-1)
-        elif isinstance(model, LinearRegression):
-            return LinearRegression()
-        else:
+    def _fit_models(self, X_train: np.ndarray, X_test: np.ndarray, y_train: np.ndarray,
+                    model_names: List[str]) -> Dict[str, List[np.ndarray]]:
+        """Treina as famílias pedidas e devolve as predições de cada posição em X_test"""
+        # Normalização para alguns modelos
+        inputs = {}
+        for model_name in model_names:
+            if model_name in ['linear_regression']:
+                scaler = preprocessing.StandardScaler()
+                inputs[model_name] = (scaler.fit_transform(X_train), scaler.transform(X_test))
+                self.scalers[model_name] = scaler
+            else:
+                inputs[model_name] = (X_train, X_test)
+        
+        # Um job por (modelo, posição): 5 famílias x 6 posições independentes.
+        # No modo multi-saída cada família vira um único job, exceto GradientBoosting,
+        # que não aceita alvo multi-saída nem dataset binado e segue por posição.
+        jobs = []
+        for model_name in model_names:
+            if self.multi_output and not ensemble.isinstance_of(self.models[model_name], 'GradientBoostingRegressor'):
+                jobs.append((model_name, None))
+            else:
+                jobs.extend((model_name, pos) for pos in range(6))
+        n_workers, n_threads = self._thread_budget(len(jobs))
+        
+        # As threads do joblib não herdam o contexto: os spans de fit vão para o registro de quem chamou
+        fit_family, fit_position = bind_registry(self._fit_family), bind_registry(self._fit_position)
+        with threadpool_limits(limits=n_threads):
+            fitted = Parallel(n_jobs=n_workers, prefer='threads')(
+                delayed(fit_family)(model_name, *inputs[model_name], y_train, n_threads)
+                if pos is None else
+                delayed(fit_position)(
+                    model_name, pos, *inputs[model_name], y_train[:, pos], n_threads
+                )
+                for model_name, pos in jobs
+            )
+        fitted = dict(zip(jobs, fitted))
+        
+        predictions = {}
+        for model_name in model_names:
+            # Junta as posições na ordem 1-6, como no treino serial
+            if (model_name, None) in fitted:
+                position_models, predictions[model_name] = fitted[(model_name, None)]
+            else:
+                position_models = [fitted[(model_name, pos)][0] for pos in range(6)]
+                predictions[model_name] = [fitted[(model_name, pos)][1] for pos in range(6)]
+            
+            self.trained_models[model_name] = position_models
+            self._pending_families.pop(model_name, None)
+        
+        return predictions
+    
+    def _thread_budget(self, n_tasks: int) -> Tuple[int, int]:
+        """Divide os núcleos entre workers paralelos e threads de cada estimador"""
+        n_cores = os.cpu_count() or 1
+        budget = n_cores if self.n_jobs is None or self.n_jobs < 0 else max(1, self.n_jobs)
+        n_workers = max(1, min(budget, n_tasks))
+        # Cada estimador usa só a sua fatia, evitando workers x threads > núcleos
+        n_threads = max(1, budget // n_workers)
+        return n_workers, n_threads
+    
+    def _report_progress(self, **info):
+        """Repassa um evento de progresso ao callback, se houver"""
+        if self.progress_callback is not None:
+            self.progress_callback(info)
+    
+    def _fit_position(self, model_name: str, pos: int, X_train: np.ndarray, X_test: np.ndarray,
+                      y_train: np.ndarray, n_threads: int = 1) -> Tuple[Any, np.ndarray]:
+        """Treina o modelo de uma posição e prediz o conjunto de teste"""
+        try:
+            with timed('fit', modelo=model_name, posicao=pos + 1):
+                pos_model = self._clone_model(self.models[model_name], n_threads)
+                pos_model.fit(X_train, y_train)
+            increment('modelos_treinados')
+            
+            # Predição
+            return pos_model, pos_model.predict(X_test)
+        
+        except Exception as e:
+            print(f"Erro ao treinar {model_name} posição {pos}: {e}")
+            return None, np.zeros(len(X_test))
+        
+        finally:
+            self._report_progress(modelo=model_name, posicao=pos + 1, passos=1)
+    
+    def _fit_family(self, model_name: str, X_train: np.ndarray, X_test: np.ndarray,
+                    y_train: np.ndarray, n_threads: int = 1) -> Tuple[List[Any], List[np.ndarray]]:
+        """Treina as 6 posições de uma família compartilhando as estruturas de treino"""
+        model = self.models[model_name]
+        try:
+            if lgb.isinstance_of(model, 'LGBMRegressor'):
+                # Um único lgb.Dataset (bins calculados uma vez) para as 6 posições
+                with timed('fit', modelo=model_name, posicao='todas'):
+                    position_models = self._fit_lightgbm_shared(model, X_train, y_train, n_threads)
+                predictions = [m.predict(X_test) for m in position_models]
+            else:
+                # RandomForest, LinearRegression e XGBoost aceitam alvo (n x 6) nativamente
+                with timed('fit', modelo=model_name, posicao='todas'):
+                    shared = self._clone_model(model, n_threads)
+                    shared.fit(X_train, y_train)
+                position_models = [_PositionModel(shared, pos) for pos in range(6)]
+                predictions = list(shared.predict(X_test).T)
+            increment('modelos_treinados', 6)
+            
+            return position_models, predictions
+        
+        except Exception as e:
+            print(f"Erro ao treinar {model_name} (multi-saída): {e}")
+            return [None] * 6, [np.zeros(len(X_test)) for _ in range(6)]
+        
+        finally:
+            self._report_progress(modelo=model_name, posicao='todas', passos=6)
+    
+    def _fit_lightgbm_shared(self, model, X_train: np.ndarray, y_train: np.ndarray,
+                             n_threads: int = 1) -> List[Any]:
+        """Treina um booster LightGBM por posição sobre o mesmo Dataset binado"""
+        params = {
+            key: value for key, value in model.get_params().items()
+            if value is not None and key not in ('n_estimators', 'n_jobs', 'class_weight', 'importance_type')
+        }
+        params.setdefault('objective', 'regression')
+        params['num_threads'] = n_threads
+        
+        dataset = lgb.Dataset(X_train, label=y_train[:, 0], params=params, free_raw_data=False)
+        dataset.construct()
+        
+        position_models = []
+        for pos in range(6):
+            dataset.set_label(y_train[:, pos])
+            booster = lgb.train(params, dataset, num_boost_round=model.n_estimators)
+            position_models.append(_LightGBMBooster(booster))
+        return position_models
+    
+    def _clone_model(self, model, n_threads: int = None):
+        """Clona um modelo com os mesmos hiperparâmetros (sem o estado treinado)"""
+        # isinstance_of não importa bibliotecas de outras famílias só para comparar o tipo
+        if not any(module.isinstance_of(model, class_name) for module, class_name in MODEL_CLASSES.values()):
             return model
+        clone = type(model)(**model.get_params(deep=False))
+        
+        # Limita as threads internas dos estimadores que aceitam n_jobs
+        if n_threads is not None and 'n_jobs' in clone.get_params():
+            clone.set_params(n_jobs=n_threads)
+        return clone
     
-    def predict_next_draw(self, data: pd.DataFrame, model_name: str = 'random_forest') -> Dict[str, Any]:
+    def predict_next_draw(self, data: Union[pd.DataFrame, DrawStore, RunningStats],
+                          model_name: str = 'random_forest') -> Dict[str, Any]:
         """Prediz o próximo sorteio"""
+        self._ensure_loaded(model_name)
         if model_name not in self.trained_models:
             raise ValueError(f"Modelo {model_name} não foi treinado")
         
+        if isinstance(data, RunningStats):
+            # Features do último sorteio já mantidas de forma incremental (mesmas de um DrawStore)
+            return self._predict_from_features(data.last_features, model_name)
+        
         X, _, feature_names = self.prepare_features(data)
         
         # Usa o último registro para predição
         X_last = X[-1:].reshape(1, -1)
         
+        return self._predict_from_features(X_last, model_name)
+    
+    @timed('predict')
+    def _predict_from_features(self, X_last: np.ndarray, model_name: str) -> Dict[str, Any]:
+        """Prediz um sorteio a partir de uma linha de features já calculada"""
+        raw = self._raw_predictions(X_last, model_name)[0]
+        increment('predicoes')
+        numeros, trevos = self._finalize_prediction(raw)
+        
+        return {
+            'numeros': numeros,
+            'trevos': trevos,
+            'modelo_usado': model_name,
+            'confianca': self._calculate_confidence(model_name)
+        }
+    
+    @timed('predict_batch')
+    def predict_batch(self, data: Union[pd.DataFrame, DrawStore, FeatureStore], rows: List[int] = None,
+                      model_names: List[str] = None, rng: np.random.Generator = None) -> np.ndarray:
+        """Prediz várias linhas de features com vários modelos numa única chamada"""
+        # Aceita as features já calculadas (FeatureStore) para não refazê-las
+        store = data if isinstance(data, FeatureStore) else self.build_feature_store(data)
+        rows = np.array([len(store) - 1] if rows is None else rows, dtype=np.int64)
+        if model_names is None:
+            model_names = list(self.trained_models) + list(self._pending_families)
+        
+        X = store.X[rows]
+        result = np.zeros(len(rows) * len(model_names), dtype=PREDICTION_DTYPE)
+        
+        for m, model_name in enumerate(model_names):
+            # Um predict vetorizado por modelo de posição, para todas as linhas
+            raw = self._raw_predictions(X, model_name)
+            block = result[m * len(rows):(m + 1) * len(rows)]
+            block['linha'] = rows
+            block['modelo'] = model_name
+            block['confianca'] = self._calculate_confidence(model_name)
+            
+            # Arredondamento e desempate seguem a mesma regra da predição unitária
+            for i in range(len(rows)):
+                block['numeros'][i], block['trevos'][i] = self._finalize_prediction(raw[i], rng)
+        
+        increment('predicoes', len(result))
+        return result
+    
+    def _raw_predictions(self, X: np.ndarray, model_name: str) -> np.ndarray:
+        """Saída contínua (n x 6) dos modelos de posição; NaN onde o modelo falhou no treino"""
+        self._ensure_loaded(model_name)
+        if model_name not in self.trained_models:
+            raise ValueError(f"Modelo {model_name} não foi treinado")
+        
         # Aplica normalização se necessário
         if model_name in self.scalers:
-            X_last = self.scalers[model_name].transform(X_last)
+            X = self.scalers[model_name].transform(X)
+        
+        raw = np.full((len(X), 6), np.nan)
+        shared_outputs = {}
+        
+        for pos, pos_model in enumerate(self.trained_models[model_name]):
+            if pos_model is None:
+                continue
+            if isinstance(pos_model, _PositionModel):
+                # As 6 posições de um modelo multi-saída saem de um único predict
+                key = id(pos_model.model)
+                if key not in shared_outputs:
+                    shared_outputs[key] = pos_model.model.predict(X)
+                raw[:, pos] = shared_outputs[key][:, pos_model.pos]
+            else:
+                raw[:, pos] = pos_model.predict(X)
+        
+        return raw
+    
+    def _finalize_prediction(self, raw: np.ndarray, rng: np.random.Generator = None) -> Tuple[List[int], List[int]]:
+        """Converte a saída contínua de uma linha em 6 números únicos (1-50) e 2 trevos"""
+        # Desempate aleatório: gerador local se informado, senão o global do numpy
+        randint = np.random.randint if rng is None else rng.integers
+        choice = np.random.choice if rng is None else rng.choice
         
         # Predição para cada posição
         predictions = []
-        position_models = self.trained_models[model_name]
         
         for pos in range(6):
-            if position_models[pos] is not None:
-                pred = position_models[pos].predict(X_last)[0]
+            if not np.isnan(raw[pos]):
                 # Garante que está no range válido (1-50)
-                pred = max(1, min(50, round(pred)))
+                pred = max(1, min(50, round(raw[pos])))
                 predictions.append(pred)
             else:
-                predictions.append(np.random.randint(1, 51))
+                predictions.append(int(randint(1, 51)))
         
         # Remove duplicatas e garante 6 números únicos
         unique_predictions = []
@@ -234,19 +534,14 @@ class MilionariaPredictor:
         
         # Completa com números aleatórios se necessário
         while len(unique_predictions) < 6:
-            rand_num = np.random.randint(1, 51)
+            rand_num = int(randint(1, 51))
             if rand_num not in unique_predictions:
                 unique_predictions.append(rand_num)
         
         # Predição dos trevos (simplificada)
-        trevos = sorted(np.random.choice(range(1, 7), 2, replace=False))
+        trevos = sorted(choice(range(1, 7), 2, replace=False))
         
-        return {
-            'numeros': sorted(unique_predictions[:6]),
-            'trevos': trevos,
-            'modelo_usado': model_name,
-            'confianca': self._calculate_confidence(model_name)
-        }
+        return sorted(unique_predictions[:6]), trevos
     
     def _calculate_confidence(self, model_name: str) -> float:
         """Calcula confiança da predição (simplificado)"""
@@ -261,90 +556,407 @@ class MilionariaPredictor:
         return base_confidence.get(model_name, 0.50)
     
     def save_models(self, filepath: str):
-        """Salva os modelos treinados"""
-        model_data = {
-            'trained_models': self.trained_models,
-            'scalers': self.scalers,
-            'feature_importance': self.feature_importance
-        }
-        joblib.dump(model_data, filepath)
+        """Salva os modelos treinados (diretório com manifest.json; .joblib/.pkl = arquivo único legado)"""
+        if filepath.endswith(('.joblib', '.pkl')):
+            model_data = {
+                'trained_models': self.trained_models,
+                'scalers': self.scalers,
+                'feature_importance': self.feature_importance
+            }
+            joblib.dump(model_data, filepath)
+            print(f"Modelos salvos em {filepath}")
+            return
+        
+        self.load_pending()
+        
+        manifest = {'formato': ARTIFACT_FORMAT, 'familias': {}}
+        for model_name, position_models in self.trained_models.items():
+            family_dir = os.path.join(filepath, model_name)
+            os.makedirs(family_dir, exist_ok=True)
+            
+            # Um arquivo por posição; as posições de um modelo multi-saída dividem um arquivo
+            saved = {}
+            positions = []
+            for pos, pos_model in enumerate(position_models):
+                if pos_model is None:
+                    positions.append(None)
+                    continue
+                
+                estimator, column = pos_model, None
+                if isinstance(pos_model, _PositionModel):
+                    estimator, column = pos_model.model, pos_model.pos
+                if id(estimator) not in saved:
+                    name = 'multi_saida' if column is not None else f'posicao_{pos + 1}'
+                    saved[id(estimator)] = self._save_estimator(estimator, family_dir, name)
+                positions.append({**saved[id(estimator)], 'coluna': column})
+            
+            scaler_file = None
+            if model_name in self.scalers:
+                scaler_file = 'scaler.joblib'
+                joblib.dump(self.scalers[model_name], os.path.join(family_dir, scaler_file), compress=3)
+            
+            manifest['familias'][model_name] = {
+                'posicoes': positions,
+                'scaler': scaler_file,
+                'feature_importance': {
+                    name: float(value) for name, value in self.feature_importance.get(model_name, {}).items()
+                }
+            }
+        
+        # Manifest por último: um diretório sem ele é um artefato incompleto
+        os.makedirs(filepath, exist_ok=True)
+        manifest_path = os.path.join(filepath, 'manifest.json')
+        with open(f"{manifest_path}.tmp", 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(f"{manifest_path}.tmp", manifest_path)
         print(f"Modelos salvos em {filepath}")
     
-    def load_models(self, filepath: str):
-        """Carrega modelos salvos"""
-        if os.path.exists(filepath):
+    def _save_estimator(self, estimator, family_dir: str, name: str) -> Dict[str, str]:
+        """Salva um estimador no formato mais adequado e descreve o arquivo para o manifest"""
+        if xgb.isinstance_of(estimator, 'XGBRegressor'):
+            # Serialização nativa (UBJSON) do booster XGBoost
+            filename, kind = f'{name}.ubj', 'xgboost'
+            estimator.save_model(os.path.join(family_dir, filename))
+        elif isinstance(estimator, _LightGBMBooster) or lgb.isinstance_of(estimator, 'LGBMRegressor'):
+            # Modelo LightGBM em texto; carregado de volta como Booster
+            booster = estimator.booster if isinstance(estimator, _LightGBMBooster) else estimator.booster_
+            filename, kind = f'{name}.txt', 'lightgbm'
+            booster.save_model(os.path.join(family_dir, filename))
+        elif ensemble.isinstance_of(estimator, 'RandomForestRegressor'):
+            # Sem compressão para poder abrir os arrays das árvores com mmap_mode
+            filename, kind = f'{name}.joblib', 'joblib_mmap'
+            joblib.dump(estimator, os.path.join(family_dir, filename))
+        else:
+            filename, kind = f'{name}.joblib', 'joblib'
+            joblib.dump(estimator, os.path.join(family_dir, filename), compress=3)
+        return {'arquivo': filename, 'tipo': kind}
+    
+    def _load_estimator(self, path: str, kind: str):
+        """Lê um estimador salvo por _save_estimator"""
+        if kind == 'xgboost':
+            estimator = xgb.XGBRegressor()
+            estimator.load_model(path)
+            return estimator
+        if kind == 'lightgbm':
+            return _LightGBMBooster(lgb.Booster(model_file=path))
+        if kind == 'joblib_mmap':
+            return joblib.load(path, mmap_mode='r')
+        return joblib.load(path)
+    
+    def load_models(self, filepath: str, lazy: bool = False):
+        """Carrega modelos salvos (com lazy=True, cada família só é lida no primeiro uso)"""
+        if os.path.isdir(filepath):
+            with open(os.path.join(filepath, 'manifest.json'), encoding='utf-8') as f:
+                manifest = json.load(f)
+            
+            for model_name, entry in manifest['familias'].items():
+                self.trained_models.pop(model_name, None)
+                self._pending_families[model_name] = (filepath, entry)
+                if not lazy:
+                    self._ensure_loaded(model_name)
+            print(f"Modelos carregados de {filepath}")
+        elif os.path.exists(filepath):
+            # Formato legado: um único pickle com todas as famílias
+            start_time = time.perf_counter()
             model_data = joblib.load(filepath)
             self.trained_models = model_data.get('trained_models', {})
             self.scalers = model_data.get('scalers', {})
             self.feature_importance = model_data.get('feature_importance', {})
+            self.load_times = dict.fromkeys(self.trained_models, time.perf_counter() - start_time)
             print(f"Modelos carregados de {filepath}")
         else:
             print(f"Arquivo {filepath} não encontrado")
     
-    def backtest(self, data: pd.DataFrame, test_size: int = 20) -> Dict[str, Any]:
-        """Realiza backtesting dos modelos"""
+    def load_pending(self):
+        """Lê do disco todas as famílias ainda pendentes (o diretório do artefato deixa de ser usado)"""
+        for model_name in list(self._pending_families):
+            self._ensure_loaded(model_name)
+    
+    def _ensure_loaded(self, model_name: str):
+        """Lê do disco uma família ainda pendente do artefato"""
+        if model_name not in self._pending_families:
+            return
+        
+        artifact_dir, entry = self._pending_families.pop(model_name)
+        family_dir = os.path.join(artifact_dir, model_name)
+        start_time = time.perf_counter()
+        
+        with timed('load_family', modelo=model_name):
+            estimators = {}
+            position_models = []
+            for spec in entry['posicoes']:
+                if spec is None:
+                    position_models.append(None)
+                    continue
+                if spec['arquivo'] not in estimators:
+                    estimators[spec['arquivo']] = self._load_estimator(
+                        os.path.join(family_dir, spec['arquivo']), spec['tipo']
+                    )
+                estimator = estimators[spec['arquivo']]
+                position_models.append(estimator if spec['coluna'] is None else _PositionModel(estimator, spec['coluna']))
+            
+            self.trained_models[model_name] = position_models
+            if entry.get('scaler'):
+                self.scalers[model_name] = joblib.load(os.path.join(family_dir, entry['scaler']))
+            if entry.get('feature_importance'):
+                self.feature_importance[model_name] = entry['feature_importance']
+        
+        self.load_times[model_name] = time.perf_counter() - start_time
+    
+    @timed('backtest')
+    def backtest(self, data: Union[pd.DataFrame, DrawStore], test_size: int = 20,
+                 model_names: List[str] = None) -> Dict[str, Any]:
+        """Realiza backtesting dos modelos (todos ou apenas os informados em model_names)"""
         if len(data) < test_size + 10:
             raise ValueError("Dados insuficientes para backtesting")
+        if model_names is None:
+            model_names = list(self.models)
         
         # Separa dados de treino e teste
-        train_data = data.iloc[:-test_size]
-        test_data = data.iloc[-test_size:]
+        n_train = len(data) - test_size
+        train_data = data[:n_train] if isinstance(data, DrawStore) else data.iloc[:n_train]
         
         # Treina modelos com dados de treino
-        self.train_models(train_data)
+        self.train_models(train_data, model_names)
+        
+        # Features do histórico completo: cada passo lê a linha do prefixo
+        store = self.build_feature_store(data)
         
         results = {}
         
-        for model_name in self.trained_models.keys():
-            model_results = {
-                'acertos_totais': 0,
-                'acertos_por_sorteio': [],
-                'predicoes': []
-            }
+        # A linha i de features só usa sorteios anteriores a i e o treino liga X[i] a y[i]: o
+        # sorteio n_train + i é predito pela linha n_train + i, como em _run_fold (walk-forward)
+        rows = np.arange(n_train, n_train + test_size)
+        
+        # Só as famílias pedidas: um preditor reaproveitado pode ter outras treinadas antes
+        for model_name in model_names:
+            # Testa todos os sorteios de uma vez
+            predictions = {}
+            try:
+                batch = self.predict_batch(store, rows, [model_name])
+                predictions = dict(enumerate(batch['numeros'].tolist()))
+            except Exception as e:
+                print(f"Erro no backtesting {model_name}: {e}")
             
-            # Testa cada sorteio
-            for i in range(len(test_data)):
-                # Dados até o sorteio atual
-                current_data = pd.concat([train_data, test_data.iloc[:i]])
-                
-                if len(current_data) > 0:
-                    # Predição
-                    try:
-                        prediction = self.predict_next_draw(current_data, model_name)
-                        actual_numbers = test_data.iloc[i]
-                        
-                        # Extrai números reais
-                        number_cols = [col for col in actual_numbers.index if 'Num' in col]
-                        if not number_cols:
-                            numeric_cols = test_data.select_dtypes(include=[np.number]).columns.tolist()
-                            if 'Concurso' in numeric_cols:
-                                numeric_cols.remove('Concurso')
-                            number_cols = numeric_cols[:6]
-                        
-                        actual_nums = [actual_numbers[col] for col in number_cols[:6]]
-                        
-                        # Conta acertos
-                        acertos = len(set(prediction['numeros']) & set(actual_nums))
-                        model_results['acertos_totais'] += acertos
-                        model_results['acertos_por_sorteio'].append(acertos)
-                        model_results['predicoes'].append({
-                            'sorteio': i + 1,
-                            'predicao': prediction['numeros'],
-                            'real': actual_nums,
-                            'acertos': acertos
-                        })
-                        
-                    except Exception as e:
-                        print(f"Erro no backtesting {model_name}, sorteio {i}: {e}")
-                        model_results['acertos_por_sorteio'].append(0)
+            results[model_name] = self._score_backtest(predictions, store.y[n_train:])
+        
+        return results
+    
+    @timed('backtest_walk_forward')
+    def backtest_walk_forward(self, data: Union[pd.DataFrame, DrawStore], test_size: int = 20, step: int = 5,
+                              window: int = None, model_names: List[str] = None) -> Dict[str, Any]:
+        """Backtest walk-forward: retreina a cada `step` sorteios com janela expansível ou deslizante"""
+        if len(data) < test_size + 10:
+            raise ValueError("Dados insuficientes para backtesting")
+        if step < 1:
+            raise ValueError("O passo de retreino deve ser de pelo menos 1 sorteio")
+        if window is not None and window < 10:
+            raise ValueError("A janela deslizante deve ter pelo menos 10 sorteios")
+        if model_names is None:
+            model_names = list(self.models)
+        for model_name in model_names:
+            if model_name not in self.models:
+                raise ValueError(f"Modelo {model_name} desconhecido")
+        
+        # Matriz de features calculada uma vez e compartilhada por todos os folds
+        store = self.build_feature_store(data)
+        n_train = len(store) - test_size
+        
+        # Fold = (início do teste, fim do teste); o treino vai até o início do teste
+        folds = [(start, min(start + step, len(store))) for start in range(n_train, len(store), step)]
+        n_workers, n_threads = self._thread_budget(len(folds))
+        print(f"Walk-forward: {len(folds)} folds, {n_workers} processos")
+        
+        # Folds rodam em processos separados; arrays grandes vão por memmap (loky)
+        fold_predictor = MilionariaPredictor(n_jobs=n_threads, multi_output=self.multi_output, params=self.params)
+        # Gerador: cada fold concluído é reportado ao callback de progresso, em ordem; os spans
+        # medidos no processo do fold voltam junto com o resultado
+        fold_results = []
+        for k, (fold_result, fold_perf) in enumerate(Parallel(n_jobs=n_workers, backend='loky', return_as='generator')(
+            delayed(run_collecting)(
+                fold_predictor._run_fold,
+                store.X, store.y, 0 if window is None else max(0, start - window), start, end, model_names
+            )
+            for start, end in folds
+        )):
+            get_registry().merge(fold_perf)
+            fold_results.append(fold_result)
+            self._report_progress(fold=k + 1, total_folds=len(folds), passos=6 * len(model_names))
+        
+        results = {}
+        for model_name in model_names:
+            predictions = {}
+            for fold_result in fold_results:
+                predictions.update(fold_result['predicoes'][model_name])
             
-            # Estatísticas finais
-            if model_results['acertos_por_sorteio']:
-                model_results['media_acertos'] = np.mean(model_results['acertos_por_sorteio'])
-                model_results['max_acertos'] = max(model_results['acertos_por_sorteio'])
-                model_results['acertos_3_ou_mais'] = sum(1 for x in model_results['acertos_por_sorteio'] if x >= 3)
-                model_results['taxa_sucesso_3+'] = model_results['acertos_3_ou_mais'] / len(model_results['acertos_por_sorteio'])
+            results[model_name] = self._score_backtest(predictions, store.y[n_train:], offset=n_train)
             
-            results[model_name] = model_results
+            # Desempenho de cada fold (acertos deste modelo e tempo de parede do fold)
+            hits = results[model_name]['acertos_por_sorteio']
+            results[model_name]['folds'] = [
+                {
+                    'fold': k + 1,
+                    'inicio_treino': fold_result['inicio_treino'],
+                    'sorteios_treino': fold_result['sorteios_treino'],
+                    'sorteios_teste': end - start,
+                    'acertos': int(sum(hits[start - n_train:end - n_train])),
+                    'tempo_s': fold_result['tempo_s']
+                }
+                for k, ((start, end), fold_result) in enumerate(zip(folds, fold_results))
+            ]
+        
+        return results
+    
+    @timed('walk_forward_fold')
+    def _run_fold(self, X: np.ndarray, y: np.ndarray, train_start: int, test_start: int, test_end: int,
+                  model_names: List[str]) -> Dict[str, Any]:
+        """Treina em X[train_start:test_start] e prediz os sorteios test_start..test_end - 1"""
+        start_time = time.perf_counter()
+        increment('folds_walk_forward')
+        # Gerador local por fold: o resultado não depende da ordem/quantidade de processos e o
+        # estado global do numpy do chamador fica intacto quando o fold roda no mesmo processo
+        rng = np.random.default_rng(test_start)
+        
+        X_train, y_train = X[train_start:test_start], y[train_start:test_start]
+        valid_idx = ~np.isnan(X_train).any(axis=1)
+        fold_outputs = self._fit_models(X_train[valid_idx], X[test_start:test_end], y_train[valid_idx], model_names)
+        
+        # O fit já devolve a saída contínua das linhas de teste: só falta arredondar/desempatar,
+        # sem um segundo predict. Posições que falharam no treino ficam NaN, como em _raw_predictions
+        predictions = {}
+        rows = range(test_start, test_end)
+        for model_name in model_names:
+            raw = np.array(fold_outputs[model_name], dtype=np.float64).T
+            failed = [pos for pos, pos_model in enumerate(self.trained_models[model_name]) if pos_model is None]
+            raw[:, failed] = np.nan
+            predictions[model_name] = {
+                row: [int(number) for number in self._finalize_prediction(raw[i], rng)[0]]
+                for i, row in enumerate(rows)
+            }
+        increment('predicoes', len(rows) * len(model_names))
+        
+        return {
+            'predicoes': predictions,
+            'inicio_treino': train_start,
+            'sorteios_treino': int(valid_idx.sum()),
+            'tempo_s': time.perf_counter() - start_time
+        }
+    
+    @timed('cross_validate')
+    def cross_validate(self, data: Union[pd.DataFrame, DrawStore, FeatureStore], model_names: List[str] = None,
+                       n_splits: int = 5, scheme: str = 'expanding') -> Dict[str, Any]:
+        """Validação cruzada temporal: MAE/RMSE por fold e por posição, com folds em paralelo"""
+        if model_names is None:
+            model_names = list(self.models)
+        for model_name in model_names:
+            if model_name not in self.models:
+                raise ValueError(f"Modelo {model_name} desconhecido")
+        
+        # Uma matriz de features para todos os folds; cada fold lê fatias (views) dela
+        store = data if isinstance(data, FeatureStore) else self.build_feature_store(data)
+        folds = time_series_splits(len(store), n_splits, scheme)
+        n_workers, n_threads = self._thread_budget(len(folds))
+        print(f"Validação temporal ({scheme}): {len(folds)} folds, {n_workers} processos")
+        
+        fold_predictor = MilionariaPredictor(n_jobs=n_threads, multi_output=self.multi_output, params=self.params)
+        fold_results = []
+        for k, (fold_result, fold_perf) in enumerate(Parallel(n_jobs=n_workers, backend='loky', return_as='generator')(
+            delayed(run_collecting)(fold_predictor._run_cv_fold, store.X, store.y, *fold, model_names)
+            for fold in folds
+        )):
+            get_registry().merge(fold_perf)
+            fold_results.append(fold_result)
+            self._report_progress(fold=k + 1, total_folds=len(folds), passos=6 * len(model_names))
+        
+        results = {}
+        for model_name in model_names:
+            per_fold = [
+                {
+                    'fold': k + 1,
+                    'inicio_treino': train_start,
+                    'fim_treino': train_end,
+                    'sorteios_teste': test_end - train_end,
+                    **fold_result['metricas'][model_name],
+                    'tempo_s': fold_result['tempo_s']
+                }
+                for k, ((train_start, train_end, test_end), fold_result) in enumerate(zip(folds, fold_results))
+            ]
+            maes = [fold['mae'] for fold in per_fold]
+            results[model_name] = {
+                'esquema': scheme,
+                'mae': float(np.nanmean(maes)),
+                'mae_desvio': float(np.nanstd(maes)),
+                'rmse': float(np.nanmean([fold['rmse'] for fold in per_fold])),
+                'mae_por_posicao': np.nanmean([fold['mae_por_posicao'] for fold in per_fold], axis=0).tolist(),
+                'rmse_por_posicao': np.nanmean([fold['rmse_por_posicao'] for fold in per_fold], axis=0).tolist(),
+                'folds': per_fold
+            }
         
         return results
+    
+    @timed('cv_fold')
+    def _run_cv_fold(self, X: np.ndarray, y: np.ndarray, train_start: int, train_end: int, test_end: int,
+                     model_names: List[str]) -> Dict[str, Any]:
+        """Treina em X[train_start:train_end] e mede o erro de cada posição em X[train_end:test_end]"""
+        start_time = time.perf_counter()
+        increment('folds_validacao')
+        
+        # Fatias contíguas são views; só há cópia se for preciso descartar linhas com NaN
+        X_train, y_train = X[train_start:train_end], y[train_start:train_end]
+        valid_idx = ~np.isnan(X_train).any(axis=1)
+        if not valid_idx.all():
+            X_train, y_train = X_train[valid_idx], y_train[valid_idx]
+        y_test = y[train_end:test_end]
+        
+        predictions = self._fit_models(X_train, X[train_end:test_end], y_train, model_names)
+        
+        fold_metrics = {}
+        for model_name in model_names:
+            # Posições que falharam no treino ficam NaN em vez de contar o zero de preenchimento
+            errors = np.array(predictions[model_name], dtype=np.float64).T - y_test
+            for pos, pos_model in enumerate(self.trained_models[model_name]):
+                if pos_model is None:
+                    errors[:, pos] = np.nan
+            
+            fold_metrics[model_name] = {
+                'mae': float(np.nanmean(np.abs(errors))),
+                'rmse': float(np.sqrt(np.nanmean(errors ** 2))),
+                'mae_por_posicao': np.abs(errors).mean(axis=0).tolist(),
+                'rmse_por_posicao': np.sqrt((errors ** 2).mean(axis=0)).tolist()
+            }
+        
+        return {'metricas': fold_metrics, 'tempo_s': time.perf_counter() - start_time}
+    
+    def _score_backtest(self, predictions: Dict[int, List[int]], actual: np.ndarray, offset: int = 0) -> Dict[str, Any]:
+        """Conta os acertos de cada sorteio de teste e calcula as estatísticas do backtest"""
+        # Linhas sem predição (erro) ficam com máscara 0, ou seja, 0 acertos
+        predicted = np.zeros((len(actual), 6))
+        for i, numeros in predictions.items():
+            predicted[i - offset] = numeros
+        
+        # Conta acertos de todos os sorteios de uma vez: popcount(predição & real)
+        hits = popcount(encode_numbers(predicted) & encode_numbers(actual))
+        actual_nums = actual.tolist()
+        
+        model_results = {
+            'acertos_totais': int(hits.sum()),
+            'acertos_por_sorteio': hits.tolist(),
+            'predicoes': [
+                {
+                    'sorteio': i - offset + 1,
+                    'predicao': numeros,
+                    'real': actual_nums[i - offset],
+                    'acertos': int(hits[i - offset])
+                }
+                for i, numeros in predictions.items()
+            ]
+        }
+        
+        # Estatísticas finais
+        if model_results['acertos_por_sorteio']:
+            model_results['media_acertos'] = np.mean(model_results['acertos_por_sorteio'])
+            model_results['max_acertos'] = max(model_results['acertos_por_sorteio'])
+            model_results['acertos_3_ou_mais'] = sum(1 for x in model_results['acertos_por_sorteio'] if x >= 3)
+            model_results['taxa_sucesso_3+'] = model_results['acertos_3_ou_mais'] / len(model_results['acertos_por_sorteio'])
+        
+        return model_results
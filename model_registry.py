@@ -0,0 +1,268 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import uuid
+import weakref
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, List, Callable, Tuple
+from data_loader import CACHE_DIR
+from ml_models import MilionariaPredictor, FEATURE_VERSION
+
+# Melhores hiperparâmetros por família (escritos pela busca do tuning.py)
+BEST_PARAMS_FILE = 'best_params.json'
+
+
+def dataset_hash(data: pd.DataFrame) -> str:
+    """Hash do conteúdo de um DataFrame (valores, índice e colunas)"""
+    digest = hashlib.sha256()
+    digest.update(repr(list(data.columns)).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(data, index=True).values.tobytes())
+    return digest.hexdigest()
+
+
+class ModelRegistry:
+    """Registro persistente de modelos treinados, indexado por dados e configuração"""
+    
+    def __init__(self, cache_dir: str = os.path.join(CACHE_DIR, 'models'), n_jobs: int = -1,
+                 multi_output: bool = False, max_loaded: int = 16):
+        self.cache_dir = cache_dir
+        self.n_jobs = n_jobs
+        self.multi_output = multi_output
+        # Preditores em memória (LRU, no máximo max_loaded); o registro é compartilhado entre
+        # sessões e jobs, então _predictors e _artifacts só mudam juntos, sob o lock
+        self.max_loaded = max_loaded
+        self._lock = threading.Lock()
+        self._predictors = OrderedDict()
+        self._artifacts = {}
+        # Um lock por artefato: a fila de predições e a de treino não gravam o mesmo diretório juntas.
+        # Referências fracas: o lock some quando nenhuma thread o usa, e o dicionário não cresce
+        self._key_locks = weakref.WeakValueDictionary()
+        self._best = self._read_best_params()
+        # Modelos-base usados só para descrever a configuração de cada família
+        self._template = MilionariaPredictor(params=self.params)
+    
+    @property
+    def params(self) -> Dict[str, Dict[str, Any]]:
+        """Hiperparâmetros ajustados de cada família (as demais usam os padrões)"""
+        return {model_name: entry['params'] for model_name, entry in self._best.items()}
+    
+    def _read_best_params(self) -> Dict[str, Dict[str, Any]]:
+        """Lê o best_params.json do diretório do registro, se existir"""
+        path = os.path.join(self.cache_dir, BEST_PARAMS_FILE)
+        if not os.path.exists(path):
+            return {}
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    
+    def best_params(self) -> Dict[str, Dict[str, Any]]:
+        """Melhor configuração registrada por família: params, score e origem da busca"""
+        return {model_name: dict(entry) for model_name, entry in self._best.items()}
+    
+    def set_best_params(self, model_name: str, params: Dict[str, Any], score: float = None,
+                        details: Dict[str, Any] = None):
+        """Registra a melhor configuração de uma família; os próximos treinos passam a usá-la"""
+        if model_name not in self._template.models:
+            raise ValueError(f"Modelo {model_name} desconhecido")
+        
+        self._best[model_name] = {'params': dict(params), 'score': score, **(details or {})}
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = os.path.join(self.cache_dir, BEST_PARAMS_FILE)
+        with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+            json.dump(self._best, f, indent=2, sort_keys=True)
+        os.replace(f"{path}.tmp", path)
+        
+        # Nova configuração = nova chave de artefato; os preditores antigos continuam válidos
+        self._template = MilionariaPredictor(params=self.params)
+    
+    def model_config(self, model_name: str) -> Dict[str, Any]:
+        """Configuração que define um artefato treinado"""
+        if model_name not in self._template.models:
+            raise ValueError(f"Modelo {model_name} desconhecido")
+        
+        model = self._template.models[model_name]
+        params = model.get_params()
+        return {
+            'modelo': model_name,
+            'classe': type(model).__name__,
+            'params': {key: repr(value) for key, value in sorted(params.items()) if key != 'n_jobs'},
+            'multi_output': self.multi_output,
+            'features': FEATURE_VERSION
+        }
+    
+    def artifact_key(self, data_hash: str, model_name: str) -> str:
+        """Chave do artefato: hash dos dados + hash da configuração do modelo"""
+        config = json.dumps(self.model_config(model_name), sort_keys=True)
+        config_hash = hashlib.sha256(config.encode('utf-8')).hexdigest()
+        return f"{data_hash[:16]}_{model_name}_{config_hash[:12]}"
+    
+    def get_predictor(self, data: pd.DataFrame, model_name: str, data_hash: str = None,
+                      progress_callback: Callable[[Dict[str, Any]], None] = None) -> MilionariaPredictor:
+        """Retorna um preditor com o modelo treinado, treinando apenas se necessário"""
+        if data_hash is None:
+            data_hash = dataset_hash(data)
+        key = self.artifact_key(data_hash, model_name)
+        
+        # 1) Já carregado neste processo
+        predictor = self._loaded(key)
+        if predictor is not None:
+            return predictor
+        
+        with self._key_lock(key):
+            # Outra thread pode ter carregado/treinado enquanto esperávamos o lock
+            predictor = self._loaded(key)
+            if predictor is not None:
+                return predictor
+            return self._load_or_train(data, model_name, key, progress_callback)
+    
+    def _load_or_train(self, data: pd.DataFrame, model_name: str, key: str,
+                       progress_callback: Callable[[Dict[str, Any]], None] = None) -> MilionariaPredictor:
+        """Carrega o artefato do disco ou treina a família (com o lock do artefato)"""
+        predictor = MilionariaPredictor(n_jobs=self.n_jobs, multi_output=self.multi_output, params=self.params)
+        artifact_dir = os.path.join(self.cache_dir, key)
+        legacy_path = f"{artifact_dir}.joblib"
+        
+        if os.path.exists(os.path.join(artifact_dir, 'manifest.json')):
+            # 2) Artefato salvo em disco: a família só é lida no primeiro uso
+            predictor.load_models(artifact_dir, lazy=True)
+            origin = 'disco'
+        elif os.path.exists(legacy_path):
+            # 2b) Artefato no formato antigo (pickle único)
+            predictor.load_models(legacy_path)
+            artifact_dir, origin = legacy_path, 'disco (legado)'
+        else:
+            # 3) Treino preguiçoso, só do modelo pedido
+            return self._train(data, model_name, key, progress_callback)[0]
+        
+        self._remember(key, predictor, {'modelo': model_name, 'caminho': artifact_dir, 'origem': origin})
+        return predictor
+    
+    def _key_lock(self, key: str):
+        """Lock do artefato `key`"""
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.RLock())
+    
+    def _loaded(self, key: str) -> MilionariaPredictor:
+        """Preditor já carregado (marcado como usado agora) ou None"""
+        with self._lock:
+            predictor = self._predictors.get(key)
+            if predictor is not None:
+                self._predictors.move_to_end(key)
+            return predictor
+    
+    def _remember(self, key: str, predictor: MilionariaPredictor, info: Dict[str, Any]):
+        """Guarda preditor e artefato juntos; descarta da memória os menos usados além de max_loaded"""
+        with self._lock:
+            self._predictors[key] = predictor
+            self._predictors.move_to_end(key)
+            self._artifacts[key] = info
+            while len(self._predictors) > self.max_loaded:
+                old_key, _ = self._predictors.popitem(last=False)
+                self._artifacts.pop(old_key, None)
+    
+    def _train(self, data: pd.DataFrame, model_name: str, key: str,
+               progress_callback: Callable[[Dict[str, Any]], None] = None) -> Tuple[MilionariaPredictor, Dict[str, Any]]:
+        """Treina uma família, salva o artefato e o registra; devolve o preditor e as métricas"""
+        predictor = MilionariaPredictor(n_jobs=self.n_jobs, multi_output=self.multi_output, params=self.params)
+        artifact_dir = os.path.join(self.cache_dir, key)
+        
+        predictor.progress_callback = progress_callback
+        results = predictor.train_models(data, model_names=[model_name])
+        predictor.progress_callback = None
+        
+        # Grava num diretório temporário e troca de uma vez: o diretório do artefato nunca fica
+        # incompleto. O preditor em memória desta chave lê antes as famílias ainda pendentes,
+        # que apontam para os arquivos que vão ser substituídos.
+        suffix = uuid.uuid4().hex[:8]
+        tmp_dir = f"{artifact_dir}.tmp-{suffix}"
+        predictor.save_models(tmp_dir)
+        cached = self._loaded(key)
+        if cached is not None:
+            cached.load_pending()
+        if os.path.isdir(artifact_dir):
+            old_dir = f"{artifact_dir}.old-{suffix}"
+            os.replace(artifact_dir, old_dir)
+            os.replace(tmp_dir, artifact_dir)
+            shutil.rmtree(old_dir)
+        else:
+            os.replace(tmp_dir, artifact_dir)
+        
+        self._remember(key, predictor, {'modelo': model_name, 'caminho': artifact_dir, 'origem': 'treino'})
+        return predictor, results.get(model_name, {})
+    
+    def _has_artifact(self, key: str) -> bool:
+        """Se o artefato já está carregado ou salvo em disco (formato atual ou legado)"""
+        artifact_dir = os.path.join(self.cache_dir, key)
+        return (self._loaded(key) is not None or os.path.exists(os.path.join(artifact_dir, 'manifest.json'))
+                or os.path.exists(f"{artifact_dir}.joblib"))
+    
+    def train(self, data: pd.DataFrame, model_names: List[str], data_hash: str = None,
+              force: bool = False) -> Dict[str, Dict[str, Any]]:
+        """Garante um artefato por família (retreina com force=True) e devolve origem, caminho e métricas"""
+        if data_hash is None:
+            data_hash = dataset_hash(data)
+        
+        report = {}
+        for model_name in model_names:
+            key = self.artifact_key(data_hash, model_name)
+            with self._key_lock(key):
+                if force or not self._has_artifact(key):
+                    _, metrics = self._train(data, model_name, key)
+                else:
+                    self.get_predictor(data, model_name, data_hash)
+                    metrics = {}
+            with self._lock:
+                info = dict(self._artifacts.get(key, {}))
+            report[model_name] = {**info, 'metricas': metrics}
+        return report
+    
+    def evict(self, data_hash: str = None):
+        """Descarta da memória os preditores de outros dados (todos, se data_hash for None); o disco é mantido"""
+        prefix = None if data_hash is None else data_hash[:16]
+        with self._lock:
+            for key in [key for key in self._predictors if prefix is None or not key.startswith(prefix)]:
+                del self._predictors[key]
+                self._artifacts.pop(key, None)
+    
+    def artifact_info(self, data: pd.DataFrame, model_name: str, data_hash: str = None) -> Dict[str, Any]:
+        """Tamanho em disco e tempo de carga do artefato de um modelo já usado"""
+        if data_hash is None:
+            data_hash = dataset_hash(data)
+        key = self.artifact_key(data_hash, model_name)
+        with self._lock:
+            if key not in self._artifacts:
+                return {}
+            info = dict(self._artifacts[key])
+            predictor = self._predictors[key]
+        
+        path = info['caminho']
+        if os.path.isdir(path):
+            info['tamanho_bytes'] = sum(
+                os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names
+            )
+        else:
+            info['tamanho_bytes'] = os.path.getsize(path)
+        info['tempo_carga_s'] = predictor.load_times.get(model_name)
+        return info
+    
+    def predict(self, data: pd.DataFrame, model_name: str, data_hash: str = None,
+                progress_callback: Callable[[Dict[str, Any]], None] = None) -> Dict[str, Any]:
+        """Prediz o próximo sorteio usando o artefato do registro"""
+        predictor = self.get_predictor(data, model_name, data_hash, progress_callback)
+        return predictor.predict_next_draw(data, model_name)
+    
+    def predict_batch(self, data: pd.DataFrame, model_names: List[str], data_hash: str = None,
+                      rows: List[int] = None, progress_callback: Callable[[Dict[str, Any]], None] = None) -> np.ndarray:
+        """Prediz com vários modelos do registro, calculando as features uma única vez"""
+        if data_hash is None:
+            data_hash = dataset_hash(data)
+        store = self._template.build_feature_store(data)
+        
+        batches = [
+            self.get_predictor(data, model_name, data_hash, progress_callback).predict_batch(store, rows, [model_name])
+            for model_name in model_names
+        ]
+        return np.concatenate(batches)
@@ -0,0 +1,91 @@
+import numpy as np
+from math import comb
+from typing import Sequence, Union
+
+N_NUMBERS = 50
+N_BALLS = 6
+
+# Máscaras auxiliares da contagem de bits por SWAR (numpy sem bitwise_count)
+_M1 = np.uint64(0x5555555555555555)
+_M2 = np.uint64(0x3333333333333333)
+_M4 = np.uint64(0x0F0F0F0F0F0F0F0F)
+_H01 = np.uint64(0x0101010101010101)
+
+# _RANK_TABLE[k, c]: combinações lexicográficas que começam com valor < c
+# quando ainda faltam k + 1 bolas (usado por combination_rank)
+_RANK_TABLE = np.zeros((N_BALLS, N_NUMBERS + 2), dtype=np.int64)
+for _k in range(N_BALLS):
+    for _c in range(1, N_NUMBERS + 2):
+        _RANK_TABLE[_k, _c] = sum(comb(N_NUMBERS - v, _k) for v in range(1, _c))
+
+
+def encode_numbers(numbers: Union[np.ndarray, Sequence], n_values: int = N_NUMBERS) -> np.ndarray:
+    """Codifica cada linha de números (1..n_values) numa máscara uint64 (bit n - 1)"""
+    values = np.asarray(numbers, dtype=np.float64)
+    if values.ndim == 1:
+        values = values[None, :]
+    
+    # Valores fora do intervalo não acendem bit (como não casariam num conjunto)
+    valid = np.isfinite(values) & (values >= 1) & (values <= n_values) & (values == np.round(values))
+    shifts = np.where(valid, values - 1, 0).astype(np.uint64)
+    bits = np.where(valid, np.left_shift(np.uint64(1), shifts), np.uint64(0))
+    return np.bitwise_or.reduce(bits, axis=1)
+
+
+def popcount(masks: np.ndarray) -> np.ndarray:
+    """Quantidade de bits ligados em cada máscara uint64"""
+    masks = np.asarray(masks, dtype=np.uint64)
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(masks).astype(np.uint8)
+    
+    # Fallback SWAR para numpy < 2.0
+    x = masks - ((masks >> np.uint64(1)) & _M1)
+    x = (x & _M2) + ((x >> np.uint64(2)) & _M2)
+    x = (x + (x >> np.uint64(4))) & _M4
+    return ((x * _H01) >> np.uint64(56)).astype(np.uint8)
+
+
+def score_ticket(ticket: Union[np.ndarray, Sequence], draw_masks: np.ndarray) -> np.ndarray:
+    """Acertos de um bilhete contra todos os sorteios de uma vez"""
+    ticket_mask = encode_numbers(ticket)[0]
+    return popcount(np.asarray(draw_masks, dtype=np.uint64) & ticket_mask)
+
+
+def score_tickets(tickets: np.ndarray, draw_masks: np.ndarray, chunk_size: int = 4096) -> np.ndarray:
+    """Matriz de acertos (n_bilhetes x n_sorteios) para muitos bilhetes"""
+    ticket_masks = tickets if tickets.dtype == np.uint64 and tickets.ndim == 1 else encode_numbers(tickets)
+    draw_masks = np.asarray(draw_masks, dtype=np.uint64)
+    
+    hits = np.empty((len(ticket_masks), len(draw_masks)), dtype=np.uint8)
+    # Processa em blocos para limitar a matriz intermediária de uint64
+    for start in range(0, len(ticket_masks), chunk_size):
+        block = ticket_masks[start:start + chunk_size, None] & draw_masks[None, :]
+        hits[start:start + chunk_size] = popcount(block)
+    return hits
+
+
+def hit_distribution(hits: np.ndarray) -> np.ndarray:
+    """Quantidade de sorteios com 0..6 acertos (por bilhete, se hits for 2D)"""
+    hits = np.asarray(hits)
+    if hits.ndim == 1:
+        return np.bincount(hits, minlength=N_BALLS + 1)
+    
+    # Desloca cada linha em 7 posições para contar todas num único bincount
+    offsets = np.arange(len(hits))[:, None] * (N_BALLS + 1)
+    counts = np.bincount((hits + offsets).ravel(), minlength=len(hits) * (N_BALLS + 1))
+    return counts.reshape(len(hits), N_BALLS + 1)
+
+
+def combination_rank(tickets: np.ndarray) -> np.ndarray:
+    """Índice lexicográfico (0 .. C(50, 6) - 1) de bilhetes ordenados de 6 números"""
+    tickets = np.atleast_2d(np.asarray(tickets, dtype=np.int64))
+    previous = np.zeros(len(tickets), dtype=np.int64)
+    rank = np.zeros(len(tickets), dtype=np.int64)
+    
+    for i in range(N_BALLS):
+        k = N_BALLS - 1 - i
+        current = tickets[:, i]
+        # Combinações que começam com valores entre o anterior + 1 e o atual - 1
+        rank += _RANK_TABLE[k, current] - _RANK_TABLE[k, previous + 1]
+        previous = current
+    return rank
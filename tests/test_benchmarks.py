@@ -0,0 +1,14 @@
+import pytest
+
+from benchmarks import measure_import_time
+
+
+def test_import_time_of_a_project_module():
+    result = measure_import_time('draw_store')
+    assert result['segundos'] > 0
+
+
+def test_import_time_reports_missing_module_line():
+    # sys já vem carregado no interpretador: não aparece na saída do -X importtime
+    with pytest.raises(RuntimeError, match='não encontrado'):
+        measure_import_time('sys')
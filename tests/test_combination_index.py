@@ -0,0 +1,85 @@
+from itertools import combinations
+
+import numpy as np
+import pytest
+
+from combination_index import CombinationIndex, lex_combinations, chunk_start, QUERY_BLOCK
+from scoring import combination_rank
+from tickets import TicketConstraints
+
+# Universo pequeno (1-24): C(24, 6) = 134.596 linhas, mais de um bloco de consulta e 3 dezenas
+N_NUMBERS = 24
+
+
+@pytest.fixture(scope='module')
+def index(tmp_path_factory):
+    path = tmp_path_factory.mktemp('indice') / 'combinacoes'
+    return CombinationIndex.build(str(path), n_jobs=2, n_numbers=N_NUMBERS)
+
+
+@pytest.fixture(scope='module')
+def universe():
+    return list(combinations(range(1, N_NUMBERS + 1), 6))
+
+
+def brute_force_query(universe, constraints, contains=(), excludes=()):
+    """Posições das combinações que passam nos filtros, testando uma a uma"""
+    def inside(value, bounds):
+        return bounds is None or bounds[0] <= value <= bounds[1]
+    
+    ranks = []
+    for rank, balls in enumerate(universe):
+        decades = [sum(1 for ball in balls if 10 * i < ball <= 10 * (i + 1)) for i in range(5)]
+        if not (inside(sum(balls), constraints.soma) and inside(sum(ball % 2 == 0 for ball in balls), constraints.pares)
+                and inside(balls[-1] - balls[0], constraints.amplitude)
+                and all(inside(count, bounds) for count, bounds in zip(decades, constraints.dezenas or [None] * 5))):
+            continue
+        if all(number in balls for number in contains) and not any(number in balls for number in excludes):
+            ranks.append(rank)
+    return ranks
+
+
+@pytest.mark.parametrize('low, k, high', [(1, 6, 12), (3, 4, 15), (7, 1, 9), (1, 6, 6)])
+def test_lex_combinations_match_itertools(low, k, high):
+    expected = list(combinations(range(low, high + 1), k))
+    assert lex_combinations(low, k, high).tolist() == [list(combo) for combo in expected]
+
+
+def test_chunk_start_is_the_combination_rank():
+    firsts = np.arange(1, 46)
+    expected = combination_rank(firsts[:, None] + np.arange(6))
+    assert [chunk_start(int(first)) for first in firsts] == expected.tolist()
+
+
+def test_build_writes_every_combination_in_lex_order(index, universe):
+    assert len(index) == len(universe) > QUERY_BLOCK
+    assert index.combinations(np.arange(len(index))).tolist() == [list(balls) for balls in universe]
+    
+    balls = np.array(universe)
+    assert index.columns['soma_numeros'].tolist() == balls.sum(axis=1).tolist()
+    assert index.columns['amplitude'].tolist() == (balls[:, -1] - balls[:, 0]).tolist()
+    assert index.columns['dezena_3'].tolist() == ((balls > 20) & (balls <= 30)).sum(axis=1).tolist()
+
+
+@pytest.mark.parametrize('constraints, contains, excludes', [
+    (TicketConstraints(), None, None),
+    (TicketConstraints(soma=(60, 80), pares=(2, 4)), None, None),
+    (TicketConstraints(amplitude=(10.5, 15), dezenas=[(1, 3), (2, 4), None, None, None]), [7], [12, 13]),
+    (TicketConstraints(soma=(80, 100)), [3, 24], None),
+    (TicketConstraints(soma=(200, 300)), None, None),
+    (TicketConstraints(), [5], [5])
+])
+def test_query_matches_brute_force(index, universe, constraints, contains, excludes):
+    ranks = index.query(constraints, contains, excludes)
+    assert ranks.tolist() == brute_force_query(universe, constraints, contains or (), excludes or ())
+
+
+def test_hits_and_summary(index, universe):
+    ranks = index.query(TicketConstraints(pares=(3, 3)))
+    draw = [2, 5, 11, 17, 20, 23]
+    expected = [len(set(universe[rank]) & set(draw)) for rank in ranks]
+    assert index.hits(ranks, draw).tolist() == expected
+    
+    summary = index.summary(ranks)
+    assert summary['combinacoes'] == len(ranks)
+    assert summary['pares'] == {3: len(ranks)}
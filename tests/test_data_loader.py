@@ -0,0 +1,89 @@
+import contextlib
+import io
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_loader import MilionariaDataLoader
+
+DATA_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '+Milionária (2).xlsx')
+WINNERS = 'Ganhadores 5 acertos + 2 Trevos'
+
+
+def sample_loader(n_draws: int = 20) -> MilionariaDataLoader:
+    loader = MilionariaDataLoader('sintetico', cache_dir=None)
+    with contextlib.redirect_stdout(io.StringIO()):
+        loader._create_sample_data(n_draws)
+    return loader
+
+
+def new_draw(contest: int, **extra) -> dict:
+    return {'Concurso': contest, 'Data': pd.Timestamp('2030-01-05'), 'Num1': 1, 'Num2': 12, 'Num3': 23,
+            'Num4': 34, 'Num5': 45, 'Num6': 50, 'Trevo1': 2, 'Trevo2': 5, **extra}
+
+
+def test_append_keeps_values_outside_the_compact_dtype():
+    loader = sample_loader()
+    # Coluna no tipo compacto de um cache antigo (int8 pelo máximo do arquivo)
+    loader.data[WINNERS] = np.arange(len(loader.data), dtype=np.int8)
+    
+    with contextlib.redirect_stdout(io.StringIO()):
+        loader.append_draws([new_draw(21, **{WINNERS: 150}), new_draw(22, **{WINNERS: 40000})])
+    
+    assert loader.data[WINNERS].tolist()[-3:] == [19, 150, 40000]
+    assert loader.data[WINNERS].dtype.itemsize >= 4
+
+
+@pytest.mark.skipif(not os.path.exists(DATA_FILE), reason="Planilha real não disponível")
+def test_append_out_of_range_winners_on_spreadsheet():
+    loader = MilionariaDataLoader(DATA_FILE, cache_dir=None)
+    with contextlib.redirect_stdout(io.StringIO()):
+        loader.load_data()
+        # Nome como na planilha da Caixa (espaços duplos e ao final)
+        winners = next(col for col in loader.data.columns if ' '.join(col.split()) == WINNERS)
+        last = loader.data.iloc[-1].to_dict()
+        last.update({'Concurso': last['Concurso'] + 1, winners: 150})
+        loader.append_draws([last])
+    
+    assert loader.data[winners].iloc[-1] == 150
+
+
+def test_compact_dtypes_only_fixes_draw_columns():
+    data = pd.DataFrame({'Concurso': [1, 2], 'Bola1': [3, 50], 'Bola2': [4, 49], 'Bola3': [5, 48], 'Bola4': [6, 47],
+                         'Bola5': [7, 46], 'Bola6': [8, 45], 'Trevo1': [1, 2], 'Trevo2': [3, 6], WINNERS: [0, 2]})
+    data = MilionariaDataLoader._compact_dtypes(data)
+    
+    # Tipos fixos para as colunas do sorteio; ganhadores não dependem do máximo do arquivo
+    assert data['Concurso'].dtype == np.int32
+    assert (data.filter(regex='^(Bola|Trevo)').dtypes == np.int8).all()
+    assert data[WINNERS].dtype == np.int64
+
+
+def test_append_draws_matches_full_rebuild():
+    loader = sample_loader()
+    with contextlib.redirect_stdout(io.StringIO()):
+        loader.preprocess_data()
+        loader.get_running_stats()
+        # Concurso antigo e duplicado são ignorados; os novos entram em ordem de concurso
+        added = loader.append_draws([new_draw(22, Num1=2), new_draw(5), new_draw(21), new_draw(21, Num1=3)])
+        
+        rebuilt = MilionariaDataLoader('sintetico', cache_dir=None)
+        rebuilt.data = loader.data.copy()
+        rebuilt.preprocess_data()
+    
+    assert added['Concurso'].tolist() == [21, 22]
+    assert loader.data['Concurso'].tolist() == list(range(1, 23))
+    assert loader.data['Num1'].tolist()[-2:] == [1, 2]
+    pd.testing.assert_frame_equal(loader.processed_data, rebuilt.processed_data)
+    
+    # DrawStore e RunningStats atualizados no lugar equivalem aos reconstruídos do zero
+    store, full_store = loader.draw_store, rebuilt.get_draw_store()
+    for name in ('balls', 'clovers', 'contests', 'dates'):
+        np.testing.assert_array_equal(getattr(store, name), getattr(full_store, name))
+    stats, full_stats = loader.running_stats, rebuilt.get_running_stats()
+    assert stats.n_draws == full_stats.n_draws == 22
+    np.testing.assert_array_equal(stats.number_counts, full_stats.number_counts)
+    np.testing.assert_array_equal(stats.gaps(), full_stats.gaps())
+    np.testing.assert_array_equal(stats.last_features, full_stats.last_features)
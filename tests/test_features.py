@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+
+from draw_store import DrawStore
+from feature_engine import RunningStats, SOMA_LAGS
+from ml_models import MilionariaPredictor
+
+
+def caixa_frame(n_draws: int = 40) -> pd.DataFrame:
+    """Sorteios com os nomes de coluna da planilha da Caixa (Bola*, Data Sorteio em dd/mm/aaaa)"""
+    rng = np.random.default_rng(0)
+    balls = np.sort([rng.choice(np.arange(1, 51), 6, replace=False) for _ in range(n_draws)], axis=1)
+    clovers = np.sort([rng.choice(np.arange(1, 7), 2, replace=False) for _ in range(n_draws)], axis=1)
+    dates = pd.date_range('2022-05-28', periods=n_draws, freq='W-SAT').strftime('%d/%m/%Y')
+    data = pd.DataFrame({'Concurso': np.arange(1, n_draws + 1), 'Data Sorteio': dates})
+    for i in range(6):
+        data[f'Bola{i + 1}'] = balls[:, i]
+    for i in range(2):
+        data[f'Trevo{i + 1}'] = clovers[:, i]
+    return data
+
+
+def test_dataframe_drawstore_and_running_stats_give_the_same_features():
+    data = caixa_frame()
+    store = DrawStore.from_dataframe(data)
+    predictor = MilionariaPredictor()
+    
+    X_frame, y_frame, names_frame = predictor.prepare_features(data)
+    X_store, y_store, names_store = predictor.prepare_features(store)
+    stats = RunningStats.from_store(store)
+    
+    assert names_frame == names_store
+    assert X_frame.shape == (len(data), 168)
+    # Frequências reais (não zeros) e datas lidas da coluna 'Data Sorteio'
+    assert X_frame[:, :50].any()
+    np.testing.assert_array_equal(X_frame, X_store)
+    np.testing.assert_array_equal(y_frame, y_store)
+    np.testing.assert_allclose(stats.last_features, X_frame[-1:])
+
+
+def test_running_stats_updates_match_a_full_recompute():
+    store = DrawStore.from_dataframe(caixa_frame())
+    stats = RunningStats.from_store(store[:25])
+    for i in range(25, len(store)):
+        stats.update(store.balls[i], store.clovers[i], store.dates[i])
+    full = RunningStats.from_store(store)
+    
+    assert stats.n_draws == full.n_draws == len(store)
+    np.testing.assert_array_equal(stats.number_counts, full.number_counts)
+    np.testing.assert_array_equal(stats.clover_counts, full.clover_counts)
+    for window in stats.number_windows:
+        np.testing.assert_array_equal(stats.number_windows[window], full.number_windows[window])
+    for window in stats.clover_windows:
+        np.testing.assert_array_equal(stats.clover_windows[window], full.clover_windows[window])
+    np.testing.assert_array_equal(stats.number_last_seen, full.number_last_seen)
+    np.testing.assert_array_equal(stats.gaps(clovers=True), full.gaps(clovers=True))
+    np.testing.assert_allclose(stats.last_features, full.last_features)
+    # Contagens conferidas também contra o histórico bruto
+    np.testing.assert_array_equal(stats.number_counts, store.number_onehot().sum(axis=0))
+
+
+def test_extend_feature_store_matches_prepare_features():
+    store = DrawStore.from_dataframe(caixa_frame())
+    predictor = MilionariaPredictor()
+    features = predictor.build_feature_store(store[:25])
+    predictor.extend_feature_store(features, RunningStats.from_store(store[:25]), store[25:])
+    X, y, _ = predictor.prepare_features(store)
+    
+    # Linhas novas iguais às do cálculo em lote; antes de max(SOMA_LAGS) sorteios o lag da soma
+    # é preenchido com a média do histórico disponível, que muda quando ele cresce
+    start = max(SOMA_LAGS)
+    assert len(features) == len(X)
+    np.testing.assert_allclose(features.X[start:], X[start:])
+    np.testing.assert_array_equal(features.y, y)
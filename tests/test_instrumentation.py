@@ -0,0 +1,35 @@
+import tracemalloc
+
+import instrumentation
+from instrumentation import PerfRegistry
+
+
+def test_spans_are_bounded():
+    registry = PerfRegistry(max_spans=50)
+    for i in range(200):
+        with registry.timed('etapa', i=i):
+            pass
+    
+    spans = registry.spans()
+    assert len(spans) == 50
+    # Os mais recentes ficam
+    assert spans[-1]['i'] == 199
+
+
+def test_track_memory_needs_the_profiling_flag(monkeypatch):
+    monkeypatch.setattr(instrumentation, '_memory_profiling', False)
+    was_tracing = tracemalloc.is_tracing()
+    registry = PerfRegistry(track_memory=True)
+    
+    assert not registry.memory
+    assert tracemalloc.is_tracing() == was_tracing
+    
+    monkeypatch.setattr(instrumentation, '_memory_profiling', True)
+    registry.track_memory(True)
+    try:
+        with registry.timed('alocacao'):
+            block = bytearray(1 << 20)
+        assert registry.spans('alocacao')[0]['pico_memoria_bytes'] >= len(block)
+    finally:
+        registry.track_memory(False)
+    assert tracemalloc.is_tracing() == was_tracing
@@ -0,0 +1,66 @@
+import contextlib
+import io
+import threading
+import time
+
+import pytest
+
+from jobs import JobManager, STATUS_DONE, STATUS_ERROR
+
+
+@pytest.fixture
+def manager():
+    manager = JobManager()
+    yield manager
+    manager.shutdown()
+
+
+def wait(job, timeout: float = 5.0):
+    deadline = time.time() + timeout
+    while not job.finished and time.time() < deadline:
+        time.sleep(0.01)
+    assert job.finished
+    return job
+
+
+def test_shared_job_stays_until_every_owner_leaves(manager):
+    first = wait(manager.submit('treino', 'hash', {'modelos': ['a']}, 1, lambda job: 42, owner='sessao-a'))
+    # Mesmo trabalho pedido por outra sessão: o job é reaproveitado e passa a ter as duas
+    second = manager.submit('treino', 'hash', {'modelos': ['a']}, 1, lambda job: 0, owner='sessao-b')
+    assert second is first and second.result == 42
+    assert first.owners == {'sessao-a', 'sessao-b'}
+    
+    manager.evict('outro-hash', owner='sessao-a')
+    assert manager.get(first.id) is first
+    manager.evict('outro-hash', owner='sessao-b')
+    assert manager.get(first.id) is None
+
+
+def test_release_drops_only_replaced_jobs(manager):
+    def fail(job):
+        raise RuntimeError("falhou")
+    
+    with contextlib.redirect_stdout(io.StringIO()):
+        failed = wait(manager.submit('treino', 'hash', {}, 1, fail, owner='sessao'))
+    assert failed.status == STATUS_ERROR
+    # Nova tentativa substitui a chave: o job com erro fica sem índice
+    retry = wait(manager.submit('treino', 'hash', {}, 1, lambda job: 1, owner='sessao'))
+    assert retry is not failed and retry.status == STATUS_DONE
+    
+    manager.release(failed.id, 'sessao')
+    manager.release(retry.id, 'sessao')
+    assert manager.get(failed.id) is None
+    # Ainda indexado: fica para reaproveitamento até o próximo evict
+    assert manager.get(retry.id) is retry and not retry.owners
+
+
+def test_quick_jobs_do_not_wait_for_training(manager):
+    release = threading.Event()
+    training = manager.submit('treino', 'hash', {}, 1, lambda job: release.wait(5), owner='sessao')
+    try:
+        prediction = wait(manager.submit('predicao', 'hash', {}, 1, lambda job: 'ok', owner='sessao'))
+        assert prediction.result == 'ok'
+        assert not training.finished
+    finally:
+        release.set()
+    assert wait(training).result is True
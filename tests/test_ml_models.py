@@ -0,0 +1,52 @@
+import contextlib
+import io
+
+import numpy as np
+import pytest
+from sklearn.linear_model import LinearRegression
+from sklearn.preprocessing import StandardScaler
+
+from data_loader import MilionariaDataLoader
+from ml_models import MilionariaPredictor
+
+
+@pytest.fixture(scope='module')
+def sample_data():
+    loader = MilionariaDataLoader('sintetico', cache_dir=None)
+    with contextlib.redirect_stdout(io.StringIO()):
+        loader._create_sample_data(80)
+        return loader.preprocess_data()
+
+
+def test_backtest_scores_only_requested_families(sample_data):
+    predictor = MilionariaPredictor(n_jobs=1)
+    with contextlib.redirect_stdout(io.StringIO()):
+        predictor.train_models(sample_data, ['random_forest'])
+        results = predictor.backtest(sample_data, 10, ['linear_regression'])
+    
+    assert list(results) == ['linear_regression']
+    assert len(results['linear_regression']['predicoes']) == 10
+
+
+def test_train_models_scores_on_holdout_and_serves_the_full_refit(sample_data):
+    predictor = MilionariaPredictor(n_jobs=1)
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = predictor.train_models(sample_data, ['linear_regression'])
+    X, y, _ = predictor.prepare_features(sample_data)
+    n_test = int(np.ceil(0.2 * len(X)))
+    
+    def fit(X_train, y_train):
+        scaler = StandardScaler().fit(X_train)
+        return scaler, [LinearRegression().fit(scaler.transform(X_train), y_train[:, pos]) for pos in range(6)]
+    
+    # Métricas: ajuste sem os n_test sorteios mais recentes, avaliado neles
+    scaler, models = fit(X[:-n_test], y[:-n_test])
+    predictions = np.column_stack([model.predict(scaler.transform(X[-n_test:])) for model in models])
+    assert results['linear_regression']['mae'] == pytest.approx(np.mean(np.abs(predictions - y[-n_test:])))
+    
+    # Modelos servidos: reajustados em todo o histórico, holdout incluído
+    scaler, models = fit(X, y)
+    assert predictor.scalers['linear_regression'].n_samples_seen_ == len(X)
+    for served, expected in zip(predictor.trained_models['linear_regression'], models):
+        np.testing.assert_allclose(served.coef_, expected.coef_)
+        assert served.intercept_ == pytest.approx(expected.intercept_)
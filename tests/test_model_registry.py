@@ -0,0 +1,46 @@
+import contextlib
+import io
+import os
+
+import pytest
+
+from data_loader import MilionariaDataLoader
+from model_registry import ModelRegistry, dataset_hash
+
+MODEL = 'linear_regression'
+
+
+@pytest.fixture(scope='module')
+def sample_data():
+    loader = MilionariaDataLoader('sintetico', cache_dir=None)
+    with contextlib.redirect_stdout(io.StringIO()):
+        loader._create_sample_data(60)
+        return loader.preprocess_data()
+
+
+def test_retrain_keeps_lazily_loaded_predictor_usable(tmp_path, sample_data):
+    data_hash = dataset_hash(sample_data)
+    with contextlib.redirect_stdout(io.StringIO()):
+        ModelRegistry(cache_dir=str(tmp_path), n_jobs=1).train(sample_data, [MODEL], data_hash)
+        
+        # Outro processo/registro: a família fica pendente (lazy) apontando para o diretório
+        registry = ModelRegistry(cache_dir=str(tmp_path), n_jobs=1)
+        predictor = registry.get_predictor(sample_data, MODEL, data_hash)
+        assert MODEL not in predictor.trained_models
+        
+        registry.train(sample_data, [MODEL], data_hash, force=True)
+        # Lido antes da troca do diretório, não depois (quando os arquivos já seriam outros)
+        assert MODEL in predictor.trained_models
+        prediction = predictor.predict_next_draw(sample_data, MODEL)
+    
+    assert len(prediction['numeros']) == 6
+    # Só o diretório do artefato (e o best_params, se houver): nada de .tmp/.old esquecido
+    assert [name for name in os.listdir(tmp_path) if '.tmp-' in name or '.old-' in name] == []
+
+
+def test_key_locks_do_not_accumulate(tmp_path, sample_data):
+    registry = ModelRegistry(cache_dir=str(tmp_path), n_jobs=1)
+    with contextlib.redirect_stdout(io.StringIO()):
+        registry.get_predictor(sample_data, MODEL)
+    
+    assert len(registry._key_locks) == 0
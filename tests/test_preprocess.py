@@ -0,0 +1,47 @@
+import contextlib
+import io
+import os
+
+import pandas as pd
+import pytest
+
+from data_loader import MilionariaDataLoader
+
+DATA_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '+Milionária (2).xlsx')
+
+
+def rowwise_patterns(df: pd.DataFrame, number_cols) -> pd.DataFrame:
+    """Implementação original (apply linha a linha) dos padrões de preprocess_data"""
+    expected = pd.DataFrame(index=df.index)
+    expected['pares'] = df[number_cols].apply(lambda x: sum(x % 2 == 0), axis=1)
+    expected['impares'] = 6 - expected['pares']
+    expected['dezena_1'] = df[number_cols].apply(lambda x: sum((x >= 1) & (x <= 10)), axis=1)
+    expected['dezena_2'] = df[number_cols].apply(lambda x: sum((x >= 11) & (x <= 20)), axis=1)
+    expected['dezena_3'] = df[number_cols].apply(lambda x: sum((x >= 21) & (x <= 30)), axis=1)
+    expected['dezena_4'] = df[number_cols].apply(lambda x: sum((x >= 31) & (x <= 40)), axis=1)
+    expected['dezena_5'] = df[number_cols].apply(lambda x: sum((x >= 41) & (x <= 50)), axis=1)
+    return expected
+
+
+def assert_same_patterns(loader: MilionariaDataLoader):
+    processed = loader.preprocess_data()
+    number_cols, _ = loader._feature_columns(loader.data)
+    expected = rowwise_patterns(loader.data, number_cols)
+    # Mesmos valores e mesmos dtypes (int64) da versão com apply
+    pd.testing.assert_frame_equal(processed[expected.columns], expected, check_exact=True)
+
+
+@pytest.mark.parametrize('n_draws', [1, 100, 2000])
+def test_patterns_match_rowwise_on_sample_data(n_draws):
+    loader = MilionariaDataLoader('sintetico', cache_dir=None)
+    with contextlib.redirect_stdout(io.StringIO()):
+        loader._create_sample_data(n_draws)
+    assert_same_patterns(loader)
+
+
+@pytest.mark.skipif(not os.path.exists(DATA_FILE), reason="planilha da Caixa não disponível")
+def test_patterns_match_rowwise_on_spreadsheet():
+    loader = MilionariaDataLoader(DATA_FILE, cache_dir=None)
+    with contextlib.redirect_stdout(io.StringIO()):
+        loader.load_data()
+    assert_same_patterns(loader)
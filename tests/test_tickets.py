@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from combination_index import lex_combinations
+from tickets import TicketGenerator, TicketConstraints, CLOVER_PAIRS
+
+
+@pytest.fixture(scope='module')
+def all_combinations():
+    """As 15.890.700 combinações de 6 números, em ordem lexicográfica"""
+    return lex_combinations(1, 6)
+
+
+def brute_force_scores(generator, balls, n_tickets):
+    """Scores dos n_tickets melhores bilhetes, avaliando todas as combinações válidas"""
+    balls = balls[generator.constraints.mask(balls)]
+    ball_scores = generator.number_log[balls.astype(np.intp) - 1].sum(axis=1)
+    top = np.sort(np.partition(-ball_scores, n_tickets - 1)[:n_tickets])
+    return np.sort((-top[:, None] + generator.pair_log[None, :]).ravel())[::-1][:n_tickets]
+
+
+@pytest.mark.parametrize('seed, constraints', [
+    (0, None),
+    (1, TicketConstraints(soma=(140, 160), pares=(2, 4))),
+    (2, TicketConstraints(soma=(230, 250), pares=(3, 3), amplitude=(30, 45)))
+])
+def test_generate_returns_exact_top_n(all_combinations, seed, constraints):
+    rng = np.random.default_rng(seed)
+    generator = TicketGenerator(rng.dirichlet(np.ones(50)) * 6, rng.dirichlet(np.ones(6)) * 2, constraints)
+    tickets, stats = generator.generate(30)
+    
+    np.testing.assert_allclose(tickets['score'], brute_force_scores(generator, all_combinations, 30))
+    
+    # Sem repetição, dentro das faixas e com o score recalculado batendo
+    ids = {(tuple(t['numeros']), tuple(t['trevos'])) for t in tickets}
+    assert len(ids) == len(tickets)
+    assert generator.constraints.mask(tickets['numeros']).all()
+    pairs = [CLOVER_PAIRS.tolist().index(t.tolist()) for t in tickets['trevos']]
+    np.testing.assert_allclose(generator.score(tickets['numeros'], np.array(pairs, dtype=np.intp)), tickets['score'])
+
+
+def test_generate_falls_back_to_full_scan(all_combinations):
+    rng = np.random.default_rng(3)
+    generator = TicketGenerator(rng.dirichlet(np.ones(50)) * 6, rng.dirichlet(np.ones(6)) * 2,
+                                TicketConstraints(soma=(140, 160)))
+    tickets, stats = generator.generate(10, n_candidates=100)
+    
+    assert stats['varredura_completa']
+    assert stats['candidatos'] == len(all_combinations)
+    np.testing.assert_allclose(tickets['score'], brute_force_scores(generator, all_combinations, 10))
@@ -0,0 +1,37 @@
+import contextlib
+import io
+import math
+
+import numpy as np
+
+from data_loader import MilionariaDataLoader
+from tuning import HyperparameterSearch
+
+# Espaço pequeno e rápido: 4 combinações + a configuração padrão
+SPACE = {'linear_regression': {'fit_intercept': [True, False], 'positive': [True, False]}}
+
+
+def test_halving_keeps_the_best_candidates_of_each_rung():
+    loader = MilionariaDataLoader('sintetico', cache_dir=None)
+    search = HyperparameterSearch(method='halving', n_candidates=5, n_splits=3, eta=2, n_jobs=1, search_spaces=SPACE)
+    with contextlib.redirect_stdout(io.StringIO()):
+        loader._create_sample_data(80)
+        result = search.search(loader.preprocess_data(), ['linear_regression'])['linear_regression']
+    
+    candidates = result['candidatos']
+    assert len(candidates) == 5
+    # Rodada a rodada: seguem os ceil(n / eta) de menor MAE médio nos folds já avaliados
+    alive = candidates
+    for rung in range(search.n_splits - 1):
+        ranked = sorted(alive, key=lambda c: np.mean(c['maes'][:rung + 1]))
+        survivors = ranked[:math.ceil(len(alive) / search.eta)]
+        assert [c for c in alive if c['folds_avaliados'] > rung + 1] == sorted(survivors, key=alive.index)
+        alive = survivors
+    assert [c['folds_avaliados'] for c in candidates] == [3, 3, 2, 1, 1]
+    
+    # O melhor foi avaliado em todos os folds e tem o menor MAE médio entre os finalistas
+    finalists = [c for c in candidates if c['folds_avaliados'] == search.n_splits]
+    best = min(finalists, key=lambda c: c['mae_medio'])
+    assert result['folds_avaliados'] == search.n_splits
+    assert result['melhor_params'] == best['params']
+    assert result['melhor_mae'] == best['mae_medio']
@@ -0,0 +1,230 @@
+import time
+from itertools import combinations
+from typing import Tuple, List, Dict, Any, Union, Optional
+
+import numpy as np
+import pandas as pd
+
+from draw_store import DrawStore
+from instrumentation import timed, increment
+
+# Bilhete gerado: 6 números, 2 trevos e o score (log-probabilidade) dado pelo modelo
+TICKET_DTYPE = np.dtype([
+    ('numeros', np.uint8, (6,)),
+    ('trevos', np.uint8, (2,)),
+    ('score', np.float64)
+])
+
+# Os 15 pares de trevos possíveis (2 de 6), em ordem
+CLOVER_PAIRS = np.array(list(combinations(range(1, 7), 2)), dtype=np.uint8)
+
+Range = Optional[Tuple[float, float]]
+
+
+def decade_counts(balls: np.ndarray) -> np.ndarray:
+    """Bolas por dezena (n x 5) de bilhetes válidos (1-50); mesmo resultado de pattern_counts"""
+    # Um único bincount sobre (linha, dezena) em vez de comparar cada bola com as 5 faixas
+    codes = np.arange(len(balls))[:, None] * 5 + (balls.astype(np.intp) - 1) // 10
+    return np.bincount(codes.ravel(), minlength=5 * len(balls)).reshape(len(balls), 5)
+
+
+class TicketConstraints:
+    """Faixas aceitas para os padrões que preprocess_data mede (soma, pares, dezenas, amplitude)"""
+    
+    def __init__(self, soma: Range = None, pares: Range = None, dezenas: Union[Range, List[Range]] = None,
+                 amplitude: Range = None):
+        # Cada faixa é (mínimo, máximo), inclusiva; None = sem restrição
+        self.soma = soma
+        self.pares = pares
+        # Uma faixa para todas as 5 dezenas ou uma por dezena (dezena_1 .. dezena_5)
+        self.dezenas = [dezenas] * 5 if isinstance(dezenas, tuple) else dezenas
+        self.amplitude = amplitude
+    
+    @classmethod
+    def from_history(cls, data: Union[pd.DataFrame, DrawStore], lower: float = 0.05,
+                     upper: float = 0.95) -> 'TicketConstraints':
+        """Faixas entre os quantis `lower` e `upper` dos sorteios já realizados"""
+        if isinstance(data, DrawStore):
+            data = data.to_dataframe(with_patterns=True)
+        
+        def span(column: str) -> Range:
+            if column not in data.columns:
+                return None
+            low, high = data[column].quantile([lower, upper])
+            return float(low), float(high)
+        
+        dezenas = [span(f'dezena_{i + 1}') for i in range(5)]
+        return cls(span('soma_numeros'), span('pares'), dezenas if any(dezenas) else None, span('amplitude'))
+    
+    def mask(self, balls: np.ndarray) -> np.ndarray:
+        """Quais bilhetes (n x 6) respeitam todas as faixas, de forma vetorizada"""
+        ok = np.ones(len(balls), dtype=bool)
+        if self.soma is not None:
+            soma = balls.sum(axis=1, dtype=np.int64)
+            ok &= (soma >= self.soma[0]) & (soma <= self.soma[1])
+        if self.amplitude is not None:
+            amplitude = balls.max(axis=1).astype(np.int64) - balls.min(axis=1)
+            ok &= (amplitude >= self.amplitude[0]) & (amplitude <= self.amplitude[1])
+        if self.pares is not None:
+            pares = (balls % 2 == 0).sum(axis=1)
+            ok &= (pares >= self.pares[0]) & (pares <= self.pares[1])
+        if self.dezenas is not None:
+            decades = decade_counts(balls)
+            for i, bounds in enumerate(self.dezenas):
+                if bounds is not None:
+                    ok &= (decades[:, i] >= bounds[0]) & (decades[:, i] <= bounds[1])
+        return ok
+    
+    def describe(self) -> Dict[str, Any]:
+        """Faixas em uso, para relatórios"""
+        return {'soma_numeros': self.soma, 'pares': self.pares, 'dezenas': self.dezenas,
+                'amplitude': self.amplitude}
+
+
+class TicketGenerator:
+    """Encontra os N bilhetes de maior score do modelo que respeitam as restrições"""
+    
+    def __init__(self, number_probs: np.ndarray, clover_probs: np.ndarray,
+                 constraints: TicketConstraints = None, batch_size: int = 65536):
+        # Probabilidade de cada número (50) e trevo (6) sair, ex.: BallScoringModel.predict_proba
+        number_probs = np.clip(np.asarray(number_probs, dtype=np.float64), 1e-12, None)
+        clover_probs = np.clip(np.asarray(clover_probs, dtype=np.float64), 1e-12, None)
+        self.number_log = np.log(number_probs)
+        # Números do mais ao menos provável: a combinação (0, 1, ..., 5) nessa ordem é a de maior score
+        self._order = np.argsort(-self.number_log, kind='stable')
+        self._sorted_log = self.number_log[self._order]
+        
+        # Score de cada um dos 15 pares de trevos
+        self.pair_log = np.log(clover_probs[CLOVER_PAIRS - 1].prod(axis=1))
+        
+        self.constraints = constraints or TicketConstraints()
+        self.batch_size = batch_size
+    
+    @classmethod
+    def from_model(cls, model, data: Union[pd.DataFrame, DrawStore], constraints: TicketConstraints = None,
+                   **kwargs) -> 'TicketGenerator':
+        """Gerador a partir das probabilidades de um BallScoringModel treinado"""
+        number_probs, clover_probs = model.predict_proba(data)
+        return cls(number_probs, clover_probs, constraints, **kwargs)
+    
+    def score(self, balls: np.ndarray, pairs: np.ndarray) -> np.ndarray:
+        """Log-probabilidade de cada bilhete: soma dos números + par de trevos"""
+        return self.number_log[balls.astype(np.intp) - 1].sum(axis=1) + self.pair_log[pairs]
+    
+    def top_combinations(self, n: int,
+                         max_combinations: int = 1_000_000) -> Tuple[np.ndarray, np.ndarray, Dict[str, Any]]:
+        """As n combinações de 6 números de maior score dentro das restrições, em ordem decrescente (exato)"""
+        # Busca best-first no reticulado das combinações em posições da ordem por probabilidade:
+        # cada sucessor avança uma posição (troca um número pelo próximo menos provável), então
+        # nenhum sucessor tem score maior que o pai. A fronteira guarda os ainda não examinados.
+        # Cada combinação tem um único pai (volta a primeira posição fora do mínimo), então
+        # nada é gerado duas vezes e não é preciso lembrar as já vistas.
+        frontier = np.arange(6, dtype=np.int64)[None, :]
+        frontier_scores = self._sorted_log[frontier].sum(axis=1)
+        best_balls = np.empty((0, 6), dtype=np.uint8)
+        best_scores = np.empty(0)
+        examined = accepted = 0
+        
+        while len(frontier):
+            # Pronto quando o n-ésimo melhor aceito não perde para nada ainda não examinado
+            if len(best_scores) >= n and best_scores[n - 1] >= frontier_scores.max():
+                break
+            if examined >= max_combinations:
+                break
+            
+            # Lote dos melhores da fronteira (todos >= o que fica nela)
+            size = min(self.batch_size, len(frontier), max_combinations - examined)
+            take = np.arange(len(frontier))
+            if size < len(frontier):
+                take = np.argpartition(-frontier_scores, size - 1)[:size]
+            positions, scores = frontier[take], frontier_scores[take]
+            keep = np.ones(len(frontier), dtype=bool)
+            keep[take] = False
+            frontier, frontier_scores = frontier[keep], frontier_scores[keep]
+            examined += size
+            
+            balls = np.sort(self._order[positions] + 1, axis=1).astype(np.uint8)
+            valid = self.constraints.mask(balls)
+            accepted += int(valid.sum())
+            best_balls = np.concatenate([best_balls, balls[valid]])
+            best_scores = np.concatenate([best_scores, scores[valid]])
+            top = np.argsort(-best_scores, kind='stable')[:n]
+            best_balls, best_scores = best_balls[top], best_scores[top]
+            
+            # Sucessores: só avançam as posições j até a primeira fora do mínimo (j <= first),
+            # e só se não encostarem na posição j + 1 (ou passarem de 50)
+            off_min = positions != np.arange(6)
+            first = np.where(off_min.any(axis=1), off_min.argmax(axis=1), 5)
+            successors = []
+            for j in range(6):
+                limit = positions[:, j + 1] if j < 5 else 50
+                moved = positions[(j <= first) & (positions[:, j] + 1 < limit)]
+                moved[:, j] += 1
+                successors.append(moved)
+            successors = np.concatenate(successors)
+            frontier = np.concatenate([frontier, successors])
+            frontier_scores = np.concatenate([frontier_scores, self._sorted_log[successors].sum(axis=1)])
+        
+        increment('bilhetes_avaliados', examined)
+        stats = {'candidatos': examined, 'aceitos_restricoes': accepted, 'varredura_completa': False}
+        if len(frontier) and (len(best_scores) < n or best_scores[n - 1] < frontier_scores.max()):
+            # Restrições longe dos números mais prováveis: a busca estourou o limite sem provar
+            # o resultado, então todas as combinações são avaliadas (exato, em alguns segundos)
+            best_balls, best_scores, stats = self._scan_combinations(n)
+        return best_balls, best_scores, stats
+    
+    @timed('scan_combinations')
+    def _scan_combinations(self, n: int) -> Tuple[np.ndarray, np.ndarray, Dict[str, Any]]:
+        """As n melhores combinações dentro das restrições, avaliando as 15.890.700 em blocos"""
+        from combination_index import lex_combinations
+        
+        best_balls = np.empty((0, 6), dtype=np.uint8)
+        best_scores = np.empty(0)
+        examined = accepted = 0
+        # Um bloco por primeiro número (até C(49, 5) linhas), como na construção do CombinationIndex
+        for first in range(1, 46):
+            rest = lex_combinations(first + 1, 5)
+            balls = np.hstack([np.full((len(rest), 1), first, dtype=np.uint8), rest])
+            examined += len(balls)
+            balls = balls[self.constraints.mask(balls)]
+            accepted += len(balls)
+            scores = self.number_log[balls.astype(np.intp) - 1].sum(axis=1)
+            if len(scores) > n:
+                top = np.argpartition(-scores, n - 1)[:n]
+                balls, scores = balls[top], scores[top]
+            best_balls = np.concatenate([best_balls, balls])
+            best_scores = np.concatenate([best_scores, scores])
+            top = np.argsort(-best_scores, kind='stable')[:n]
+            best_balls, best_scores = best_balls[top], best_scores[top]
+        
+        increment('bilhetes_avaliados', examined)
+        return best_balls, best_scores, {'candidatos': examined, 'aceitos_restricoes': accepted,
+                                         'varredura_completa': True}
+    
+    @timed('generate_tickets')
+    def generate(self, n_tickets: int = 100, n_candidates: int = 1_000_000) -> Tuple[np.ndarray, Dict[str, Any]]:
+        """Os n_tickets bilhetes de maior score (sem repetição); n_candidates limita a busca best-first"""
+        if n_tickets < 1:
+            raise ValueError("Quantidade de bilhetes deve ser pelo menos 1")
+        start_time = time.perf_counter()
+        
+        # Número e trevos pontuam de forma independente: cada um dos n_tickets melhores bilhetes
+        # usa uma das n_tickets melhores combinações de números, com algum dos 15 pares de trevos
+        balls, ball_scores, stats = self.top_combinations(n_tickets, n_candidates)
+        scores = (ball_scores[:, None] + self.pair_log[None, :]).ravel()
+        best = np.argsort(-scores, kind='stable')[:n_tickets]
+        rows, pairs = np.divmod(best, len(CLOVER_PAIRS))
+        
+        tickets = np.zeros(len(best), dtype=TICKET_DTYPE)
+        tickets['numeros'] = balls[rows]
+        tickets['trevos'] = CLOVER_PAIRS[pairs]
+        tickets['score'] = scores[best]
+        
+        elapsed = time.perf_counter() - start_time
+        stats.update({
+            'bilhetes': len(tickets),
+            'tempo_s': elapsed,
+            'candidatos_por_s': stats['candidatos'] / elapsed if elapsed > 0 else float('inf'),
+            'restricoes': self.constraints.describe()
+        })
+        return tickets, stats
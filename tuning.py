@@ -0,0 +1,193 @@
+import json
+import math
+import time
+from datetime import datetime
+from typing import Dict, Any, List, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+
+from draw_store import DrawStore
+from feature_engine import FeatureStore
+from ml_models import MilionariaPredictor, MODEL_CLASSES
+from model_registry import ModelRegistry
+from validation import time_series_splits
+from instrumentation import timed, increment, get_registry, run_collecting
+
+# Valores candidatos de cada hiperparâmetro; o que não aparece aqui fica no padrão (DEFAULT_PARAMS)
+SEARCH_SPACES = {
+    'random_forest': {
+        'n_estimators': [50, 100, 200, 400],
+        'max_depth': [None, 5, 10, 20],
+        'min_samples_leaf': [1, 2, 5, 10],
+        'max_features': [1.0, 'sqrt', 0.5]
+    },
+    'gradient_boosting': {
+        'n_estimators': [50, 100, 200],
+        'learning_rate': [0.01, 0.05, 0.1, 0.2],
+        'max_depth': [2, 3, 5],
+        'subsample': [0.6, 0.8, 1.0]
+    },
+    'xgboost': {
+        'n_estimators': [50, 100, 200, 400],
+        'learning_rate': [0.01, 0.05, 0.1, 0.3],
+        'max_depth': [3, 4, 6, 8],
+        'subsample': [0.6, 0.8, 1.0],
+        'colsample_bytree': [0.5, 0.8, 1.0]
+    },
+    'lightgbm': {
+        'n_estimators': [50, 100, 200, 400],
+        'learning_rate': [0.01, 0.05, 0.1],
+        'num_leaves': [15, 31, 63],
+        'min_child_samples': [5, 20, 50],
+        'colsample_bytree': [0.5, 0.8, 1.0]
+    },
+    'linear_regression': {
+        'fit_intercept': [True, False]
+    }
+}
+
+METHODS = ('halving', 'random')
+
+
+def _evaluate_candidate(model_name: str, params: Dict[str, Any], X: np.ndarray, y: np.ndarray,
+                        train_start: int, train_end: int, test_end: int, multi_output: bool,
+                        n_threads: int) -> float:
+    """MAE de uma configuração num fold: treina em X[train_start:train_end] e testa em X[train_end:test_end]"""
+    predictor = MilionariaPredictor(n_jobs=n_threads, multi_output=multi_output, params={model_name: params})
+    X_train, y_train = X[train_start:train_end], y[train_start:train_end]
+    valid_idx = ~np.isnan(X_train).any(axis=1)
+    
+    predictions = predictor._fit_models(X_train[valid_idx], X[train_end:test_end], y_train[valid_idx],
+                                        [model_name])[model_name]
+    # Configuração inválida (erro no fit de alguma posição) é descartada na primeira rodada
+    if any(pos_model is None for pos_model in predictor.trained_models[model_name]):
+        return float('inf')
+    return float(np.mean(np.abs(np.array(predictions).T - y[train_end:test_end])))
+
+
+class HyperparameterSearch:
+    """Busca de hiperparâmetros por família com validação temporal e successive halving"""
+    
+    def __init__(self, method: str = 'halving', n_candidates: int = 16, n_splits: int = 4, eta: int = 3,
+                 n_jobs: int = -1, random_state: int = 42, multi_output: bool = False,
+                 search_spaces: Dict[str, Dict[str, List[Any]]] = None, scheme: str = 'expanding'):
+        if method not in METHODS:
+            raise ValueError(f"Método de busca {method} desconhecido (use {', '.join(METHODS)})")
+        if eta < 2:
+            raise ValueError("eta deve ser pelo menos 2")
+        self.method = method
+        self.n_candidates = n_candidates
+        self.n_splits = n_splits
+        # Folds temporais: 'expanding' (todo o passado) ou 'blocked' (janela fixa), ver validation.py
+        self.scheme = scheme
+        # Fração dos candidatos mantida a cada rodada do halving: 1 / eta
+        self.eta = eta
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+        self.multi_output = multi_output
+        self.search_spaces = SEARCH_SPACES if search_spaces is None else search_spaces
+    
+    def sample_candidates(self, model_name: str) -> List[Dict[str, Any]]:
+        """Configurações sorteadas do espaço da família; a primeira é sempre a padrão"""
+        space = self.search_spaces.get(model_name, {})
+        rng = np.random.default_rng(self.random_state)
+        candidates = [{}]
+        seen = {json.dumps({}, sort_keys=True)}
+        
+        # Espaços pequenos (ex.: linear_regression) param antes de n_candidates
+        n_combinations = math.prod(len(values) for values in space.values()) + 1 if space else 1
+        attempts = 0
+        while len(candidates) < min(self.n_candidates, n_combinations) and attempts < 100 * self.n_candidates:
+            attempts += 1
+            params = {name: values[rng.integers(len(values))] for name, values in space.items()}
+            key = json.dumps(params, sort_keys=True)
+            if key not in seen:
+                seen.add(key)
+                candidates.append(params)
+        return candidates
+    
+    @timed('tuning')
+    def search(self, data: Union[pd.DataFrame, DrawStore, FeatureStore], model_names: List[str] = None,
+               registry: ModelRegistry = None) -> Dict[str, Dict[str, Any]]:
+        """Busca a melhor configuração de cada família (e a grava no registro, se houver)"""
+        if model_names is None:
+            model_names = list(MODEL_CLASSES)
+        for model_name in model_names:
+            if model_name not in MODEL_CLASSES:
+                raise ValueError(f"Modelo {model_name} desconhecido")
+        
+        # Matriz de features calculada uma vez e compartilhada por famílias, candidatos e folds
+        store = data if isinstance(data, FeatureStore) else MilionariaPredictor().build_feature_store(data)
+        splits = time_series_splits(len(store), self.n_splits, self.scheme)
+        
+        results = {}
+        for model_name in model_names:
+            results[model_name] = self._search_family(model_name, store.X, store.y, splits)
+            best = results[model_name]
+            print(f"{model_name}: MAE {best['melhor_mae']:.4f} com {best['melhor_params'] or 'parâmetros padrão'}")
+            
+            if registry is not None:
+                registry.set_best_params(model_name, best['melhor_params'], best['melhor_mae'], {
+                    'metrica': 'mae',
+                    'metodo': self.method,
+                    'folds_avaliados': best['folds_avaliados'],
+                    'data': datetime.now().isoformat(timespec='seconds')
+                })
+        
+        return results
+    
+    def _search_family(self, model_name: str, X: np.ndarray, y: np.ndarray,
+                       splits: List[Tuple[int, int, int]]) -> Dict[str, Any]:
+        """Avalia os candidatos fold a fold, eliminando os piores a cada rodada no halving"""
+        start_time = time.perf_counter()
+        candidates = self.sample_candidates(model_name)
+        scores = [[] for _ in candidates]
+        alive = list(range(len(candidates)))
+        
+        for rung, (train_start, train_end, test_end) in enumerate(splits):
+            # Candidatos rodam em processos separados; X e y vão por memmap (loky)
+            n_workers, n_threads = MilionariaPredictor(n_jobs=self.n_jobs)._thread_budget(len(alive))
+            with timed('tuning_rung', modelo=model_name, rodada=rung + 1, candidatos=len(alive)):
+                evaluated = Parallel(n_jobs=n_workers, backend='loky')(
+                    delayed(run_collecting)(_evaluate_candidate, model_name, candidates[i], X, y, train_start,
+                                            train_end, test_end, self.multi_output, n_threads)
+                    for i in alive
+                )
+            maes = []
+            for mae, candidate_perf in evaluated:
+                get_registry().merge(candidate_perf)
+                maes.append(mae)
+            increment('configs_avaliadas', len(alive))
+            
+            for i, mae in zip(alive, maes):
+                scores[i].append(mae)
+            
+            # Encerramento antecipado: configurações que falharam saem já; no halving só 1/eta segue.
+            # Quem sobrevive é avaliado em todos os folds, mesmo quando resta um só candidato,
+            # para que o melhor_mae gravado seja a média do walk-forward completo
+            alive = [i for i in alive if math.isfinite(scores[i][-1])] or alive
+            if self.method == 'halving' and rung < len(splits) - 1:
+                alive = sorted(alive, key=lambda i: np.mean(scores[i]))[:max(1, math.ceil(len(alive) / self.eta))]
+        
+        best = min(alive, key=lambda i: np.mean(scores[i]))
+        ranking = sorted(range(len(candidates)), key=lambda i: (-len(scores[i]), np.mean(scores[i])))
+        
+        return {
+            'modelo': model_name,
+            'metodo': self.method,
+            'melhor_params': candidates[best],
+            'melhor_mae': float(np.mean(scores[best])),
+            'folds_avaliados': len(scores[best]),
+            'candidatos': [
+                {
+                    'params': candidates[i],
+                    'mae_medio': float(np.mean(scores[i])),
+                    'maes': scores[i],
+                    'folds_avaliados': len(scores[i])
+                }
+                for i in ranking
+            ],
+            'tempo_s': time.perf_counter() - start_time
+        }
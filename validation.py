@@ -0,0 +1,28 @@
+from typing import List, Tuple
+
+SCHEMES = ('expanding', 'blocked')
+
+
+def time_series_splits(n_rows: int, n_splits: int, scheme: str = 'expanding',
+                       min_train: int = 10) -> List[Tuple[int, int, int]]:
+    """Folds (início do treino, fim do treino, fim do teste) em ordem temporal, sem embaralhar"""
+    # Os blocos de teste são os n_splits últimos pedaços de tamanho n_rows // (n_splits + 1),
+    # como no TimeSeriesSplit do sklearn; o treino termina onde o teste começa.
+    #   expanding: treino em todo o passado X[:fim_treino]
+    #   blocked:   treino só no bloco anterior ao teste (janela fixa, mesmo tamanho em todo fold)
+    if scheme not in SCHEMES:
+        raise ValueError(f"Esquema de validação {scheme} desconhecido (use {', '.join(SCHEMES)})")
+    if n_splits < 1:
+        raise ValueError("n_splits deve ser pelo menos 1")
+    
+    test_size = n_rows // (n_splits + 1)
+    first_train = n_rows - n_splits * test_size
+    if test_size < 1 or first_train < min_train:
+        raise ValueError(f"Dados insuficientes para {n_splits} folds temporais")
+    
+    splits = []
+    for k in range(n_splits):
+        train_end = first_train + k * test_size
+        train_start = 0 if scheme == 'expanding' else train_end - first_train
+        splits.append((train_start, train_end, train_end + test_size))
+    return splits
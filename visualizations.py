@@ -1,10 +1,13 @@
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 import pandas as pd
 import numpy as np
-import seaborn as sns
-import matplotlib.pyplot as plt
+from typing import Union
+from draw_store import DrawStore
+from lazy_imports import LazyModule
+
+# Plotly só é importado quando o primeiro gráfico é montado
+px = LazyModule('plotly.express')
+go = LazyModule('plotly.graph_objects')
+subplots = LazyModule('plotly.subplots')
 
 class MilionariaVisualizer:
     """Classe para visualizações da +Milionária"""
@@ -19,8 +22,23 @@ class MilionariaVisualizer:
             'info': '#17a2b8'
         }
     
-    def plot_number_frequency(self, freq_data: dict, title: str = "Frequência dos Números") -> go.Figure:
+    @staticmethod
+    def _as_frame(data: Union[pd.DataFrame, DrawStore]) -> pd.DataFrame:
+        """Aceita um DrawStore no lugar do DataFrame pré-processado"""
+        if isinstance(data, DrawStore):
+            return data.to_dataframe(with_patterns=True)
+        return data
+    
+    @staticmethod
+    def _as_frequencies(freq_data: Union[dict, DrawStore], key: str) -> dict:
+        """Aceita um DrawStore no lugar do dicionário de frequências"""
+        if isinstance(freq_data, DrawStore):
+            return freq_data.frequency_analysis()[key]
+        return freq_data
+    
+    def plot_number_frequency(self, freq_data: Union[dict, DrawStore], title: str = "Frequência dos Números") -> 'go.Figure':
         """Gráfico de barras da frequência dos números"""
+        freq_data = self._as_frequencies(freq_data, 'numeros')
         if not freq_data:
             return None
         
@@ -45,8 +63,9 @@ class MilionariaVisualizer:
         
         return fig
     
-    def plot_clover_frequency(self, freq_data: dict, title: str = "Frequência dos Trevos") -> go.Figure:
+    def plot_clover_frequency(self, freq_data: Union[dict, DrawStore], title: str = "Frequência dos Trevos") -> 'go.Figure':
         """Gráfico de barras da frequência dos trevos"""
+        freq_data = self._as_frequencies(freq_data, 'trevos')
         if not freq_data:
             return None
         
@@ -70,8 +89,9 @@ class MilionariaVisualizer:
         
         return fig
     
-    def plot_sum_distribution(self, data: pd.DataFrame) -> go.Figure:
+    def plot_sum_distribution(self, data: Union[pd.DataFrame, DrawStore]) -> 'go.Figure':
         """Distribuição da soma dos números"""
+        data = self._as_frame(data)
         if 'soma_numeros' not in data.columns:
             return None
         
@@ -100,8 +120,9 @@ class MilionariaVisualizer:
         
         return fig
     
-    def plot_even_odd_distribution(self, data: pd.DataFrame) -> go.Figure:
+    def plot_even_odd_distribution(self, data: Union[pd.DataFrame, DrawStore]) -> 'go.Figure':
         """Distribuição de números pares e ímpares"""
+        data = self._as_frame(data)
         if 'pares' not in data.columns:
             return None
         
@@ -120,8 +141,9 @@ class MilionariaVisualizer:
         
         return fig
     
-    def plot_decade_distribution(self, data: pd.DataFrame) -> go.Figure:
+    def plot_decade_distribution(self, data: Union[pd.DataFrame, DrawStore]) -> 'go.Figure':
         """Distribuição por dezenas"""
+        data = self._as_frame(data)
         decade_cols = [col for col in data.columns if col.startswith('dezena_')]
         
         if not decade_cols:
@@ -148,8 +170,9 @@ class MilionariaVisualizer:
         
         return fig
     
-    def plot_correlation_heatmap(self, data: pd.DataFrame) -> go.Figure:
+    def plot_correlation_heatmap(self, data: Union[pd.DataFrame, DrawStore]) -> 'go.Figure':
         """Heatmap de correlação entre posições"""
+        data = self._as_frame(data)
         number_cols = [col for col in data.columns if 'Num' in col and not 'soma' in col.lower()]
         
         if len(number_cols) < 2:
@@ -168,8 +191,9 @@ class MilionariaVisualizer:
         
         return fig
     
-    def plot_time_series(self, data: pd.DataFrame, column: str, title: str = None) -> go.Figure:
+    def plot_time_series(self, data: Union[pd.DataFrame, DrawStore], column: str, title: str = None) -> 'go.Figure':
         """Série temporal de uma coluna"""
+        data = self._as_frame(data)
         if 'Data' not in data.columns or column not in data.columns:
             return None
         
@@ -197,7 +221,7 @@ class MilionariaVisualizer:
         
         return fig
     
-    def plot_model_comparison(self, results: dict) -> go.Figure:
+    def plot_model_comparison(self, results: dict) -> 'go.Figure':
         """Comparação de performance dos modelos"""
         if not results:
             return None
@@ -206,7 +230,7 @@ class MilionariaVisualizer:
         mae_values = [results[model].get('mae', 0) for model in models]
         rmse_values = [results[model].get('rmse', 0) for model in models]
         
-        fig = make_subplots(
+        fig = subplots.make_subplots(
             rows=1, cols=2,
             subplot_titles=('Erro Médio Absoluto (MAE)', 'Raiz do Erro Quadrático Médio (RMSE)')
         )
@@ -229,7 +253,7 @@ class MilionariaVisualizer:
         
         return fig
     
-    def plot_backtest_results(self, backtest_results: dict) -> go.Figure:
+    def plot_backtest_results(self, backtest_results: dict) -> 'go.Figure':
         """Visualização dos resultados do backtesting"""
         if not backtest_results:
             return None
@@ -249,7 +273,7 @@ class MilionariaVisualizer:
             else:
                 avg_hits.append(0)
         
-        fig = make_subplots(
+        fig = subplots.make_subplots(
             rows=1, cols=2,
             subplot_titles=('Taxa de Sucesso 3+ Acertos (%)', 'Média de Acertos por Sorteio')
         )
@@ -272,7 +296,7 @@ class MilionariaVisualizer:
         
         return fig
     
-    def plot_prediction_confidence(self, predictions: list) -> go.Figure:
+    def plot_prediction_confidence(self, predictions: list) -> 'go.Figure':
         """Gráfico de confiança das predições"""
         if not predictions:
             return None
@@ -297,8 +321,9 @@ class MilionariaVisualizer:
         
         return fig
     
-    def create_number_grid(self, freq_data: dict, max_freq: int = None) -> go.Figure:
+    def create_number_grid(self, freq_data: Union[dict, DrawStore], max_freq: int = None) -> 'go.Figure':
         """Grid visual dos números com intensidade baseada na frequência"""
+        freq_data = self._as_frequencies(freq_data, 'numeros')
         if not freq_data:
             return None
         